@@ -0,0 +1,87 @@
+# This python file is a micro-benchmark for container link extraction. It compares the old path (get_bs_container() + find_all() on every
+# container + dedupe) with get_container_anchors() on saved listing HTMLs, and checks that both return the exact same links.
+#   python bench_links.py --site acadia_pharm_inc             (listing pages saved in the HTTP cache for that site)
+#   python bench_links.py --tag div --class results page.html (any saved HTML files)
+
+import sys
+import json
+import timeit
+import argparse
+from html_parser import make_soup
+from http_cache import http_cache
+from link_collectors import get_bs_container, get_container_anchors, is_article_href
+
+# ==========================================================================================
+#                          FUNCTIONS : OLD AND NEW EXTRACTION
+# ==========================================================================================
+def links_old(soup, container):
+    links = []
+    for c in get_bs_container(soup, container):
+        for a in c.find_all("a", href=True):
+            if is_article_href(a["href"]):
+                links.append(a["href"])
+    return list(dict.fromkeys(links))
+
+
+def links_new(soup, container):
+    return list(dict.fromkeys(a["href"] for a in get_container_anchors(soup, container) if is_article_href(a["href"])))
+
+
+# listing pages in the HTTP cache whose URL starts with the site's listing URL
+def cached_listing_paths(site_url):
+    http_cache.get(site_url) # loads the index
+    return [http_cache.body_path(entry["key"]) for url, entry in http_cache.entries.items() if url.startswith(site_url)]
+
+
+'''
+* function_identifier: bench_file
+* summary: parses one HTML file, then times both extraction paths on the parsed tree (parsing is not timed).
+* parameters:
+    - html_path: saved HTML file
+    - container: container dictionary ('tag' and 'class') or None
+    - repeat: number of runs per path, the fastest is kept
+* return: (link count, old seconds, new seconds, outputs match)
+'''
+def bench_file(html_path, container, repeat):
+    with open(html_path, "r", encoding="utf-8", errors="ignore") as f:
+        soup = make_soup(f.read())
+    old = links_old(soup, container)
+    new = links_new(soup, container)
+    old_time = min(timeit.repeat(lambda: links_old(soup, container), number=1, repeat=repeat))
+    new_time = min(timeit.repeat(lambda: links_new(soup, container), number=1, repeat=repeat))
+    return len(new), old_time, new_time, old == new
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark container link extraction on saved listing HTMLs.")
+    parser.add_argument("html_paths", nargs="*", help="saved HTML files")
+    parser.add_argument("--site", help="site in site_details, uses its article_container and its listing pages in the HTTP cache")
+    parser.add_argument("--tag", help="container tag (ex. div)")
+    parser.add_argument("--class", dest="class_name", help="container class (ex. results)")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per path, the fastest is kept (default: 20)")
+    args = parser.parse_args()
+
+    container = {"tag": args.tag, "class": args.class_name} if args.tag else None
+    html_paths = list(args.html_paths)
+    if args.site:
+        from main import get_site_details
+        site_info = get_site_details()[args.site]
+        container = container or site_info.get("article_container")
+        html_paths += cached_listing_paths(site_info["url"])
+    if not html_paths:
+        print("No HTML files to benchmark. Pass files, or run the scraper once so the site's listing pages are in the HTTP cache.")
+        sys.exit(1)
+
+    print("Container:", json.dumps(container))
+    total_old = total_new = 0
+    mismatched = 0
+    for html_path in html_paths:
+        count, old_time, new_time, same = bench_file(html_path, container, args.repeat)
+        total_old += old_time
+        total_new += new_time
+        mismatched += not same
+        print(f"{html_path}: {count} links, old {old_time * 1000:.2f} ms, new {new_time * 1000:.2f} ms,",
+              f"{old_time / new_time if new_time else 0:.1f}x", "" if same else "(OUTPUT MISMATCH)")
+    print(f"\nTotal: old {total_old * 1000:.2f} ms, new {total_new * 1000:.2f} ms, {total_old / total_new if total_new else 0:.1f}x faster,",
+          mismatched, "mismatched file(s).")
+    sys.exit(1 if mismatched else 0)
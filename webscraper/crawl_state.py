@@ -0,0 +1,410 @@
+# This python file stores the crawl state database. Checked links, per-site crawl status, external domains, and article metadata
+# live in one SQLite file (saved_sites/crawl_state.db) with indexes, instead of CSV files that had to be fully re-read.
+# The CSV files can still be produced with:  python crawl_state.py export
+
+import os
+import csv
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+
+DB_FILE = os.path.join("saved_sites", "crawl_state.db")
+
+# (column name in alz_articles.csv, column name in the articles table)
+ARTICLE_COLUMNS = [
+    ("PUBLISHER", "publisher"),
+    ("TITLE", "title"),
+    ("URL", "url"),
+    ("PUBLISH DATE", "publish_date"),
+    ("AUTHOR(S)", "authors"),
+    ("HTML PATH", "html_path"),
+    ("PDF PATH", "pdf_path"),
+    ("BODY", "body"),
+    ("KEYWORD HITS", "keyword_hits"),
+    ("KEYWORD SCORE", "keyword_score"),
+    ("PDF STATUS", "pdf_status"),
+]
+PDF_STATUSES = ["done", "pending", "deferred", "skipped", "failed"] # pending/deferred PDFs are rendered later (pdf_jobs.py)
+MAX_PDF_ATTEMPTS = 3 # failed PDFs are retried by pdf_jobs.py render until they have failed this many times
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_urls (
+    url TEXT PRIMARY KEY,
+    site TEXT,
+    checked_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_seen_urls_site ON seen_urls(site);
+
+CREATE TABLE IF NOT EXISTS site_status (
+    site TEXT PRIMARY KEY,
+    base_url TEXT,
+    status TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    links_found INTEGER DEFAULT 0,
+    alz_links INTEGER DEFAULT 0,
+    articles_saved INTEGER DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS external_domains (
+    domain TEXT PRIMARY KEY,
+    first_seen TEXT
+);
+
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT,
+    publisher TEXT,
+    title TEXT,
+    url TEXT,
+    publish_date TEXT,
+    authors TEXT,
+    html_path TEXT,
+    pdf_path TEXT,
+    body TEXT,
+    keyword_hits TEXT,
+    keyword_score INTEGER DEFAULT 0,
+    pdf_status TEXT DEFAULT 'done',
+    pdf_attempts INTEGER DEFAULT 0,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_articles_site_title ON articles(site, title);
+CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url);
+"""
+
+# (table, column, type) added after the first version of the database. Older databases get them with ALTER TABLE.
+MIGRATIONS = [
+    ("articles", "keyword_hits", "TEXT"),
+    ("articles", "keyword_score", "INTEGER DEFAULT 0"),
+    ("site_status", "high_water_url", "TEXT"),
+    ("site_status", "high_water_at", "TEXT"),
+    ("site_status", "pages_walked", "INTEGER DEFAULT 0"),
+    ("articles", "pdf_status", "TEXT DEFAULT 'done'"),
+    ("articles", "pdf_attempts", "INTEGER DEFAULT 0"),
+]
+
+# indexes on migrated columns, created after the migrations run
+MIGRATED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_articles_score ON articles(keyword_score);
+CREATE INDEX IF NOT EXISTS idx_articles_pdf_status ON articles(pdf_status);
+"""
+
+# ==========================================================================================
+#                          CLASS : CRAWL STATE DATABASE
+# ==========================================================================================
+'''
+* class_identifier: CrawlState
+* summary: embedded SQLite database for everything the scraper remembers between runs. Runs in WAL mode so site workers
+    in different threads can write at the same time, each thread gets its own connection. Every connection is tracked so close() can close them all.
+    The first time the database is created, any existing checked_links.csv, external_links.csv, and alz_articles.csv are imported.
+* parameters:
+    - db_path: path to the SQLite file (default: saved_sites/crawl_state.db)
+    - base_folder: folder that has the old CSV files to import (default: saved_sites)
+    - site_folders: optional dictionary {PDF folder name: site name} (pdf_folder_for() in detail_getters.py), used to find the site of
+        imported alz_articles.csv rows. Without it the folder name is used as the site name.
+'''
+class CrawlState:
+    def __init__(self, db_path=DB_FILE, base_folder="saved_sites", site_folders=None):
+        self.db_path = db_path
+        self.base_folder = base_folder
+        self.site_folders = site_folders or {}
+        self.local = threading.local()
+        self.connections = [] # every thread's connection, closed by close()
+        self.connections_lock = threading.Lock()
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        is_new = not os.path.exists(db_path)
+
+        conn = self.connect()
+        conn.executescript(SCHEMA)
+        self.migrate()
+        conn.commit()
+        if is_new:
+            self.import_csvs()
+        else:
+            self.fix_imported_sites()
+
+    # one connection per thread, sqlite connections can't be shared between threads
+    def connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # check_same_thread is off only so close() can close it from the main thread, it is still only used by this thread
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL") # readers don't block writers, writers don't block readers
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self.local.conn = conn
+            with self.connections_lock:
+                self.connections.append(conn)
+        return conn
+
+    # adds any columns in MIGRATIONS that an older database is missing
+    def migrate(self):
+        conn = self.connect()
+        for table, column, column_type in MIGRATIONS:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(" + table + ")")]
+            if column not in columns:
+                conn.execute("ALTER TABLE " + table + " ADD COLUMN " + column + " " + column_type)
+        conn.executescript(MIGRATED_INDEXES)
+
+    '''
+    * function_identifier: close
+    * summary: closes every thread's connection, including the ones opened by site and PDF worker threads that have already ended.
+        Call it once the threads using the database are done.
+    '''
+    def close(self):
+        with self.connections_lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                print("Unable to close a crawl state database connection.")
+        self.local.conn = None
+
+    # ------------------------------------------------------------------------------------------
+    #                          SEEN URLS
+    # ------------------------------------------------------------------------------------------
+    # returns every checked URL, used to fill CheckedLinkStore's in-memory set once per run
+    def load_seen_urls(self):
+        return [row[0] for row in self.connect().execute("SELECT url FROM seen_urls ORDER BY rowid")]
+
+    # inserts a batch of (url, site) pairs in one transaction, URLs that are already stored are ignored
+    def add_seen_urls(self, rows):
+        now = timestamp()
+        conn = self.connect()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO seen_urls (url, site, checked_at) VALUES (?, ?, ?)", [(url, site, now) for url, site in rows])
+
+    # ------------------------------------------------------------------------------------------
+    #                          EXTERNAL DOMAINS
+    # ------------------------------------------------------------------------------------------
+    def add_external_domains(self, domains):
+        now = timestamp()
+        conn = self.connect()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO external_domains (domain, first_seen) VALUES (?, ?)", [(domain, now) for domain in domains])
+
+    # ------------------------------------------------------------------------------------------
+    #                          SITE STATUS
+    # ------------------------------------------------------------------------------------------
+    def start_site(self, site, base_url):
+        conn = self.connect()
+        with conn:
+            conn.execute("""INSERT INTO site_status (site, base_url, status, started_at, finished_at) VALUES (?, ?, 'running', ?, NULL)
+                            ON CONFLICT(site) DO UPDATE SET base_url = excluded.base_url, status = 'running', started_at = excluded.started_at, finished_at = NULL""",
+                         (site, base_url, timestamp()))
+
+    def finish_site(self, site, status="done", links_found=0, alz_links=0, articles_saved=0):
+        conn = self.connect()
+        with conn:
+            conn.execute("""UPDATE site_status SET status = ?, finished_at = ?, links_found = ?, alz_links = ?, articles_saved = ? WHERE site = ?""",
+                         (status, timestamp(), links_found, alz_links, articles_saved, site))
+
+    # newest link found by the site's last crawl, incremental crawls stop when they reach it
+    def set_high_water(self, site, url, pages_walked=0):
+        conn = self.connect()
+        with conn:
+            conn.execute("""INSERT INTO site_status (site, high_water_url, high_water_at, pages_walked) VALUES (?, ?, ?, ?)
+                            ON CONFLICT(site) DO UPDATE SET high_water_url = excluded.high_water_url, high_water_at = excluded.high_water_at,
+                            pages_walked = excluded.pages_walked""",
+                         (site, url, timestamp(), pages_walked))
+
+    def get_site_status(self, site):
+        cursor = self.connect().execute("SELECT * FROM site_status WHERE site = ?", (site,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    # ------------------------------------------------------------------------------------------
+    #                          ARTICLES
+    # ------------------------------------------------------------------------------------------
+    def has_article_title(self, site, title):
+        return self.connect().execute("SELECT 1 FROM articles WHERE site = ? AND title = ? LIMIT 1", (site, title)).fetchone() is not None
+
+    '''
+    * function_identifier: add_articles
+    * summary: saves a site's article metadata rows (dictionaries keyed like alz_articles.csv). Rows whose title is already stored
+        for the site are skipped, so the same article found under two URLs (or in a later run) is only saved once.
+    * parameters:
+        - site: site name (key in site_details)
+        - rows: list of article metadata dictionaries
+    * return: number of rows saved
+    '''
+    def add_articles(self, site, rows):
+        conn = self.connect()
+        saved = 0
+        db_columns = [db_col for _, db_col in ARTICLE_COLUMNS]
+        insert = ("INSERT INTO articles (site, " + ", ".join(db_columns) + ", created_at) VALUES (?, "
+                  + ", ".join("?" for _ in db_columns) + ", ?)")
+        with conn:
+            for row in rows:
+                title = (row.get("TITLE") or "").strip()
+                if title and title != "N/A" and self.has_article_title(site, title):
+                    print("Skipping duplicate title, metadata for this article already exist under a different URL.")
+                    continue
+                values = article_values(row)
+                conn.execute(insert, [site] + values + [timestamp()])
+                saved += 1
+        return saved
+
+    def count_articles(self):
+        return self.connect().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    # saves a PDF job's result, a failed job counts as one more attempt
+    def set_article_pdf(self, site, url, pdf_path, status):
+        conn = self.connect()
+        with conn:
+            conn.execute("UPDATE articles SET pdf_path = ?, pdf_status = ?, pdf_attempts = COALESCE(pdf_attempts, 0) + ? WHERE site = ? AND url = ?",
+                         (pdf_path, status, 1 if status == "failed" else 0, site, url))
+
+    # articles whose PDF still needs to be made, oldest first. Failed PDFs are included until they have failed max_attempts times.
+    def pending_pdfs(self, site=None, statuses=("pending", "deferred"), max_attempts=MAX_PDF_ATTEMPTS):
+        query = ("SELECT site, url, title, html_path FROM articles WHERE (pdf_status IN ("
+                 + ", ".join("?" for _ in statuses) + ")")
+        params = list(statuses)
+        if max_attempts:
+            query += " OR (pdf_status = 'failed' AND COALESCE(pdf_attempts, 0) < ?)"
+            params.append(max_attempts)
+        query += ")"
+        if site:
+            query += " AND site = ?"
+            params.append(site)
+        return self.connect().execute(query + " ORDER BY id", params).fetchall()
+
+    # {pdf status: number of articles}
+    def count_pdf_statuses(self):
+        return dict(self.connect().execute("SELECT pdf_status, COUNT(*) FROM articles GROUP BY pdf_status").fetchall())
+
+    # most relevant articles first, ranked by the keyword score saved with them
+    def top_articles(self, limit=20, site=None):
+        query = "SELECT site, title, url, keyword_score, keyword_hits FROM articles"
+        params = []
+        if site:
+            query += " WHERE site = ?"
+            params.append(site)
+        query += " ORDER BY keyword_score DESC, id LIMIT ?"
+        params.append(limit)
+        return self.connect().execute(query, params).fetchall()
+
+    # ------------------------------------------------------------------------------------------
+    #                          CSV IMPORT / EXPORT
+    # ------------------------------------------------------------------------------------------
+    # one time import of the CSV ledgers used before the database existed
+    def import_csvs(self):
+        checked_path = os.path.join(self.base_folder, "checked_links.csv")
+        external_path = os.path.join(self.base_folder, "external_links.csv")
+        articles_path = os.path.join(self.base_folder, "alz_articles.csv")
+        try:
+            if os.path.exists(checked_path):
+                with open(checked_path, "r", newline="", encoding="utf-8") as f:
+                    self.add_seen_urls([(row[0], None) for row in csv.reader(f) if row])
+            if os.path.exists(external_path):
+                with open(external_path, "r", newline="", encoding="utf-8") as f:
+                    self.add_external_domains([row[0] for row in csv.reader(f) if row])
+            if os.path.exists(articles_path):
+                conn = self.connect()
+                db_columns = [db_col for _, db_col in ARTICLE_COLUMNS]
+                insert = ("INSERT INTO articles (site, " + ", ".join(db_columns) + ", created_at) VALUES (?, "
+                          + ", ".join("?" for _ in db_columns) + ", ?)")
+                with open(articles_path, "r", newline="", encoding="utf-8") as f, conn:
+                    for row in csv.DictReader(f):
+                        # the CSV has no site column, PDFs are saved in '<PDF folder name>_pdfs' folders. Some sites keep an older
+                        # folder name (ex. alz_reasearch_uk), so the folder is mapped back to the site key used by add_articles().
+                        pdf_folder = os.path.basename(os.path.dirname(row.get("PDF PATH") or ""))
+                        folder_name = pdf_folder[:-len("_pdfs")] if pdf_folder.endswith("_pdfs") else None
+                        site = self.site_folders.get(folder_name, folder_name)
+                        conn.execute(insert, [site] + article_values(row) + [timestamp()])
+            print("Imported existing CSV files into", self.db_path)
+        except Exception as e:
+            print("Failed to import existing CSV files into", self.db_path)
+
+    # databases imported before site_folders was used have PDF folder names as the site of some rows, renaming them to the site key
+    def fix_imported_sites(self):
+        renames = [(site, folder_name) for folder_name, site in self.site_folders.items()
+                   if folder_name != site and folder_name not in self.site_folders.values()]
+        if not renames:
+            return
+        conn = self.connect()
+        with conn:
+            conn.executemany("UPDATE articles SET site = ? WHERE site = ?", renames)
+
+    '''
+    * function_identifier: export_csv
+    * summary: writes checked_links.csv, external_links.csv, and alz_articles.csv from the database, in the same format the scraper used to write.
+    * parameters:
+        - out_folder: folder to write the CSV files to (default: saved_sites)
+    '''
+    def export_csv(self, out_folder="saved_sites"):
+        os.makedirs(out_folder, exist_ok=True)
+        conn = self.connect()
+        write_csv(os.path.join(out_folder, "checked_links.csv"), None, conn.execute("SELECT url FROM seen_urls ORDER BY rowid"))
+        write_csv(os.path.join(out_folder, "external_links.csv"), None, conn.execute("SELECT domain FROM external_domains ORDER BY rowid"))
+        db_columns = [db_col for _, db_col in ARTICLE_COLUMNS]
+        write_csv(os.path.join(out_folder, "alz_articles.csv"), [csv_col for csv_col, _ in ARTICLE_COLUMNS],
+                  conn.execute("SELECT " + ", ".join(db_columns) + " FROM articles ORDER BY id"))
+
+
+# ==========================================================================================
+#                          FUNCTIONS : HELPERS
+# ==========================================================================================
+def timestamp():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+# values for the articles table's columns from a metadata row, rows saved before keyword scoring get a score of 0
+def article_values(row):
+    values = []
+    for csv_col, db_col in ARTICLE_COLUMNS:
+        value = row.get(csv_col, "")
+        if db_col == "keyword_score":
+            value = int(value) if str(value).strip().isdigit() else 0
+        if db_col == "pdf_status" and value not in PDF_STATUSES:
+            value = "done" # rows saved before PDFs had a status always had their PDF
+        values.append(value)
+    return values
+
+
+'''
+* function_identifier: write_csv
+* summary: writes rows to a CSV through a temp file so a crash can't leave half a file.
+* parameters:
+    - path: CSV file path
+    - header: list of column names, or None for no header row
+    - rows: iterable of row tuples
+'''
+def write_csv(path, header, rows):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(header)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+    os.replace(temp_path, path)
+
+
+# ==========================================================================================
+#                          COMMAND LINE
+# ==========================================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl state database tools.")
+    parser.add_argument("command", choices=["export", "rank"], help="export: write the CSV files from the database, rank: list the most relevant articles")
+    parser.add_argument("--db", default=DB_FILE, help="path to the crawl state database")
+    parser.add_argument("--out", default="saved_sites", help="folder to write the CSV files to")
+    parser.add_argument("--site", default=None, help="rank: only list articles from this site")
+    parser.add_argument("--limit", type=int, default=20, help="rank: number of articles to list")
+    args = parser.parse_args()
+
+    state = CrawlState(args.db)
+    if args.command == "export":
+        state.export_csv(args.out)
+        print("Exported CSV files to", args.out)
+    elif args.command == "rank":
+        for site, title, url, score, hits in state.top_articles(args.limit, args.site):
+            print(str(score).rjust(5), "|", site, "|", title, "|", url)
+            print("      ", hits or "{}")
+    state.close()
@@ -0,0 +1,125 @@
+# This python file stores the parsed document cache. A matching article used to be parsed with BeautifulSoup twice, once by the
+# keyword filter and again by the site's detail getter. The filter now puts its parsed tree here and the detail getter reuses it.
+
+import os
+import threading
+from collections import OrderedDict
+from html_parser import make_soup, resolve_soup
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024 # memory budget for every cached tree together
+TREE_SIZE_FACTOR = 10 # a parsed tree takes roughly 10x the memory of its HTML text
+
+# ==========================================================================================
+#                          CLASS : PARSED DOCUMENT CACHE
+# ==========================================================================================
+'''
+* class_identifier: DocumentCache
+* summary: LRU cache of parsed BeautifulSoup trees keyed by file path + modification time, so an HTML file that changed on disk is parsed again.
+    A tree can also be cached as a LazySoup (html_parser.py), it is then parsed the first time it is read.
+    Each tree's memory is estimated from its HTML size, and the least recently used trees are evicted once the budget is exceeded.
+    Cached trees are shared between threads and must only be read, never modified.
+* parameters:
+    - max_bytes: memory budget for every cached tree together
+'''
+class DocumentCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # {path: (mtime, estimated_size, soup)}, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    # (absolute path, mtime) for a file, mtime is None if the file does not exist
+    @staticmethod
+    def file_key(path):
+        path = os.path.abspath(path)
+        try:
+            return path, os.stat(path).st_mtime_ns
+        except OSError:
+            return path, None
+
+    # returns the cached tree for a file, or None if it is not cached or the file changed since it was cached
+    def get(self, path):
+        path, mtime = self.file_key(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry[0] != mtime:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(path)
+            self.hits += 1
+            soup = entry[2]
+        return resolve_soup(soup) # parsed outside the cache lock, LazySoup has its own
+
+    '''
+    * function_identifier: put
+    * summary: caches a parsed tree for a file that was just written, then evicts the least recently used trees that no longer fit the budget.
+    * parameters:
+        - path: path of the HTML file the tree was parsed from
+        - soup: parsed BeautifulSoup tree, or a LazySoup
+        - html_size: length of the HTML text, used to estimate the tree's memory
+    '''
+    def put(self, path, soup, html_size):
+        path, mtime = self.file_key(path)
+        size = html_size * TREE_SIZE_FACTOR
+        if mtime is None or size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self.entries[path] = (mtime, size, soup)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    # drops a file's tree, used once an article's metadata is extracted and its HTML is renamed
+    def discard(self, path):
+        path = os.path.abspath(path)
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+# shared cache used by the keyword filter and every detail getter
+document_cache = DocumentCache()
+
+# ==========================================================================================
+#                          FUNCTIONS : SHARED CACHE HELPERS
+# ==========================================================================================
+'''
+* function_identifier: parse_html
+* summary: parses HTML text with the selected parser backend (html_parser.py) and, if a file path is given, caches the tree for that file (the file must already be written).
+* parameters:
+    - html_content: HTML text
+    - html_path: optional path of the file html_content was saved to
+* return: parsed BeautifulSoup tree
+'''
+def parse_html(html_content, html_path=None):
+    soup = make_soup(html_content)
+    if html_path:
+        document_cache.put(html_path, soup, len(html_content))
+    return soup
+
+
+'''
+* function_identifier: load_document
+* summary: returns the parsed tree for a saved HTML file, from the cache if the file has not changed since it was parsed, otherwise reads and parses it.
+* parameters:
+    - html_path: path of the saved HTML file
+* return: parsed BeautifulSoup tree
+'''
+def load_document(html_path):
+    soup = document_cache.get(html_path)
+    if soup is None:
+        with open(html_path, "r", encoding="utf-8") as f:
+            soup = parse_html(f.read(), html_path)
+    return soup
@@ -0,0 +1,57 @@
+# This python file stores the per domain download cap. Every article download, requests fetch workers and selenium renders alike,
+# takes a slot on its domain first, so sites that share a domain also share one cap no matter how many workers each site runs.
+# Spacing between requests is handled by the shared rate limiter (rate_limiter.py), this only limits how many are in flight at once.
+
+import threading
+from http_session import get_domain
+
+DEFAULT_DOMAIN_CONCURRENCY = 4 # max article downloads in flight to a single domain (site_details 'max_concurrency')
+
+# ==========================================================================================
+#                          CLASS : PER DOMAIN POLITENESS
+# ==========================================================================================
+'''
+* class_identifier: DomainThrottle
+* summary: caps how many requests can be in flight to one domain. Only the threads hitting the same domain wait on each other, nothing else is blocked.
+* parameters:
+    - max_concurrency: max requests in flight per domain, for domains that were not configured
+'''
+class DomainThrottle:
+    def __init__(self, max_concurrency=DEFAULT_DOMAIN_CONCURRENCY):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.lock = threading.Lock()
+        self.limits = {} # {domain: max requests in flight}
+        self.semaphores = {} # {domain: threading.Semaphore}
+
+    '''
+    * function_identifier: configure
+    * summary: sets a domain's cap. Must be called before the first download from that domain to take effect.
+        If two sites on the same domain set different caps, the lower one is kept.
+    * parameters:
+        - url: a URL on the domain being configured (the site's base URL is fine)
+        - max_concurrency: max requests in flight to the domain
+    '''
+    def configure(self, url, max_concurrency):
+        domain = get_domain(url)
+        limit = max(1, int(max_concurrency))
+        with self.lock:
+            self.limits[domain] = min(limit, self.limits.get(domain, limit))
+
+    def get_semaphore(self, domain):
+        with self.lock:
+            if domain not in self.semaphores:
+                self.semaphores[domain] = threading.Semaphore(self.limits.get(domain, self.max_concurrency))
+            return self.semaphores[domain]
+
+    # waits for a free slot on the URL's domain, returns the domain's semaphore so it can be released
+    def acquire(self, url):
+        semaphore = self.get_semaphore(get_domain(url))
+        semaphore.acquire()
+        return semaphore
+
+
+domain_throttle = DomainThrottle() # shared by every site pipeline in the run
+
+
+def configure_domain_concurrency(url, max_concurrency=DEFAULT_DOMAIN_CONCURRENCY):
+    domain_throttle.configure(url, max_concurrency)
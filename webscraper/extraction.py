@@ -0,0 +1,173 @@
+# This python file stores the declarative metadata extraction engine. Each site's title, date, author, and body selectors live in
+# site_details (the 'extract' entry) instead of a copy-pasted get_<site name>_details function. Selectors are compiled once per site
+# and every document is walked a single time to find all of them.
+
+import soupsieve as sv
+from bs4 import Tag
+
+FIELDS = {"title": "TITLE", "date": "PUBLISH DATE", "author": "AUTHOR(S)", "body": "BODY"} # 'extract' key: CSV column
+
+'''
+Extraction spec ('extract' entry in site_details):
+    - publisher: publisher name saved for every article
+    - title / date / author: field spec, or None if the site doesn't list it (saved as N/A)
+        - select: CSS selector, or a list of selectors tried in order (first one that matches the page wins)
+        - text: "strip" strips every piece of text and joins them (get_text(strip=True), default), "trim" only trims the ends (.text.strip())
+        - remove: optional list of strings removed from the text (ex. a "작성일" label in front of the date)
+        - require: optional CSS selector the first match of a selector has to contain, otherwise the next selector in the list is tried
+          (ex. a rich text block that sometimes has no paragraphs)
+    - body: field spec for the element(s) holding the article body, with the extra keys
+        - all: True to use every matching element, False (default) to only use the first
+        - paragraphs: CSS selector for the paragraphs inside the body element(s) (default: "p")
+        - prefer: optional CSS selector inside each paragraph whose text is used instead of the paragraph's, if it has any
+    - byline: optional spec for sites that put the author and date in one line, ex. "By Alzheimer's Research UK | Friday 25 July 2025"
+        - select: CSS selector for the elements that can hold the byline, checked in page order
+        - line: CSS selector for the byline inside each element (default: "p", first match is used)
+        - separator: text between the author and date (default: "|")
+        - prefix: text in front of the author that is removed, also marks a line as a byline (default: "by ")
+    - pdf_folder: optional name for the site's PDF folder (default: the site name)
+'''
+
+# ==========================================================================================
+#                          CLASS : COMPILED SITE EXTRACTOR
+# ==========================================================================================
+'''
+* class_identifier: Extractor
+* summary: a site's extraction spec with every CSS selector compiled once. extract() walks a parsed document one time, testing each element
+    against the selectors that still need a match, then builds the metadata fields from the elements that were found.
+* parameters:
+    - spec: the site's 'extract' dictionary (see above)
+'''
+class Extractor:
+    def __init__(self, spec):
+        self.spec = spec
+        self.publisher = spec.get("publisher", "")
+        self.selectors = {} # {selector text: compiled selector}
+        self.collect_all = set() # selectors whose every match is needed, not only the first
+        self.fields = {} # {field key: copy of the field's spec with 'select' always a list}
+
+        for key in list(FIELDS) + ["byline"]:
+            if not spec.get(key):
+                continue
+            field = dict(spec[key])
+            select = field["select"]
+            field["select"] = [select] if isinstance(select, str) else list(select)
+            for selector in field["select"]:
+                self.compile(selector)
+            if field.get("require"):
+                field["require"] = sv.compile(field["require"])
+            if key == "body":
+                if field.get("all"):
+                    self.collect_all.update(field["select"])
+                field["paragraphs"] = sv.compile(field.get("paragraphs", "p"))
+                if field.get("prefer"):
+                    field["prefer"] = sv.compile(field["prefer"])
+            if key == "byline":
+                self.collect_all.update(field["select"])
+                field["line"] = sv.compile(field.get("line", "p"))
+            self.fields[key] = field
+
+    def compile(self, selector):
+        if selector not in self.selectors:
+            self.selectors[selector] = sv.compile(selector)
+
+    '''
+    * function_identifier: find_matches
+    * summary: walks the document once and records, for every compiled selector, its first match (or every match for selectors in collect_all).
+        A selector that only needs its first match stops being tested once it has one.
+    * parameters:
+        - soup: parsed BeautifulSoup document
+    * return: dictionary {selector text: list of matching elements in page order}
+    '''
+    def find_matches(self, soup):
+        matches = {selector: [] for selector in self.selectors}
+        pending = list(self.selectors.items())
+        for element in soup.descendants:
+            if not pending:
+                break
+            if not isinstance(element, Tag):
+                continue
+            done = False
+            for selector, compiled in pending:
+                if compiled.match(element):
+                    matches[selector].append(element)
+                    if selector not in self.collect_all:
+                        done = True
+            if done:
+                pending = [(s, c) for s, c in pending if s in self.collect_all or not matches[s]]
+        return matches
+
+    # elements for a field, from the first of its selectors that matched anything (and whose first match has the 'require' element)
+    @staticmethod
+    def pick(field, matches):
+        require = field.get("require")
+        for selector in field["select"]:
+            if matches[selector] and (require is None or require.select_one(matches[selector][0])):
+                return matches[selector]
+        return []
+
+    @staticmethod
+    def element_text(element, field):
+        if field.get("text") == "trim":
+            text = element.text.strip()
+        else:
+            text = element.get_text(strip=True)
+        for remove in field.get("remove", []):
+            text = text.replace(remove, "").strip()
+        return text
+
+    # "By X | date" -> (author, date), or None if the line is not a byline
+    @staticmethod
+    def split_byline(text, byline):
+        separator = byline.get("separator", "|")
+        prefix = byline.get("prefix", "by ")
+        if separator not in text and prefix not in text.lower():
+            return None
+        if separator not in text:
+            return "N/A", text
+        author, date = [part.strip() for part in text.split(separator, 1)]
+        if author.lower().startswith(prefix):
+            author = author[len(prefix):].strip()
+        return author, date
+
+    '''
+    * function_identifier: extract
+    * summary: pulls the site's metadata fields out of a parsed document. Fields that are missing or empty are saved as N/A.
+    * parameters:
+        - soup: parsed BeautifulSoup document
+    * return: dictionary with the PUBLISHER, TITLE, PUBLISH DATE, AUTHOR(S), and BODY columns
+    '''
+    def extract(self, soup):
+        matches = self.find_matches(soup)
+        details = {"PUBLISHER": self.publisher}
+
+        for key in ("title", "date", "author"):
+            field = self.fields.get(key)
+            elements = self.pick(field, matches) if field else []
+            details[FIELDS[key]] = (self.element_text(elements[0], field) if elements else "") or "N/A"
+
+        byline = self.fields.get("byline")
+        if byline:
+            for element in self.pick(byline, matches):
+                line = byline["line"].select_one(element)
+                parts = self.split_byline(line.text.strip(), byline) if line else None
+                if parts:
+                    details["AUTHOR(S)"], details["PUBLISH DATE"] = parts
+                    break
+
+        body = self.fields.get("body")
+        all_text = []
+        if body:
+            containers = self.pick(body, matches)
+            if not body.get("all"):
+                containers = containers[:1]
+            for container in containers: # keeping body paragraph text
+                for p in body["paragraphs"].select(container):
+                    preferred = body["prefer"].select_one(p) if body.get("prefer") else None
+                    txt = preferred.get_text(strip=True) if preferred else ""
+                    if not txt:
+                        txt = p.get_text(strip=True)
+                    if txt:
+                        all_text.append(txt)
+        details["BODY"] = "\n".join(all_text) if all_text else "N/A"
+        return details
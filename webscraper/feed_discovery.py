@@ -0,0 +1,289 @@
+# This python file stores the feed / sitemap discovery stage. Most news and press release CMSs publish a sitemap.xml or an RSS / Atom
+# feed that lists every article with its last modified date, so one XML fetch can replace dozens of listing pages or button clicks.
+#   - feeds are found through the site's 'feeds' setting, the listing page's <link rel="alternate"> tags, robots.txt, and common paths.
+#   - feeds are stream parsed (iterparse), each entry is cleared once it is read so a large sitemap never sits in memory as a whole.
+#   - entries are filtered by domain, the site's URL pattern, and their lastmod / publish date.
+
+import re
+import gzip
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse, urljoin, parse_qsl
+from html_parser import make_soup
+from http_session import fetch
+from http_cache import fetch_cached
+from rate_limiter import wait_for_token
+
+COMMON_FEED_PATHS = ["/sitemap_index.xml", "/sitemap.xml", "/feed/"] # probed when the page and robots.txt don't list a feed
+FEED_TYPES = ("application/rss+xml", "application/atom+xml")
+MAX_SITEMAPS = 50 # max child sitemaps read from sitemap indexes, per site
+FEED_TIMEOUT = 20
+PAGING_PARAMS = {"page", "paged", "pg", "p", "offset", "start"} # query parameters that page through a listing instead of picking it
+
+# ==========================================================================================
+#                          FUNCTIONS : DATES
+# ==========================================================================================
+'''
+* function_identifier: parse_feed_date
+* summary: parses a sitemap lastmod (W3C datetime, ex. 2025-07-25 or 2025-07-25T10:00:00+00:00), an RSS pubDate (RFC 822,
+    ex. Fri, 25 Jul 2025 10:00:00 GMT), or an Atom updated / published date. Dates without a timezone are read as local time.
+* parameters:
+    - text: the date text
+* return: timezone aware datetime, or None if the text is empty or can't be read
+'''
+def parse_feed_date(text):
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(text)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.astimezone(timezone.utc)
+
+
+# ==========================================================================================
+#                          FUNCTIONS : STREAMING FEED PARSER
+# ==========================================================================================
+def local_name(tag):
+    return tag.rsplit("}", 1)[-1].lower() # drops the XML namespace, ex. {http://www.sitemaps.org/schemas/sitemap/0.9}loc -> loc
+
+
+def child_text(element, *names):
+    for child in element:
+        if local_name(child.tag) in names and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+# Atom entries link to the article with <link rel="alternate" href="...">, rel can be left out
+def atom_link(entry):
+    for child in entry:
+        if local_name(child.tag) == "link" and child.get("rel", "alternate") == "alternate" and child.get("href"):
+            return child.get("href")
+    return None
+
+
+'''
+* function_identifier: iter_feed
+* summary: streams a sitemap, sitemap index, RSS feed, or Atom feed and yields its entries as they are parsed. Gzipped sitemaps (.xml.gz)
+    are unpacked while they stream. Stops quietly if the URL doesn't answer with XML.
+* parameters:
+    - url: URL of the feed
+* return: yields (kind, link, date) with kind "page" (sitemap url), "sitemap" (sitemap index entry), or "item" (RSS / Atom entry)
+'''
+def iter_feed(url):
+    try:
+        wait_for_token(url)
+        r = fetch(url, timeout=FEED_TIMEOUT, stream=True)
+    except Exception as e:
+        print("Unable to fetch feed", url)
+        return
+    try:
+        if r.status_code != 200:
+            return
+        r.raw.decode_content = True # undoing Content-Encoding: gzip while streaming
+        source = gzip.GzipFile(fileobj=r.raw) if urlparse(url).path.endswith(".gz") else r.raw
+        root = None
+        for event, element in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            name = local_name(element.tag)
+            if name == "url":
+                entry = ("page", child_text(element, "loc"), child_text(element, "lastmod"))
+            elif name == "sitemap":
+                entry = ("sitemap", child_text(element, "loc"), child_text(element, "lastmod"))
+            elif name == "item":
+                entry = ("item", child_text(element, "link"), child_text(element, "pubdate", "date", "updated"))
+            elif name == "entry":
+                entry = ("item", atom_link(element) or child_text(element, "id"), child_text(element, "updated", "published"))
+            else:
+                continue
+            if entry[1]:
+                yield entry[0], entry[1], parse_feed_date(entry[2])
+            element.clear()
+            root.clear() # entries already read are dropped from the tree
+    except ET.ParseError as e:
+        print("Not a readable feed:", url)
+    except Exception as e:
+        print("Stopped reading feed", url, ":", e)
+    finally:
+        r.close()
+
+
+# ==========================================================================================
+#                          FUNCTIONS : DISCOVERY
+# ==========================================================================================
+'''
+* function_identifier: discover_feed_urls
+* summary: lists the site's candidate feeds in the order they are tried: the site's 'feeds' setting, RSS / Atom feeds linked from the
+    listing page, sitemaps listed in robots.txt, then common sitemap / feed paths.
+    Configured feeds and feeds linked from the listing page are trusted to be the listing's own feed. Anything else (ex. a site wide /feed/)
+    has to prove it covers the listing before pagination is skipped for it.
+* parameters:
+    - site_info: dictionary containing site-specefic information
+* return: list of (feed URL, trusted) with no duplicate URLs
+'''
+def discover_feed_urls(site_info):
+    base_url = site_info["url"]
+    configured = site_info.get("feeds")
+    if configured:
+        return [(feed_url, True) for feed_url in dict.fromkeys(configured)]
+
+    parsed = urlparse(base_url)
+    root_url = parsed.scheme + "://" + parsed.netloc
+    candidates = []
+    linked = []
+
+    # feeds linked from the listing page, usually the feed of that exact news section. Skipped for sites that block requests (html_sel_save).
+    if not site_info.get("html_sel_save"):
+        try:
+            wait_for_token(base_url)
+            html_content, status, not_modified = fetch_cached(base_url)
+            if status == 200:
+                soup = make_soup(html_content)
+                for link in soup.find_all("link", href=True):
+                    rel = [value.lower() for value in link.get("rel", [])]
+                    if "alternate" in rel and link.get("type", "").lower() in FEED_TYPES:
+                        linked.append(urljoin(base_url, link["href"]))
+        except Exception as e:
+            print("Unable to look for feed links on", base_url)
+
+    # sitemaps listed in robots.txt
+    try:
+        wait_for_token(root_url)
+        robots, status, not_modified = fetch_cached(root_url + "/robots.txt")
+        if status == 200:
+            for line in robots.splitlines():
+                if line.lower().startswith("sitemap:"):
+                    candidates.append(line.split(":", 1)[1].strip())
+    except Exception as e:
+        print("Unable to read robots.txt for", root_url)
+
+    candidates += [root_url + path for path in COMMON_FEED_PATHS]
+    return [(feed_url, True) for feed_url in dict.fromkeys(linked)] + [(feed_url, False) for feed_url in dict.fromkeys(candidates) if feed_url not in linked]
+
+
+def bare_domain(url):
+    domain = urlparse(url).netloc.lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+'''
+* function_identifier: make_link_filter
+* summary: builds the check every feed entry has to pass. Entries must be on the site's domain and match the site's 'feed_url_pattern'
+    (regular expression). Without a pattern, sitemap entries must be under the listing page's path (ex. https://neurim.com/news/...),
+    since a sitemap lists every page on the site. RSS / Atom entries are already articles and only need the domain.
+    Listings picked by their query (ex. gemvax's /bbs/board.php?bo_table=releases_en) also need the same query parameters, other than
+    the ones in PAGING_PARAMS, so entries from the site's other boards are dropped.
+* parameters:
+    - site_info: dictionary containing site-specefic information
+* return: function (kind, link) -> True if the link is kept
+'''
+def make_link_filter(site_info):
+    base_url = site_info["url"]
+    domain = bare_domain(base_url)
+    pattern = re.compile(site_info["feed_url_pattern"]) if site_info.get("feed_url_pattern") else None
+    listing_path = urlparse(base_url).path or "/"
+    listing_query = {key: value for key, value in parse_qsl(urlparse(base_url).query) if key.lower() not in PAGING_PARAMS}
+    if not listing_path.endswith("/"):
+        listing_path = listing_path.rsplit("/", 1)[0] + "/"
+
+    def keep(kind, link):
+        if bare_domain(link) != domain or link.rstrip("/") == base_url.rstrip("/"):
+            return False
+        if pattern is not None:
+            return bool(pattern.search(link))
+        if listing_query:
+            query = dict(parse_qsl(urlparse(link).query))
+            if any(query.get(key) != value for key, value in listing_query.items()):
+                return False
+        if kind == "page":
+            return urlparse(link).path.startswith(listing_path)
+        return True
+
+    return keep
+
+
+'''
+* function_identifier: get_feed_links
+* summary: finds the site's first feed or sitemap with matching entries and returns its article links, newest first. Child sitemaps in
+    a sitemap index are followed, skipping any whose lastmod is older than since.
+    A sitemap lists every page on the site, not just the articles, so it is only complete if it is known to cover the listing: the site
+    has a 'feed_url_pattern', or the newest link on the listing page is in the sitemap (or is already checked and nothing in the sitemap
+    changed since the last crawl). A sitemap index with more than MAX_SITEMAPS children is never complete.
+    An RSS / Atom feed only lists the latest articles, so it is complete only if it is the listing's feed (it was configured or linked
+    from the listing page, or it has the newest listing link) and it reaches back to links that were already checked (or to entries
+    older than since), otherwise pagination is still needed to find older articles. A site wide feed found at a common path would
+    otherwise pass the second check on every run after the first and hide articles only the listing has.
+    A feed whose entries are all older than since is complete with no links, nothing was published since the last crawl.
+* parameters:
+    - site_name: name of the website
+    - site_info: dictionary containing site-specefic information
+    - checked_links: previously checked links (set or CheckedLinkStore)
+    - since: optional timezone aware datetime, entries last modified before it are skipped (ex. the last crawl's time)
+    - listing_links: optional links on the first listing page, in page order, used to check that a feed or sitemap covers the listing
+* return: (links, complete). links is a list of article links, newest first. complete is True if pagination can be skipped.
+'''
+def get_feed_links(site_name, site_info, checked_links, since=None, listing_links=None):
+    keep = make_link_filter(site_info)
+    has_pattern = bool(site_info.get("feed_url_pattern"))
+    newest_listed = listing_links[0] if listing_links else None
+
+    for feed_url, trusted in discover_feed_urls(site_info):
+        entries = {} # {link: date}, first date seen wins
+        is_sitemap = False
+        reached_old = False # an entry older than since was skipped, the feed covers everything since the last crawl
+        listed = False # the newest listing link is in the feed or sitemap
+        pending = [feed_url]
+        sitemaps_read = 0
+
+        while pending and sitemaps_read < MAX_SITEMAPS:
+            url = pending.pop(0)
+            sitemaps_read += 1
+            for kind, link, date in iter_feed(url):
+                is_sitemap = is_sitemap or kind != "item"
+                if kind != "sitemap":
+                    listed = listed or (newest_listed is not None and link.rstrip("/") == newest_listed.rstrip("/"))
+                if since is not None and date is not None and date < since:
+                    reached_old = True
+                    continue
+                if kind == "sitemap":
+                    pending.append(link)
+                    continue
+                if keep(kind, link) and link not in entries:
+                    entries[link] = date
+
+        if not entries and not reached_old:
+            continue
+
+        # newest first, entries without a date keep their feed order after the dated ones
+        oldest = datetime.min.replace(tzinfo=timezone.utc)
+        links = sorted(entries, key=lambda link: entries[link] or oldest, reverse=True)
+        if pending:
+            print("Stopped after", MAX_SITEMAPS, "sitemaps in", feed_url, "for", site_name)
+            complete = False
+        elif is_sitemap:
+            complete = has_pattern or listed or (reached_old and newest_listed is not None and newest_listed in checked_links)
+        else:
+            complete = (trusted or listed) and (reached_old or any(link in checked_links for link in links))
+
+        if not links:
+            if complete:
+                print("Nothing new in", feed_url, "for", site_name, "since the last crawl.")
+                return [], True
+            continue
+        print("Found", len(links), "article links in", "sitemap" if is_sitemap else "feed", feed_url, "for", site_name,
+              "(complete)." if complete else "(not complete, paginating too).")
+        return links, complete
+
+    print("No usable feed or sitemap found for", site_name)
+    return [], False
@@ -0,0 +1,189 @@
+# This python file stores the HTML parser backends. Every parse goes through make_soup() instead of hard coding
+# BeautifulSoup(..., "html.parser"), so a faster backend can be picked with one setting.
+#   - "html.parser": python's built in parser (slowest, no extra packages)
+#   - "lxml": BeautifulSoup on top of lxml's C parser
+#   - "selectolax": lexbor C parser for the keyword filter's text, lxml for everything that needs a BeautifulSoup tree. The lxml tree of
+#     a page the filter keeps is only built when the detail getter first uses it (LazySoup), pages without the keyword(s) never build one.
+# Before switching backends, check that the detail getters still pull the same fields:  python html_parser.py parity <site name> <html files>
+# tests/test_parser_parity.py runs the same check on a saved article fixture for every site, and compares the keyword filter's text.
+
+import os
+import sys
+import argparse
+import threading
+from bs4 import BeautifulSoup
+
+try:
+    import lxml # noqa: F401, only checking that it is installed
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = HAS_LXML # selectolax can't build BeautifulSoup trees, lxml is used for those
+except ImportError:
+    HAS_SELECTOLAX = False
+
+BACKENDS = ["html.parser", "lxml", "selectolax"]
+DEFAULT_BACKEND = os.environ.get("WEBSCRAPER_PARSER", "html.parser") # can be overridden per run with the WEBSCRAPER_PARSER environment variable
+
+parser_backend = "html.parser"
+
+# ==========================================================================================
+#                          FUNCTIONS : BACKEND SELECTION
+# ==========================================================================================
+def is_available(backend):
+    if backend == "html.parser":
+        return True
+    if backend == "lxml":
+        return HAS_LXML
+    if backend == "selectolax":
+        return HAS_SELECTOLAX
+    return False
+
+
+'''
+* function_identifier: set_parser_backend
+* summary: selects the parser backend used by every parse. Falls back on "html.parser" if the backend is unknown or its package is not installed.
+* parameters:
+    - backend: "html.parser", "lxml", or "selectolax"
+* return: name of the backend that is now in use
+'''
+def set_parser_backend(backend):
+    global parser_backend
+    if not is_available(backend):
+        print("Parser backend", backend, "is not available, using html.parser.")
+        backend = "html.parser"
+    parser_backend = backend
+    return parser_backend
+
+
+# BeautifulSoup tree builder for the selected backend
+def soup_features(backend=None):
+    backend = backend or parser_backend
+    return "html.parser" if backend == "html.parser" else "lxml"
+
+
+# ==========================================================================================
+#                          FUNCTIONS : PARSING
+# ==========================================================================================
+'''
+* function_identifier: make_soup
+* summary: parses HTML into a BeautifulSoup tree with the selected backend.
+* parameters:
+    - html_content: HTML text (or open file)
+    - backend: optional backend to use instead of the selected one
+* return: parsed BeautifulSoup tree
+'''
+def make_soup(html_content, backend=None):
+    return BeautifulSoup(html_content, soup_features(backend))
+
+
+'''
+* class_identifier: LazySoup
+* summary: a page's BeautifulSoup tree that is only parsed the first time it is needed, then kept. Safe to share between threads,
+    the tree is built once.
+* parameters:
+    - html_content: HTML text
+    - backend: optional backend to use instead of the selected one
+'''
+class LazySoup:
+    def __init__(self, html_content, backend=None):
+        self.html_content = html_content
+        self.backend = backend
+        self.soup = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            if self.soup is None:
+                self.soup = make_soup(self.html_content, self.backend)
+                self.html_content = None # the text isn't needed once the tree is built
+            return self.soup
+
+
+# the BeautifulSoup tree of a parse_for_text() result, building it if it was left lazy
+def resolve_soup(soup):
+    return soup.get() if isinstance(soup, LazySoup) else soup
+
+
+'''
+* function_identifier: parse_for_text
+* summary: pulls a page's text for keyword filtering. The selectolax backend gets the text straight from lexbor and leaves the
+    BeautifulSoup tree lazy, so pages without the keyword(s) never pay for one and a kept page's tree is built once, from memory.
+* parameters:
+    - html_content: HTML text
+* return: (page_text, soup). soup is a LazySoup when the fast path was used (see resolve_soup()).
+'''
+def parse_for_text(html_content):
+    if parser_backend == "selectolax":
+        tree = LexborHTMLParser(html_content)
+        for node in tree.css("script, style"): # BeautifulSoup's get_text() skips these too
+            node.decompose()
+        return tree.text(), LazySoup(html_content)
+    soup = make_soup(html_content)
+    return soup.get_text(), soup
+
+
+set_parser_backend(DEFAULT_BACKEND)
+
+# ==========================================================================================
+#                          FUNCTIONS : BACKEND PARITY CHECK
+# ==========================================================================================
+'''
+* function_identifier: parity_check
+* summary: runs a detail getter on saved HTML files under every available backend and compares the extracted fields, plus the
+    keyword filter's relevance hits (parse_for_text() and keyword_hits()), since selectolax pulls the filter's text with lexbor.
+    The getter is called without a driver and URL, so no PDF is made and the HTML file is not renamed.
+* parameters:
+    - getter: the site's detail getter (make_detail_getter() in detail_getters.py)
+    - html_paths: list of saved HTML files for that site
+    - backends: backends to compare (default: every available backend)
+* return: list of (html_path, field, {backend: value}) for every field that did not match
+'''
+def parity_check(getter, html_paths, backends=None):
+    from doc_cache import document_cache
+    from keywords import keyword_hits
+    backends = [b for b in (backends or BACKENDS) if is_available(b)]
+    previous = parser_backend
+    mismatches = []
+    try:
+        for html_path in html_paths:
+            with open(html_path, "r", encoding="utf-8") as f:
+                html_content = f.read()
+            results = {}
+            for backend in backends:
+                set_parser_backend(backend)
+                document_cache.clear() # making sure the file is parsed again with this backend
+                results[backend] = dict(getter(None, html_path, ""))
+                results[backend].update(keyword_hits(parse_for_text(html_content)[0]))
+            fields = [field for field in results[backends[0]] if field not in ("PDF PATH", "CLEAN TITLE")]
+            for field in fields:
+                values = {backend: results[backend].get(field) for backend in backends}
+                if len(set(values.values())) > 1:
+                    mismatches.append((html_path, field, values))
+    finally:
+        set_parser_backend(previous)
+        document_cache.clear()
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTML parser backend tools.")
+    parser.add_argument("command", choices=["parity"], help="parity: compare a detail getter's fields under every backend")
+    parser.add_argument("site_name", help="name of a site in site_details (ex. aliada_th)")
+    parser.add_argument("html_paths", nargs="+", help="saved HTML files for that site")
+    args = parser.parse_args()
+
+    from main import get_site_details
+    from detail_getters import make_detail_getter
+    getter = make_detail_getter(args.site_name, get_site_details()[args.site_name])
+    print("Comparing backends:", ", ".join(b for b in BACKENDS if is_available(b)))
+    mismatches = parity_check(getter, args.html_paths)
+    for html_path, field, values in mismatches:
+        print("\n" + html_path, "-", field)
+        for backend, value in values.items():
+            print("   ", backend + ":", repr(value)[:200])
+    print("\n" + str(len(mismatches)), "mismatched field(s) in", len(args.html_paths), "file(s).")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,202 @@
+# This python file stores the on-disk HTTP cache. Page bodies are saved with their ETag / Last-Modified headers, and the next request for
+# the same URL is sent as a conditional GET (If-None-Match / If-Modified-Since). A 304 Not Modified answer is served from the cache,
+# and listing pages also keep the links that were parsed out of them, so an unchanged listing page costs one round trip and no parsing.
+# Only listing, pagination, feed, and robots.txt responses go through the cache. Article pages are checked once and never requested again.
+
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+from http_session import fetch, DEFAULT_TIMEOUT
+
+CACHE_FOLDER = os.path.join("saved_sites", "http_cache")
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024 # bodies past this total are evicted, least recently used first
+INDEX_FILE = "index.json"
+
+# ==========================================================================================
+#                          CLASS : ON DISK HTTP CACHE
+# ==========================================================================================
+'''
+* class_identifier: HttpCache
+* summary: stores response bodies in one file per URL and keeps an index (index.json) of each URL's validators, size, last use, and parsed links.
+    Only responses with an ETag or Last-Modified header are cached, since nothing else can be revalidated. The index is kept in least
+    recently used order, so eviction takes entries from the front instead of sorting the index. The index is written on flush()
+    (end of a run and on exit), bodies are written as soon as they are cached.
+* parameters:
+    - folder: folder the cache is stored in (default: saved_sites/http_cache)
+    - max_bytes: max total size of the cached bodies
+'''
+class HttpCache:
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.entries = None # OrderedDict {url: entry}, least recently used first, loaded the first time the cache is used
+        self.total_bytes = 0
+        self.dirty = False
+        self.hits = 0 # 304 answers served from the cache
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def load_locked(self):
+        if self.entries is not None:
+            return
+        entries = {}
+        index_path = os.path.join(self.folder, INDEX_FILE)
+        try:
+            if os.path.exists(index_path):
+                with open(index_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+        except Exception as e:
+            print("HTTP cache index could not be read, starting an empty cache.")
+            entries = {}
+        # dropping entries whose body file is gone, then sorting once by last use (older indexes weren't saved in that order)
+        entries = [(url, entry) for url, entry in entries.items() if entry.get("key") and os.path.exists(self.body_path(entry["key"]))]
+        self.entries = OrderedDict(sorted(entries, key=lambda item: item[1]["last_used"]))
+        self.total_bytes = sum(entry["size"] for entry in self.entries.values())
+
+    def body_path(self, key):
+        return os.path.join(self.folder, key + ".html")
+
+    # returns a copy of the URL's cache entry, or None if it is not cached
+    def get(self, url):
+        with self.lock:
+            self.load_locked()
+            entry = self.entries.get(url)
+            return dict(entry) if entry else None
+
+    # If-None-Match / If-Modified-Since headers for a cached URL, empty if the URL is not cached
+    def conditional_headers(self, url):
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    # reads a cached body and marks the URL as recently used, returns None if it can't be read
+    def read(self, url):
+        entry = self.get(url)
+        if not entry:
+            return None
+        try:
+            with open(self.body_path(entry["key"]), "r", encoding="utf-8") as f:
+                body = f.read()
+        except Exception as e:
+            return None
+        with self.lock:
+            if url in self.entries:
+                self.entries[url]["last_used"] = time.time()
+                self.entries.move_to_end(url)
+                self.dirty = True
+            self.hits += 1
+        return body
+
+    '''
+    * function_identifier: store
+    * summary: caches a 200 response's body if it has an ETag or Last-Modified header, then evicts the least recently used bodies
+        until the cache fits in max_bytes. Links saved for an older version of the page are dropped.
+    * parameters:
+        - url: the requested URL
+        - headers: the response headers
+        - body: the decoded response body
+    '''
+    def store(self, url, headers, body):
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        data = body.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            temp_path = self.body_path(key) + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.body_path(key))
+        except Exception as e:
+            print("Unable to cache response for", url)
+            return
+
+        with self.lock:
+            self.load_locked()
+            old = self.entries.pop(url, None)
+            if old:
+                self.total_bytes -= old["size"]
+            self.entries[url] = {"key": key, "etag": etag, "last_modified": last_modified, "size": len(data), "last_used": time.time(), "links": {}}
+            self.total_bytes += len(data)
+            self.dirty = True
+            self.evict_locked()
+
+    # removes least recently used bodies from the front of the index until the cache fits in max_bytes
+    def evict_locked(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            url, entry = self.entries.popitem(last=False)
+            try:
+                os.remove(self.body_path(entry["key"]))
+            except OSError:
+                pass
+            self.total_bytes -= entry["size"]
+
+    # links parsed out of a cached listing page, keyed by the container they were searched in. None if not saved.
+    def get_links(self, url, container_key):
+        entry = self.get(url)
+        if not entry:
+            return None
+        return entry.get("links", {}).get(container_key)
+
+    def set_links(self, url, container_key, links):
+        with self.lock:
+            self.load_locked()
+            if url in self.entries:
+                self.entries[url].setdefault("links", {})[container_key] = list(links)
+                self.dirty = True
+
+    # writes the index through a temp file, only if something changed. Entries are written in least recently used order.
+    def flush(self):
+        with self.lock:
+            if not self.dirty or self.entries is None:
+                return
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                index_path = os.path.join(self.folder, INDEX_FILE)
+                temp_path = index_path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f)
+                os.replace(temp_path, index_path)
+                self.dirty = False
+            except Exception as e:
+                print("Unable to save the HTTP cache index.")
+
+
+# shared cache used by every requests fetch
+http_cache = HttpCache()
+
+# ==========================================================================================
+#                          FUNCTIONS : CONDITIONAL GET
+# ==========================================================================================
+'''
+* function_identifier: fetch_cached
+* summary: GETs a URL through the pooled session as a conditional request if the URL is cached. A 304 answer is served from the cache,
+    a 200 answer with validators is cached for the next run.
+* parameters:
+    - url: the URL to fetch
+    - timeout: request timeout in seconds
+* return: (body, status_code, not_modified). not_modified is True when the body came from the cache.
+'''
+def fetch_cached(url, timeout=DEFAULT_TIMEOUT):
+    r = fetch(url, timeout=timeout, headers=http_cache.conditional_headers(url))
+    if r.status_code == 304:
+        body = http_cache.read(url)
+        if body is not None:
+            return body, 200, True
+        r = fetch(url, timeout=timeout) # cached body is gone, asking for the full page
+    if r.status_code == 200:
+        http_cache.store(url, r.headers, r.text)
+    return r.text, r.status_code, False
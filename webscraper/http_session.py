@@ -0,0 +1,100 @@
+# This python file stores the shared HTTP session layer. Every requests based fetch goes through here so that
+# connections to the same sponsor host are kept alive and reused instead of opening a new TCP+TLS connection per page.
+
+import threading
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+# user agent shared by requests and selenium so that sites won't flag me as a bot
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+              "AppleWebKit/537.36 (KHTML, like Gecko)"
+              "Chrome/118.0.5993.117 Safari/537.36")
+
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+}
+
+DEFAULT_POOL_SIZE = 10 # max number of kept-alive connections per domain
+DEFAULT_TIMEOUT = 10
+
+_sessions = {} # {domain: requests.Session}
+_pool_sizes = {} # {domain: pool size}, set from site_details through configure_domain()
+_sessions_lock = threading.Lock()
+
+# ==========================================================================================
+#                          FUNCTIONS : SESSION POOL
+# ==========================================================================================
+'''
+* function_identifier: get_domain
+* summary: returns the lowercase domain of a URL, used as the key for the session pool.
+* parameters:
+    - url: any URL
+* return: domain string (ex. 'acadia.com')
+'''
+def get_domain(url):
+    return urlparse(url).netloc.lower()
+
+
+'''
+* function_identifier: configure_domain
+* summary: sets the connection pool size used for a domain. Must be called before the first request to that domain to take effect.
+* parameters:
+    - url: a URL on the domain being configured (the site's base URL is fine)
+    - pool_size: max number of kept-alive connections for the domain
+'''
+def configure_domain(url, pool_size=DEFAULT_POOL_SIZE):
+    with _sessions_lock:
+        _pool_sizes[get_domain(url)] = pool_size
+
+
+'''
+* function_identifier: get_session
+* summary: returns the pooled requests.Session for the URL's domain, creating it the first time the domain is seen.
+* parameters:
+    - url: the URL about to be fetched
+* return: a requests.Session with keep-alive connection pooling and the default headers.
+'''
+def get_session(url):
+    domain = get_domain(url)
+    with _sessions_lock:
+        session = _sessions.get(domain)
+        if session is None:
+            pool_size = _pool_sizes.get(domain, DEFAULT_POOL_SIZE)
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[domain] = session
+    return session
+
+
+'''
+* function_identifier: fetch
+* summary: GETs a URL through the pooled session of its domain. Use this instead of requests.get().
+* parameters:
+    - url: the URL to fetch
+    - timeout: seconds to wait for the server (default: 10)
+    - kwargs: any extra arguments accepted by requests.Session.get
+* return: the requests.Response
+'''
+def fetch(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    return get_session(url).get(url, timeout=timeout, **kwargs)
+
+
+'''
+* function_identifier: close_sessions
+* summary: closes every pooled session and its open connections. Called once at the end of a run.
+'''
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception as e:
+                pass
+        _sessions.clear()
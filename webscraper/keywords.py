@@ -0,0 +1,191 @@
+# This python file stores the keyword(s) every page is searched for, the streaming keyword detector, and the relevance term matcher.
+#   - the detector checks a page's HTML chunk by chunk while it downloads, so pages without the keyword(s) are known before anything is parsed or written to disk.
+#     It and has_keywords() (utils.py) search with keyword_matcher, the keyword(s) compiled once into a matcher.
+#   - the matcher finds every relevance term in a matching page's text in one pass (Aho-Corasick) and counts the hits, so articles can be ranked.
+
+import json
+from collections import deque
+
+try:
+    import ahocorasick # pyahocorasick, C implementation of the automaton
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+KEYWORDS = ["alzheim"] # a page needs one of these to be saved. Add keywords to this list if you wanna expand the search
+
+# terms counted in every saved article to rank how relevant it is. Matched anywhere in a word (ex. "neurodegenerat" matches neurodegeneration/neurodegenerative)
+RELEVANCE_TERMS = [
+    "alzheim", "dementia", "cognitive decline", "cognitive impairment", "neurodegenerat", "memory loss",
+    "amyloid", "plaque", "tangles", "biomarker", "apoe4", "p-tau", "neurofilament", "cerebrospinal fluid",
+    "lecanemab", "leqembi", "donanemab", "kisunla", "aducanumab", "aduhelm", "gantenerumab", "solanezumab",
+    "blarcamesine", "simufilam", "buntanetap", "donepezil", "memantine", "galantamine", "rivastigmine",
+    "clinical trial", "randomized", "placebo",
+]
+# terms that would match inside other words (ex. "tau" in "restaurant", "phase i" in "phase iii") are only counted as whole words
+WHOLE_WORD_TERMS = ["tau", "mci", "apoe", "csf", "pet", "ad", "fda", "phase 1", "phase 2", "phase 3", "phase i", "phase ii", "phase iii"]
+
+# ==========================================================================================
+#                          CLASS : STREAMING KEYWORD DETECTOR
+# ==========================================================================================
+'''
+* class_identifier: StreamingKeywordDetector
+* summary: searches text that arrives in chunks for any of the keyword(s), case insensitive, with one KeywordMatcher pass per chunk.
+    The last (longest keyword - 1) characters of each chunk are kept and searched again with the next chunk, so a keyword split across
+    two chunks is still found. Once a keyword is found, later chunks are not searched.
+* parameters:
+    - keywords: list of keywords to look for (default: KEYWORDS, searched with the shared keyword_matcher)
+'''
+class StreamingKeywordDetector:
+    def __init__(self, keywords=None):
+        self.keywords = [kw.lower() for kw in (keywords or KEYWORDS) if kw]
+        self.matcher = KeywordMatcher(self.keywords) if keywords else keyword_matcher
+        self.overlap = max((len(kw) for kw in self.keywords), default=1) - 1
+        self.tail = ""
+        self.matched = False
+
+    # searches the next chunk of text, returns True once any keyword has been found
+    def feed(self, chunk):
+        if self.matched or not chunk:
+            return self.matched
+        window = self.tail + chunk.lower()
+        if self.matcher.contains(window):
+            self.matched = True
+            self.tail = ""
+        else:
+            self.tail = window[-self.overlap:] if self.overlap else ""
+        return self.matched
+
+
+# ==========================================================================================
+#                          CLASS : MULTI TERM MATCHER
+# ==========================================================================================
+'''
+* class_identifier: KeywordMatcher
+* summary: Aho-Corasick automaton compiled once from a list of terms. Finds every term in a text in a single pass, no matter how many terms
+    there are, instead of one full scan per term. Matching is case insensitive. Uses pyahocorasick if it is installed, otherwise a python automaton.
+* parameters:
+    - terms: terms matched anywhere in a word
+    - whole_words: terms only matched when they are not part of a longer word
+'''
+class KeywordMatcher:
+    def __init__(self, terms, whole_words=()):
+        self.terms = []
+        self.whole_words = set()
+        for term in list(terms) + list(whole_words):
+            term = term.lower()
+            if term and term not in self.terms:
+                self.terms.append(term)
+        self.whole_words = {term.lower() for term in whole_words}
+
+        self.automaton = None
+        if HAS_AHOCORASICK:
+            self.automaton = ahocorasick.Automaton()
+            for index, term in enumerate(self.terms):
+                self.automaton.add_word(term, (index, term))
+            self.automaton.make_automaton()
+        else:
+            self.build()
+
+    # python automaton: goto transitions, failure links, and the terms that end at each state
+    def build(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for index, term in enumerate(self.terms):
+            state = 0
+            for char in term:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(index)
+
+        # breadth first so every state's failure link is built before its children's
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0) if self.goto[fallback].get(char, 0) != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    # yields (term, end offset) for every term in already lowercased text
+    def iter_raw(self, text):
+        if self.automaton is not None:
+            for end, (_, term) in self.automaton.iter(text):
+                yield term, end
+            return
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield self.terms[index], end
+
+    '''
+    * function_identifier: find_all
+    * summary: finds every term in the text in one pass.
+    * parameters:
+        - text: text to search (ex. soup.get_text())
+    * return: list of (term, start offset) in the order they appear. Offsets are in the lowercased text.
+    '''
+    def find_all(self, text):
+        text = text.lower()
+        matches = []
+        for term, end in self.iter_raw(text):
+            if self.is_match(text, term, end):
+                matches.append((term, end - len(term) + 1))
+        return matches
+
+    # whole word terms only match when the characters around them aren't letters or digits
+    def is_match(self, text, term, end):
+        if term not in self.whole_words:
+            return True
+        start = end - len(term) + 1
+        return (start == 0 or not text[start - 1].isalnum()) and (end + 1 == len(text) or not text[end + 1].isalnum())
+
+    # True as soon as any term is found, the rest of the text isn't searched
+    def contains(self, text):
+        text = text.lower()
+        return any(self.is_match(text, term, end) for term, end in self.iter_raw(text))
+
+    # {term: [start offsets]} for every term that was found
+    def offsets(self, text):
+        found = {}
+        for term, start in self.find_all(text):
+            found.setdefault(term, []).append(start)
+        return found
+
+    # {term: number of hits} for every term that was found
+    def count(self, text):
+        return {term: len(starts) for term, starts in self.offsets(text).items()}
+
+
+# shared matchers, compiled once: the keyword(s) a page needs to be saved, and the relevance terms
+keyword_matcher = KeywordMatcher(KEYWORDS)
+relevance_matcher = KeywordMatcher(RELEVANCE_TERMS, WHOLE_WORD_TERMS)
+
+# ==========================================================================================
+#                          FUNCTIONS : RELEVANCE SCORING
+# ==========================================================================================
+'''
+* function_identifier: keyword_hits
+* summary: counts every relevance term in a page's text in one pass and scores the page. The score is the total number of hits,
+    plus 5 for every different term found, so a page mentioning many terms ranks above one repeating a single term.
+* parameters:
+    - page_text: text pulled from an HTML (ex. soup.get_text())
+* return: dictionary with "KEYWORD HITS" (JSON {term: count}, most hits first) and "KEYWORD SCORE" columns
+'''
+def keyword_hits(page_text):
+    counts = relevance_matcher.count(page_text)
+    ordered = dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+    score = sum(counts.values()) + 5 * len(counts)
+    return {"KEYWORD HITS": json.dumps(ordered, ensure_ascii=False), "KEYWORD SCORE": score}
@@ -1,16 +1,79 @@
 # This python file stores all functions that pull links / handle pagination
 
-import requests
 import time
 import os
 import csv
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html_parser import make_soup
 from urllib.parse import urlparse
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from utils import load_checked_links
+from http_cache import http_cache, fetch_cached
+from rate_limiter import wait_for_token
+from feed_discovery import get_feed_links, parse_feed_date
+
+external_links_lock = threading.Lock() # site workers run in parallel threads, only one can check + append to external_links.csv at a time
+crawl_state = None # CrawlState (crawl_state.py) that external domains are saved to, set with set_crawl_state(). If None, external_links.csv is used.
+PAGE_WINDOW = 2 # numeric pages fetched at once when pagination starts (site_details 'page_window')
+MAX_PAGE_WINDOW = 8 # the window doubles while pages keep producing new links, up to this many pages (site_details 'max_page_window')
+DEFAULT_KNOWN_RUN = 10 # incremental crawls stop paginating after this many already checked links in a row (site_details 'incremental_stop')
+
+# ==========================================================================================
+#                           CLASS : INCREMENTAL CRAWL STOP
+# ==========================================================================================
+'''
+* class_identifier: IncrementalStop
+* summary: decides when pagination can stop on a re-crawl. Listing pages show the newest articles first, so once a run of already checked
+    links shows up in page order (or the newest link from the last crawl, the site's high-water mark), everything after it was crawled before.
+    The page being scraped is always finished before stopping.
+* parameters:
+    - stop_after: number of already checked links in a row that stops pagination. 0 or None turns incremental stopping off.
+    - high_water_url: newest link found by the site's last crawl, or None
+'''
+class IncrementalStop:
+    def __init__(self, stop_after=DEFAULT_KNOWN_RUN, high_water_url=None):
+        self.stop_after = stop_after or 0
+        self.high_water_url = high_water_url
+        self.known_run = 0 # already checked links in a row, carried over between pages
+        self.seen = set() # links already looked at in this crawl, "load more" pages list them again
+        self.first_link = None # newest link in this crawl, saved as the next high-water mark
+        self.pages = 0
+        self.stopped = False
+
+    '''
+    * function_identifier: update
+    * summary: looks at a scraped page's links in page order and returns True if pagination can stop.
+    * parameters:
+        - page_links: list of internal links on the page, in page order
+        - checked_links: previously checked links (set or CheckedLinkStore)
+    * return: True if the known link run or the high-water mark was reached
+    '''
+    def update(self, page_links, checked_links):
+        self.pages += 1
+        for link in page_links:
+            if link in self.seen:
+                continue
+            self.seen.add(link)
+            if self.first_link is None:
+                self.first_link = link
+            if not self.stop_after:
+                continue
+            if link == self.high_water_url:
+                print("Reached the newest link from the last crawl.")
+                self.stopped = True
+            if link in checked_links:
+                self.known_run += 1
+                if self.known_run >= self.stop_after:
+                    print(self.known_run, "already checked links in a row.")
+                    self.stopped = True
+            else:
+                self.known_run = 0
+        return self.stopped
+
 
 # ==========================================================================================
 #                           FUNCTIONS : LINK CONTAINER FUNCTIONS
@@ -22,6 +85,7 @@ from utils import load_checked_links
     - soup: BeautifulSoup that has the whole page.
     - container: optional dictionary that has the keys 'tag' and 'class' specifying the container to focus on.
 * return: if container is found, return the container. Else, return the whole soup.
+* note: get_links_bs() uses get_container_anchors() instead, this is kept as the reference it is checked against (bench_links.py).
 '''
 def get_bs_container(soup, container=None):
     try:
@@ -72,6 +136,35 @@ def get_bs_container(soup, container=None):
         return [soup]
 
 
+'''
+* function_identifier: get_container_anchors
+* summary: Returns the <a href> tags get_links_bs() would find in get_bs_container()'s containers, in one walk of the container.
+    get_bs_container() keeps every descendant that holds a link, so each link was found again once per ancestor. Those descendants
+    hold exactly the links that are not direct children of the container, so those are kept, or every link if there are none.
+* parameters: 
+    - soup: BeautifulSoup that has the whole page.
+    - container: optional dictionary that has the keys 'tag' and 'class' specifying the container to focus on.
+* return: list of unique <a> tags with an href, in page order
+'''
+def get_container_anchors(soup, container=None):
+    outer = None
+    if container:
+        try:
+            outer = soup.find(container.get("tag"), class_=container.get("class"))
+            print("BeautifulSoup: searching for container.")
+        except Exception as e:
+            outer = None
+        if outer is None:
+            print("BeautifulSoup: container not found, scraping whole page or trying selenium.")
+
+    if outer is None:
+        return soup.find_all("a", href=True)
+
+    anchors = outer.find_all("a", href=True)
+    nested = [a for a in anchors if a.parent is not outer]
+    return nested or anchors
+
+
 '''
 * function_identifier: get_sel_container
 * summary: Returns the Selenium element(s) to search for links. 
@@ -126,6 +219,60 @@ def get_sel_container(driver, container=None):
     return [driver]
 
 
+# collects every href get_sel_container() + find_elements() would, in one browser call. Same rules as get_sel_container():
+# inside the container, only <a> elements nested in one of its child elements count, unless none are, then every <a> in it counts.
+HARVEST_LINKS_JS = """
+var selector = arguments[0];
+var anchors = null;
+var outer = selector ? document.querySelector(selector) : null;
+if (outer) {
+    anchors = Array.prototype.filter.call(outer.getElementsByTagName('a'), function (a) { return a.parentElement !== outer; });
+    if (!anchors.length) { anchors = outer.getElementsByTagName('a'); }
+}
+if (!anchors) { anchors = document.getElementsByTagName('a'); }
+var hrefs = [];
+for (var i = 0; i < anchors.length; i++) {
+    var href = anchors[i].href;
+    if (typeof href !== 'string') { href = anchors[i].getAttribute('href'); } // svg links
+    if (href) { hrefs.push(href); }
+}
+return hrefs;
+"""
+
+'''
+* function_identifier: harvest_links_js
+* summary: pulls every href on the page (or in the container) with a single execute_script call, instead of one WebDriver round trip
+    per child element and per link. Waits for the container the same way get_sel_container() does.
+* parameters:
+    - driver: selenium webdriver being used for the browser session
+    - container: optional dictionary that has the keys 'tag' and 'class' specifying the container to focus on.
+* return: list of hrefs in page order, or None if the script could not run (get_links_sel() then falls back on get_sel_container())
+'''
+def harvest_links_js(driver, container=None):
+    selector = None
+    if container:
+        selector = f"{container.get('tag')}.{container.get('class')}"
+        try:
+            WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+            print("Selenium: searching for container.")
+        except Exception as e:
+            print("Selenium: container not found or timed out.")
+            selector = None
+    try:
+        hrefs = driver.execute_script(HARVEST_LINKS_JS, selector)
+        return list(hrefs) if hrefs is not None else None
+    except Exception as e:
+        print("Selenium: link harvesting script failed, looking through elements instead.")
+        return None
+
+
+# only keep full URLs that start with "http" and do not end with ".pdf", and skip pagination links
+def is_article_href(href):
+    if not href or not href.startswith("http") or href.lower().endswith(".pdf"):
+        return False
+    return not ("page=" in href or "/page/" in href) # do not want to add pagination pages to our list of links
+
+
 # ==========================================================================================
 #                          FUNCTIONS : BS AND SEL LINK PULLER FUNCTIONS
 # ==========================================================================================
@@ -139,36 +286,40 @@ def get_sel_container(driver, container=None):
 '''
 def get_links_bs(url, container=None):
     links = []
+    container_key = repr(sorted(container.items())) if container else "page" # cached links are kept per container
+    parsed = False
     try:
-        r = requests.get(url, timeout=10)
-        time.sleep(3)
-        soup = BeautifulSoup(r.text, "html.parser")
+        wait_for_token(url) # waits only if the site's rate limit has been reached
+        html_content, status, not_modified = fetch_cached(url, timeout=10)
+        if not_modified:
+            cached_links = http_cache.get_links(url, container_key)
+            if cached_links is not None: # page is unchanged since it was last parsed, no parsing needed
+                print("Found", len(cached_links), "links overall on", url, "(unchanged, from cache).")
+                return cached_links
+        soup = make_soup(html_content)
         
-        # get list of containers to search for links
-        containers = get_bs_container(soup, container)
-
-        # loop through each container and find all <a> tags with href attributes
-        for c in containers:
-            for a in c.find_all("a", href=True):
-                href = a["href"]  
-                # only keep full URLs that start with "http" and do not end in ".pdf"
-                if href.startswith("http") and not href.lower().endswith(".pdf"): 
-                    # skip pagination links to avoid infinite loops 
-                    if "page=" in href or "/page/" in href: 
-                        continue
-                    links.append(href)
+        # every <a> tag with an href attribute in the container, found in one pass
+        for a in get_container_anchors(soup, container):
+            href = a["href"]
+            # only keep full URLs that start with "http" and do not end in ".pdf", skip pagination links to avoid infinite loops
+            if is_article_href(href):
+                links.append(href)
+        parsed = True
     
     except Exception as e:
         print("Failed to get links from", url, "when using requests by BeautifulSoup.")
     
-    # remove duplicates before returning
-    unique_links = list(set(links))
+    # remove duplicates before returning, keeping page order (newest articles are usually first)
+    unique_links = list(dict.fromkeys(links))
+    if parsed:
+        http_cache.set_links(url, container_key, unique_links)
     print("Found", len(unique_links), "links overall on", url, "when using Beautiful Soup.")
     return unique_links
 
 '''
 * function_identifier: get_links_sel
 * summary: Grabbing all links from a single page using selenium. Fallback if get_links_bs() fails.
+    Links are pulled with one script call (harvest_links_js()), element by element only if the script fails.
 * parameters:
     - url: web page url to scrape links from
     - driver: selenium webdriver being used for the browser session
@@ -185,29 +336,52 @@ def get_links_sel(url, driver, reload=True, container=None):
         except TimeoutException:
             print("Timeout loading page:", url, "while running get_links_sel.")
 
-    links = []
+    # every href in one browser call
+    hrefs = harvest_links_js(driver, container)
 
-    # get the containers to search for links
-    containers = get_sel_container(driver, container)
-    
-    # loop through each container and find all <a> elements
-    for c in containers:
-        link_elements = c.find_elements(By.TAG_NAME, "a")
-        for element in link_elements:
-            href = element.get_attribute("href")
-            # only keep full URLs that start with "http" and do not end with ".pdf"
-            if href and href.startswith("http") and not href.lower().endswith(".pdf"):
-                # skip pagination links
-                if "page=" in href or "/page/" in href: # do not want to add pagination pages to our list of links
-                    continue
-                links.append(href)
+    if hrefs is None:
+        hrefs = []
+        # get the containers to search for links
+        containers = get_sel_container(driver, container)
+        
+        # loop through each container and find all <a> elements
+        for c in containers:
+            link_elements = c.find_elements(By.TAG_NAME, "a")
+            for element in link_elements:
+                hrefs.append(element.get_attribute("href"))
+
+    links = [href for href in hrefs if is_article_href(href)]
     
-    # remove duplicates before returning
-    unique_links = list(set(links))
+    # remove duplicates before returning, keeping page order
+    unique_links = list(dict.fromkeys(links))
     print("Found", len(unique_links), "links overall on", url, "when using Selenium.")
     return unique_links
 
 
+'''
+* function_identifier: wait_for_page_change
+* summary: after a pagination click, waits until the URL changes or new <a> elements appear instead of sleeping a fixed amount of time.
+* parameters:
+    - driver: selenium webdriver being used for the browser session
+    - url_before: driver.current_url before the click
+    - anchors_before: number of <a> elements on the page before the click
+    - timeout: max seconds to wait (default: 3, the old fixed sleep)
+* return: True if the page changed before the timeout, otherwise False.
+'''
+def wait_for_page_change(driver, url_before, anchors_before, timeout=3):
+    def page_changed(d):
+        if d.current_url != url_before:
+            return True
+        return d.execute_script("return document.getElementsByTagName('a').length;") != anchors_before
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(page_changed)
+        time.sleep(0.5) # short settle time so the rest of the loaded batch can render
+        return True
+    except TimeoutException:
+        return False
+
+
 # ==========================================================================================
 #                          FUNCTIONS : PAGE LOOPING AND GENERIC LINK COLLECTOR
 # ==========================================================================================
@@ -238,8 +412,8 @@ def get_all_links(url, driver, container=None):
             for link in sel_links:
                 links.append(link)
 
-    # removing duplicate links before returning 
-    links = list(set(links))
+    # removing duplicate links before returning, keeping page order
+    links = list(dict.fromkeys(links))
     return links
 
 '''
@@ -273,8 +447,17 @@ def filter_internal_links(links, base_url):
                 domain = domain[4:] # stripping 'www.' so that www.linkedin.com and linkedin.com do not register as two different sites
             external_links.add(domain)
 
+    # saving external links to the crawl state database (indexed, duplicates ignored)
+    if external_links and crawl_state is not None:
+        try:
+            crawl_state.add_external_domains(external_links)
+        except Exception as e:
+            print("Failed to save external links.")
+        return internal_links
+
     # saving external links to a CSV
     if external_links:
+        external_links_lock.acquire()
         try:
             folder = "saved_sites"
             os.makedirs(folder, exist_ok=True)
@@ -297,10 +480,35 @@ def filter_internal_links(links, base_url):
         
         except Exception as e:
             print("Failed to save external links.")
+        finally:
+            external_links_lock.release()
 
     return internal_links
 
 
+'''
+* function_identifier: remove_checked()
+* summary: removes links that were already checked.
+* parameters:
+    - links: iterable of URLs
+    - checked_links: previously checked links (set or CheckedLinkStore, anything that supports 'in')
+* return: set of the links that have not been checked yet
+'''
+def remove_checked(links, checked_links):
+    return {link for link in links if link not in checked_links}
+
+
+'''
+* function_identifier: set_crawl_state()
+* summary: makes filter_internal_links() save external domains to the crawl state database instead of external_links.csv.
+* parameters:
+    - state: CrawlState, or None to go back to external_links.csv
+'''
+def set_crawl_state(state):
+    global crawl_state
+    crawl_state = state
+
+
 '''
 * function_identifier: get_home_page()
 * summary: Grab all article links from the base_url; for when no pagination is required for a site
@@ -308,9 +516,12 @@ def filter_internal_links(links, base_url):
     - site_name: name of the website
     - site_info: dictionary containing site-specefic information
     - driver: selenium webdriver used for button based page navigation
+    - checked_links: previously checked links (set or CheckedLinkStore)
+    - on_links: optional function called with the new links as soon as the page is scraped, so downstream stages can start early.
+    - tracker: optional IncrementalStop, only used here to record the newest link
 * return: a set of unique internal article links found across all pages
 '''
-def get_home_page(site_name, site_info, driver, checked_links):
+def get_home_page(site_name, site_info, driver, checked_links, on_links=None, tracker=None):
     all_links = set() # stores unique links
     base_url = site_info["url"]
     container = site_info.get("article_container") # container for articles
@@ -319,9 +530,13 @@ def get_home_page(site_name, site_info, driver, checked_links):
     try:
         home_links = get_all_links(base_url, driver, container=container) or []
         home_links = filter_internal_links(home_links, base_url)
-        new_links = set(home_links) - checked_links
+        if tracker is not None:
+            tracker.update(home_links, checked_links)
+        new_links = remove_checked(home_links, checked_links)
         all_links.update(new_links)
         print("Found", len(home_links), "internal links on home page,", len(new_links), "are new.")
+        if on_links and new_links:
+            on_links(new_links)
         return all_links
     except Exception as e:
         print("Failed to get links from home page as fallback:", e)
@@ -331,13 +546,20 @@ def get_home_page(site_name, site_info, driver, checked_links):
 '''
 * function_identifier: get_pages_bs()
 * summary: Go through all pages of a base_url and grab article links from all page(s) by using bs numerical navigation.
+    A window of pages is fetched ahead with requests in worker threads, and the window doubles while pages keep producing new links.
+    Results are still checked in page order, so it stops at the same page a one-by-one walk would, and fetches past that page are cancelled.
+    The selenium fallback for pages requests can't read runs on this thread, one page at a time, since the driver is shared.
 * parameters:
     - site_name: name of the website
     - site_info: dictionary containing site-specefic information
     - driver: selenium webdriver used for button based page navigation
+    - checked_links: previously checked links (set or CheckedLinkStore)
+    - on_links: optional function called with each page's new links as soon as the page is scraped, so downstream stages can start
+        while the walk goes on. Links found before numeric pagination is given up on are real listing links, so they are passed too.
+    - tracker: optional IncrementalStop that ends pagination early once the links are already known
 * return: a set of unique internal article links found across all pages
 '''
-def get_pages_bs(site_name, site_info, driver, checked_links):
+def get_pages_bs(site_name, site_info, driver, checked_links, on_links=None, tracker=None):
     all_links = set() # stores unique links
     base_url = site_info["url"]
     container = site_info.get("article_container") # container for articles
@@ -348,8 +570,14 @@ def get_pages_bs(site_name, site_info, driver, checked_links):
         print("Searching home page...")
         base_links = get_all_links(base_url, driver, container=container) or []
         base_links = filter_internal_links(base_links, base_url)
-        base_links = set(base_links) - checked_links
+        stop = tracker is not None and tracker.update(base_links, checked_links)
+        base_links = remove_checked(base_links, checked_links)
         all_links.update(base_links)
+        if on_links and base_links:
+            on_links(base_links)
+        if stop:
+            print("Incremental crawl: stopping pagination on the home page.\n")
+            return all_links, True
     except Exception as e:
         print("Failed to get links from base url.")
 
@@ -358,21 +586,42 @@ def get_pages_bs(site_name, site_info, driver, checked_links):
     tried_first_pages = 0
     numeric_success = False
 
+    def page_url(number):
+        return f"{base_url}&page={number}" if '?' in base_url else f"{base_url}?page={number}"
+
+    # speculative prefetch, pages up to next_page - 1 are fetching or fetched
+    max_window = max(1, int(site_info.get("max_page_window", MAX_PAGE_WINDOW)))
+    window = min(max(1, int(site_info.get("page_window", PAGE_WINDOW))), max_window)
+    prefetch = ThreadPoolExecutor(max_workers=max_window, thread_name_prefix=site_name + "-pages")
+    futures = {} # {page number: future of get_links_bs()}
+    next_page = 0
+
     while True: # loop and go through all numbered pages until there are no more new links
         try:
-            if '?' in base_url:
-                url = f"{base_url}&page={page}"
-                print("Grabbing links from:", url)
-            else:
-                url = f"{base_url}?page={page}" 
-                print("Grabbing links from:", url)   
+            while next_page < page + window: # keeping the window full
+                futures[next_page] = prefetch.submit(get_links_bs, page_url(next_page), container)
+                next_page += 1
+
+            url = page_url(page)
+            print("Grabbing links from:", url)
 
-            # get all links on page
-            page_links = get_all_links(url, driver, container=container) or [] 
+            # get all links on page, selenium is tried here if requests found nothing
+            page_links = futures.pop(page).result() or []
+            if not page_links:
+                page_links = get_links_sel(url, driver, container=container) or []
             page_links = filter_internal_links(page_links, base_url)
             page_links_set = set(page_links)
             
-            new_links = page_links_set - all_links - checked_links 
+            new_links = remove_checked(page_links_set - all_links, checked_links)
+
+            # re-crawl reached links that were already checked, older pages don't need to be walked again
+            if tracker is not None and tracker.update(page_links, checked_links):
+                all_links.update(new_links)
+                if on_links and new_links:
+                    on_links(new_links)
+                numeric_success = True
+                print("Incremental crawl: stopping numeric pagination on page", page, "\n")
+                break
             
             if not new_links: 
                 print("No new links found on page", page)
@@ -386,16 +635,23 @@ def get_pages_bs(site_name, site_info, driver, checked_links):
                     break
             else:
                 all_links.update(new_links)
+                if on_links:
+                    on_links(new_links)
                 numeric_success = True
                 print("Found", len(new_links), " new internal links on", url)
+                window = min(window * 2, max_window) # archive keeps going, fetching further ahead
             
             page += 1
-            time.sleep(3) 
 
         except Exception as e:
             print("Error occured when trying to do numerical page=num page search on:", page)
             break
 
+    # end of the archive, dropping pages fetched past it
+    for future in futures.values():
+        future.cancel()
+    prefetch.shutdown(wait=False, cancel_futures=True)
+
     return all_links, numeric_success
 
 '''
@@ -405,9 +661,12 @@ def get_pages_bs(site_name, site_info, driver, checked_links):
     - site_name: name of the website
     - site_info: dictionary containing site-specefic information
     - driver: selenium webdriver used for button based page navigation
+    - checked_links: previously checked links (set or CheckedLinkStore)
+    - on_links: optional function called with each batch of new links as soon as a page is scraped, so downstream stages can start early.
+    - tracker: optional IncrementalStop that ends pagination early once the links are already known
 * return: a set of unique internal article links found across all pages
 '''
-def get_pages_sel(site_name, site_info, driver, checked_links):
+def get_pages_sel(site_name, site_info, driver, checked_links, on_links=None, tracker=None):
     all_links = set() # stores unique links
     base_url = site_info["url"]
     nav_button = site_info.get("nav_button") # for selenium based button navigation
@@ -415,6 +674,7 @@ def get_pages_sel(site_name, site_info, driver, checked_links):
    
     try:
         print("Trying button navigation for", base_url, "...")
+        wait_for_token(base_url)
         driver.get(base_url)
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         time.sleep(3)
@@ -435,11 +695,13 @@ def get_pages_sel(site_name, site_info, driver, checked_links):
                 page_links = filter_internal_links(page_links, base_url)
                 # only keep new links
                 page_links_set = set(page_links)
-                new_links = page_links_set - all_links - checked_links
+                new_links = remove_checked(page_links_set - all_links, checked_links)
 
                 if new_links: 
                     all_links.update(new_links) # add the new links to all_links 
                     print("Number of new internal links found:", len(new_links), "\n") 
+                    if on_links:
+                        on_links(new_links)
                     if len(new_links) == 1: # stop if only 1 new link appears twice in a row.
                         one_link_count +=1
                         if one_link_count >= 2:
@@ -450,15 +712,22 @@ def get_pages_sel(site_name, site_info, driver, checked_links):
                 else: 
                     print("No new links found on current page.")
 
+                # re-crawl reached links that were already checked, no need to load older articles
+                if tracker is not None and tracker.update(page_links, checked_links):
+                    print("Incremental crawl: stopping button navigation after", click_count, "clicks.\n")
+                    break
+
                 # find and click the pagination button
                 print("Checking for a button on:", driver.current_url)
                 button = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, nav_button)))
                 print("Button found...")
                 driver.execute_script("arguments[0].scrollIntoView(true);", button)
-                time.sleep(1)
+                url_before = driver.current_url
+                anchors_before = driver.execute_script("return document.getElementsByTagName('a').length;")
+                wait_for_token(url_before) # a click loads more articles from the site, so it counts as a request
                 driver.execute_script("arguments[0].click();", button)
                 click_count += 1
-                time.sleep(3)
+                wait_for_page_change(driver, url_before, anchors_before)
 
                 last_url = driver.current_url
 
@@ -493,37 +762,98 @@ def get_pages_sel(site_name, site_info, driver, checked_links):
     - site_name: name of the website
     - site_info: dictionary containing site-specefic information
     - driver: selenium webdriver used for button based page navigation
+    - on_links: optional function called with new links as soon as they are found (streaming pipeline). Each link is only passed once.
+    - checked_links: optional CheckedLinkStore shared by the whole run. If None, checked_links.csv is loaded.
+    - incremental: True to stop paginating once already checked links show up (IncrementalStop), False to walk every page.
+        Also skips feed entries last modified before the site's last crawl.
 * return: a set of unique internal article links found across all pages
 '''
-def get_all_pages(site_name, site_info, driver):
+def get_all_pages(site_name, site_info, driver, on_links=None, checked_links=None, incremental=True):
     all_links = set() # stores unique links
+    emitted = set() # links already passed to on_links
+
+    # passes only links that have not been passed yet to on_links
+    def emit(links):
+        if on_links is None:
+            return
+        new_links = set(links) - emitted
+        if new_links:
+            emitted.update(new_links)
+            on_links(new_links)
+
     base_url = site_info["url"]
     nav_button = site_info.get("nav_button") # for selenium based button navigation
     container = site_info.get("article_container") # container for articles
-    checked_links = load_checked_links() # loading previously logged links
-   
+    if checked_links is None:
+        checked_links = load_checked_links() # loading previously logged links
+
+    # incremental crawl, stops at a run of known links or at the newest link from the last crawl (high-water mark)
+    high_water_url = None
+    since = parse_feed_date(site_info.get("feed_since")) # feed entries older than this are skipped
+    if incremental and crawl_state is not None:
+        try:
+            status = crawl_state.get_site_status(site_name) or {}
+            high_water_url = status.get("high_water_url")
+            since = parse_feed_date(status.get("high_water_at")) or since
+        except Exception as e:
+            print("Unable to load the high-water mark for", site_name)
+    stop_after = site_info.get("incremental_stop", DEFAULT_KNOWN_RUN) if incremental else 0
+    tracker = IncrementalStop(stop_after, high_water_url)
+
+    # sitemap / RSS / Atom feed first, one XML fetch instead of paging through the listing. Pagination only runs if the feed is incomplete.
+    feed_complete = False
+    listing_links = []
+    if site_info.get("feeds", True) is not False:
+        try:
+            # the first listing page shows if a feed covers the listing (its newest link should be in the feed). Sites that block
+            # requests (html_sel_save) skip it, only a configured feed can count as complete for them.
+            if not site_info.get("html_sel_save"):
+                listing_links = filter_internal_links(get_links_bs(base_url, container=container), base_url)
+            feed_links, feed_complete = get_feed_links(site_name, site_info, checked_links, since=since, listing_links=listing_links)
+            feed_links = remove_checked(feed_links, checked_links)
+            all_links.update(feed_links)
+            emit(feed_links)
+        except Exception as e:
+            print("Feed discovery failed for", site_name, ":", e)
+            feed_complete = False
+
     # determines if numeric pagination using bs is applicable.
-    try:
-        bs_needed = site_info.get("bs_pagenav_flag")
-    except Exception as e:
-        bs_needed = True
+    if feed_complete:
+        bs_needed, nav_button = False, None
+        # feed order isn't listing order, so the high-water mark comes from the first listing page. Kept as is if it couldn't be read.
+        tracker.update(listing_links, checked_links)
+        tracker.stopped = True # nothing left to paginate, skips the home page fallback too
+    else:
+        try:
+            bs_needed = site_info.get("bs_pagenav_flag")
+        except Exception as e:
+            bs_needed = True
 
     # Skip numeric page navigation if bs_needed is false
     if bs_needed is False:
         numeric_success = False
     else: 
-        bs_links, numeric_success = get_pages_bs(site_name, site_info, driver, checked_links)
+        # each page's links go to on_links as soon as the page is scraped
+        bs_links, numeric_success = get_pages_bs(site_name, site_info, driver, checked_links, on_links=emit, tracker=tracker)
         if numeric_success: # only use links if numeric pagination succeeded.
             all_links.update(bs_links)
                 
     # If numerical page navigation fails, try doing button navigation with selenium
     if not numeric_success and nav_button:
-        sel_links = get_pages_sel(site_name, site_info, driver, checked_links)
+        sel_links = get_pages_sel(site_name, site_info, driver, checked_links, on_links=emit, tracker=tracker)
         all_links.update(sel_links)
 
-    # for if a site has a home page only and doesn't need pagination
-    if not all_links:
-        home_links = get_home_page(site_name,site_info, driver, checked_links)
+    # for if a site has a home page only and doesn't need pagination. Skipped when an incremental stop found nothing new.
+    if not all_links and not tracker.stopped:
+        home_links = get_home_page(site_name,site_info, driver, checked_links, on_links=emit, tracker=tracker)
         all_links.update(home_links)
 
+    # saving the newest link as the site's high-water mark for the next crawl
+    if crawl_state is not None and tracker.first_link:
+        try:
+            crawl_state.set_high_water(site_name, tracker.first_link, tracker.pages)
+        except Exception as e:
+            print("Unable to save the high-water mark for", site_name)
+
+    all_links.update(emitted) # links streamed before numeric pagination was given up on were still passed on
     return list(all_links)
@@ -1,23 +1,89 @@
 import os
-import pandas as pd
-from selenium_setup import setup_driver
-from link_collectors import get_all_pages
-from utils import save_html, find_alz_articles
-from detail_getters import get_acadia_pharm_inc_details, get_aliada_details, get_adel_details, get_alzheon_details, get_alz_research_uk_details, get_cognit_ther_details
-from detail_getters import get_gemvax_kael_details, get_glaxosmithkline_details, get_neurimph_details
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from selenium_setup import DriverPool
+from pipeline import SitePipeline
+from utils import CheckedLinkStore
+from crawl_state import CrawlState
+from link_collectors import set_crawl_state
+from rate_limiter import configure_site_rate
+from http_session import configure_domain, close_sessions, DEFAULT_POOL_SIZE
+from downloader import configure_domain_concurrency, DEFAULT_DOMAIN_CONCURRENCY
+from html_parser import set_parser_backend, DEFAULT_BACKEND
+from http_cache import http_cache
+from pdf_engine import set_pdf_engine, DEFAULT_PDF_ENGINE
+from pdf_jobs import PdfWorkerPool, PDF_MODES, DEFAULT_PDF_MODE, PDF_WORKERS
+from pdf_encoder import set_pdf_encoder, print_storage_stats, PDF_COMPRESSIONS, DEFAULT_PDF_COMPRESSION, JPEG_QUALITY, TARGET_DPI, MAX_PDF_BYTES
+from detail_getters import pdf_folder_for
+
+SITE_WORKERS = 4 # number of sites scraped at the same time, each one gets its own chrome instances
+DRIVERS_PER_SITE = 2 # one chrome for pagination and one for rendering/extraction, so both can run at the same time
+INCREMENTAL = True # stop paginating once a run of already checked links shows up, set to False to re-walk every site's whole archive
+PARSER_BACKEND = DEFAULT_BACKEND # "html.parser", "lxml", or "selectolax" (see html_parser.py), set WEBSCRAPER_PARSER to change it per run
+PDF_ENGINE = DEFAULT_PDF_ENGINE # "print" (chrome print to PDF), "raster" (screenshot PDF), or "tiled" (screenshot PDF one window at a time, see pdf_engine.py), set WEBSCRAPER_PDF_ENGINE to change it per run
 
 # ==========================================================================================
-#                                 MAIN FUNCTION
+#                                 SITE WORKER
 # ==========================================================================================
-def main():
-    total_alz_links = 0
-    total_links = 0
-    base_folder = "saved_sites" # folder that will store all htmls
-    os.makedirs(base_folder, exist_ok=True) # create folder if it does not exist
-    csv_file = "alz_articles.csv"
-    csv_path = os.path.join(base_folder, csv_file)
-    first_site = not os.path.exists(csv_path) # checking if CSV already exists. If no, add headers. If yes, just add site metadata.
+'''
+* function_identifier: run_site
+* summary: runs one site's full streaming pipeline (see pipeline.py) on drivers borrowed from the pool.
+    Article rows are saved to the crawl state database as soon as they are extracted, their PDFs are made by the PDF workers (pdf_jobs.py).
+* parameters:
+    - site_name: name of the website (key in site_details)
+    - site_info: dictionary containing site-specefic information
+    - driver_pool: DriverPool that the worker borrows its own selenium drivers from
+    - checked_store: CheckedLinkStore shared by every site worker
+    - state: CrawlState database the site's crawl status and article rows are saved in
+    - base_folder: folder that stores all site folders (default: saved_sites)
+    - pdf_mode: "sync", "async", "defer", or "skip" (see pdf_jobs.py)
+    - pdf_pool: PdfWorkerPool for "async" PDFs
+* return: dictionary with the site's "links" count, "alz_links" count, "articles" that still need saving, and "articles_saved" count
+'''
+def run_site(site_name, site_info, driver_pool, checked_store, state, base_folder="saved_sites", pdf_mode=DEFAULT_PDF_MODE, pdf_pool=None):
+    result = {"links": 0, "alz_links": 0, "articles": [], "articles_saved": 0}
+
+    # creating a site folder for html storage.
+    try:
+        site_folder = os.path.join(base_folder, site_name + "_htmls")
+        os.makedirs(site_folder, exist_ok=True)
+    except Exception as e:
+        print("Unable to find/create site folder for", site_name)
+
+    base_url = site_info["url"]
+    state.start_site(site_name, base_url)
+    configure_domain(base_url, site_info.get("pool_size", DEFAULT_POOL_SIZE)) # pooled requests session for this site's domain
+    configure_site_rate(base_url, site_info.get("rate_limit")) # token bucket rate limit for this site's domain
+    configure_domain_concurrency(base_url, site_info.get("max_concurrency", DEFAULT_DOMAIN_CONCURRENCY)) # downloads in flight to this site's domain
+    print("\n-------------------------------------------------------------------------------------------------------------")
+    print("Getting Selenium drivers from the pool for", base_url, ".... ")
+    drivers = driver_pool.acquire_many(DRIVERS_PER_SITE) # one for pagination, one for rendering pages + extraction
+    driver = drivers[0]
+    browser_driver = drivers[-1]
 
+    try:
+        # links stream from pagination into fetch workers, keyword filtering and extraction as soon as they are found
+        pipeline = SitePipeline(site_name, site_info, driver, browser_driver, site_folder, checked_store, incremental=INCREMENTAL,
+                                pdf_mode=pdf_mode, pdf_pool=pdf_pool, state=state)
+        result = pipeline.run()
+    except Exception as e:
+        print("Unexpected error occured in the", site_name, "pipeline.")
+    finally:
+        for d in drivers:
+            driver_pool.release(d) # resets cookies/storage for the next site, recycles the driver if it crashed
+
+    return result
+
+
+# ==========================================================================================
+#                                 SITE DETAILS
+# ==========================================================================================
+'''
+* function_identifier: get_site_details
+* summary: returns the configuration of every sponsor site. Adding a sponsor only needs a new entry here.
+* return: dictionary {site name: site_info}
+'''
+def get_site_details():
     ''' 
     Site Details, how to use page navigation:
        For pagination:
@@ -26,9 +92,30 @@ def main():
        - Want to use Selenium Numerical pagination: set bs_page_nav to False and put a button XPath in nav_button. 
        For HTML Creation:
        - Set html_sel_save to true if BS HTML creation is producing '403 forbidden' or etc. 
+       For requests connection pooling:
+       - Optionally set pool_size to the max number of kept-alive connections to the site's domain (default: 10).
+       For concurrent HTML saving:
+       - Optionally set max_concurrency to the max number of HTML downloads in flight to the site's domain, requests and selenium together (default: 4).
+         Sites on the same domain share this cap, the lowest one set is used.
+       - Optionally set fetch_workers to the number of requests fetch threads for the site (default: 4).
+       For politeness:
+       - Optionally set rate_limit to {"rate": requests per second, "burst": max saved up requests} for the site's domain (default: {"rate": 2.0, "burst": 4}).
+         Every requests and selenium fetch waits on this limit instead of sleeping a fixed amount of time.
+       For BS numerical pagination:
+       - Optionally set page_window to the number of pages fetched at once when pagination starts (default: 2), and max_page_window to how far
+         the window can grow while pages keep producing new links (default: 8). Requests still wait on the site's rate_limit.
+       For incremental crawls:
+       - Optionally set incremental_stop to the number of already checked links in a row that stops pagination (default: 10, 0 to always walk every page).
+       For feed / sitemap discovery (feed_discovery.py), tried before pagination:
+       - Optionally set feeds to a list of sitemap / RSS / Atom URLs to skip discovery, or to False to never use feeds for the site.
+       - Optionally set feed_url_pattern to a regular expression article links must match (default: sitemap links must be under the listing page's path).
+       - Optionally set feed_since to an ISO date, feed entries last modified before it are skipped (incremental crawls use the last crawl's time).
+       For metadata extraction:
+       - Set extract to the site's publisher and CSS selectors for title, date, author, and body (see extraction.py for every option).
+         Sites without an extract entry are scraped for links and HTMLs only.
     '''
 
-    site_details = {
+    return {
         # working, has 641 first page links
         "acadia_pharm_inc": { # ACADIA Pharmaceutical Inc.
             "url": "https://acadia.com/en-us/media/news-releases",
@@ -36,7 +123,12 @@ def main():
             "nav_button": "//label[contains(@class, 'show-all') and text()='Show All']",
             "cookie_button": "//button[contains(@id, 'onetrust-accept-btn-handler')]",
             "bs_pagenav_flag": False,
-            "detail_getter": get_acadia_pharm_inc_details
+            "extract": {
+                "publisher": "ACADIA Pharmaceuticals Inc.",
+                "title": {"select": "h1[data-astro-cid-u4qoyrkz]", "text": "trim"},
+                "date": {"select": "span.text[data-astro-cid-ijeeojtv]", "text": "trim"},
+                "body": {"select": "article", "all": True}
+                }
             }, 
         # working
         "aliada_th": { # Aliada Therapuetics
@@ -45,7 +137,12 @@ def main():
             "nav_button": "//a[contains(@rel, 'next')]",
             "cookie_button": "//button[contains(@id, 'onetrust-accept-btn-handler')]",
             "bs_pagenav_flag": False,
-            "detail_getter": get_aliada_details
+            "extract": {
+                "publisher": "Aliada Therapuetics",
+                "title": {"select": "h2.press-d-title, h2.mt-0", "text": "trim"},
+                "date": {"select": "p.event-date", "text": "trim"},
+                "body": {"select": "div.col-sm-9", "all": True}
+                }
             },
         # working
         "adel_inc": { # Alzheimer's Disease Expert Lab (ADEL), Inc.
@@ -55,7 +152,12 @@ def main():
             "cookie_button": "//button[contains(@class, 'coi-banner__accept')]",
             "bs_pagenav_flag": False,
             "html_sel_save": True,
-            "detail_getter": get_adel_details
+            "extract": {
+                "publisher": "Alzheimer's Disease Expert Lab (ADEL), Inc.",
+                "title": {"select": ".mfn-title"},
+                "date": {"select": ".mfn-date"},
+                "body": {"select": ".mfn-body"}
+                }
             },
         # working
         "alzheon_inc": { # Alzheon Inc
@@ -63,7 +165,13 @@ def main():
             "article_container": {"tag": "div", "class": "df-cpts-inner-wrap"},
             "nav_button": "//a[contains(@class, 'df-cptfilter-load-more')]",
             "bs_pagenav_flag": False,
-            "detail_getter": get_alzheon_details
+            "extract": {
+                "publisher": "Alzheon Inc.",
+                "title": {"select": "h1.entry-title", "text": "trim"},
+                "date": {"select": "span.published", "text": "trim"},
+                "author": {"select": "span.author.vcard", "text": "trim"},
+                "body": {"select": "div.et_pb_text_inner", "all": True}
+                }
             },
         # working
         "alz_research_uk": { # Alzheimer's Research UK 
@@ -73,7 +181,13 @@ def main():
             "cookie_button": "//button[contains(@id, 'CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll')]",
             "bs_pagenav_flag": False,
             "html_sel_save": True,
-            "detail_getter": get_alz_research_uk_details
+            "extract": {
+                "publisher": "Alzheimer's Research UK",
+                "title": {"select": "h1.fl-heading", "text": "trim"},
+                "byline": {"select": "div.fl-rich-text", "separator": "|", "prefix": "by "}, # ex. "By Alzheimer's Research UK | Friday 25 July 2025"
+                "body": {"select": "div.fl-module-content.fl-node-content", "all": True},
+                "pdf_folder": "alz_reasearch_uk" # keeping the existing PDF folder name
+                }
             },
         # working 
         # could possibly use numeric page navigation. Just need to click next once, then flip thorugh pages numerically
@@ -83,7 +197,14 @@ def main():
             "nav_button": "//a[@rel='next']",
             "cookie_button": None,
             "bs_pagenav_flag": False,
-            "detail_getter": get_cognit_ther_details
+            "extract": {
+                "publisher": "Cognition Therapeutics",
+                "title": {"select": "h1.elementor-heading-title.elementor-size-default"},
+                "date": {"select": "div.pr-date-globe"},
+                # there are multiple elementor-widget-container divs, the body is in the one that also holds the date
+                "body": {"select": "div.elementor-widget-container:has(div.pr-date-globe)"},
+                "pdf_folder": "congition_ther" # keeping the existing PDF folder name
+                }
             },
         # working, links are only on a home page, no pagination needed. That is why nav_button is None and bs_page_nav is false to skip pagination.
         "gemvax_kael": { # GemVax & Kael
@@ -92,7 +213,12 @@ def main():
             "nav_button": None,
             "cookie_button": None,
             "bs_pagenav_flag": False,
-            "detail_getter": get_gemvax_kael_details
+            "extract": {
+                "publisher": "GemVax & Kael",
+                "title": {"select": "span.bo_v_tit"},
+                "date": {"select": "strong.if_date", "remove": ["작성일"]}, # removing the Korean "date written" label
+                "body": {"select": "div.r-sub-con", "prefer": "span[lang=EN-US]"} # English text is in EN-US spans when the post has both languages
+                }
             },
         # working when pulling HTMLs, metdata extraction function  never tested because no links had the designated keyword(s)
         "glaxosmithkline": { # GlaxoSmithKline
@@ -102,7 +228,13 @@ def main():
             "cookie_button": "//button[@id='preferences_prompt_submit']",
             "bs_pagenav_flag": False,
             "html_sel_save": True,
-            "detail_getter": get_glaxosmithkline_details
+            "extract": {
+                "publisher": "GlaxoSmithKline",
+                "title": {"select": "span.bo_v_tit"},
+                "date": {"select": "strong.if_date"},
+                # falling back on the whole content wrapper when the first rich text container has no paragraphs
+                "body": {"select": ["div.main-container.rte.child-component", "div.content-wrapper"], "require": "p"}
+                }
             },
         # working when pulling HTMLs, metdata extraction function never tested because no links had the designated keyword(s)
         "neurim_pharma": { # Neurim Pharmaceuticals
@@ -112,7 +244,12 @@ def main():
             "cookie_button": "//a[@class='cc-btn cc-allow button']",
             "bs_pagenav_flag": False,
             "html_sel_save": True,
-            "detail_getter" : "get_neurimph_details"
+            "extract": {
+                "publisher": "Neurim Pharmaceutical",
+                "title": {"select": "h2"},
+                "date": {"select": "div.card-date.date"},
+                "body": {"select": "div.blog-detail-post", "all": True}
+                }
             },
         # no metadata to extract, sites news links redirect to other sites. All redirect links are shown in external_links.csv
         # all links on home page
@@ -123,106 +260,114 @@ def main():
             "bs_pagenav_flag": False
             }
     }
-    
-    # looping through each site in site_details
-    for site_name, site_info in site_details.items():
-        # creating a site folder for html storage.
-        try:
-            site_folder = os.path.join(base_folder, site_name + "_htmls")
-            os.makedirs(site_folder, exist_ok=True)
-        except Exception as e:
-            print("Unable to find/create site folder for", site_name)
 
-        base_url = site_info["url"]
-        print("\n-------------------------------------------------------------------------------------------------------------")
-        print("Setting up Selenium driver for", base_url, ".... ")
-        driver = setup_driver()
 
-        try:
-            # Get all links from site
-            try:
-                links = get_all_pages(site_name, site_info, driver)
-                print("\nTotal number of new, unlogged, internal links found on", base_url, ":", len(links))
-                total_links += len(links)
-            except Exception as e:
-                continue
-            
-            # Skipping everything if no new links are found
-            if not links:
-                print("No new article links found. Skipping HTML saving and metadata extraction.")
-                continue
-
-            # Saving HTML files for found links, one at a time
-            print("Attempting to save HTMLS for all new links found on", site_name, "...")
-            url_map = {} # {file_number:url}
-            for idx, link in enumerate(links, start=1):
-                save_html(driver, link, site_folder, idx, cookie_button=site_info.get("cookie_button"), url_map=url_map, html_sel_save=site_info.get("html_sel_save"))
-            # Filter for Alzheimers related content
-            print("Searching site HTMLs for keyword(s)...")
-            try:
-                alz_html_url = find_alz_articles(site_folder, url_map)
-                total_alz_links += len(alz_html_url)
-                print("Total number of Alzheimer's related links on this site:", len(alz_html_url))
-            except Exception as e:
-                continue
-
-            # extracting article details
-            print("Extracting metadata from HTMLs that had the desired keyword(s)...")
-            site_article_details = []
-            seen_titles = set() 
-            for file_number, url in alz_html_url.items():
-                html_path = os.path.join(site_folder, str(file_number) + ".html")
+# ==========================================================================================
+#                                 MAIN FUNCTION
+# ==========================================================================================
+# command line options, ex. 'python main.py --pdf skip' for a fast metadata-only run
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape sponsor sites for Alzheimer's related articles.")
+    parser.add_argument("--pdf", choices=PDF_MODES, default=DEFAULT_PDF_MODE,
+                        help="sync: make each PDF before saving its row, async: background PDF workers (default), "
+                             "defer: save rows only and render later with 'python pdf_jobs.py render', skip: no PDFs")
+    parser.add_argument("--pdf-workers", type=int, default=PDF_WORKERS, help="number of background PDF workers for --pdf async")
+    # screenshot PDF compression (pdf_encoder.py), printed PDFs are saved as chrome makes them
+    parser.add_argument("--pdf-compression", choices=PDF_COMPRESSIONS, default=DEFAULT_PDF_COMPRESSION,
+                        help="jpeg: smallest screenshot PDFs (default), flate: lossless")
+    parser.add_argument("--pdf-quality", type=int, default=JPEG_QUALITY, help="JPEG quality of screenshot PDFs (1-95)")
+    parser.add_argument("--pdf-dpi", type=float, default=TARGET_DPI, help="screenshots are downsampled to this DPI, 0 keeps the full resolution")
+    parser.add_argument("--pdf-max-kb", type=int, default=MAX_PDF_BYTES // 1000, help="size budget of each screenshot PDF in KB, 0 for no budget. Only the raster and tiled engines (WEBSCRAPER_PDF_ENGINE) "
+                             "compress to fit it, PDFs from the default print engine are saved as chrome makes them and only counted as over budget")
+    return parser.parse_args()
+
+
+def main(pdf_mode=DEFAULT_PDF_MODE, pdf_workers=PDF_WORKERS, pdf_compression=DEFAULT_PDF_COMPRESSION, pdf_quality=JPEG_QUALITY,
+         pdf_dpi=TARGET_DPI, pdf_max_bytes=MAX_PDF_BYTES):
+    total_alz_links = 0
+    total_links = 0
+    base_folder = "saved_sites" # folder that will store all htmls
+    os.makedirs(base_folder, exist_ok=True) # create folder if it does not exist
+    site_details = get_site_details()
+    site_folders = {pdf_folder_for(site_name, site_info): site_name for site_name, site_info in site_details.items()} # for the one time CSV import
+    state = CrawlState(os.path.join(base_folder, "crawl_state.db"), base_folder, site_folders) # checked links, site status, external domains, article metadata
+    try:
+        set_crawl_state(state) # external domains are saved to the database instead of external_links.csv
 
+        print("Parsing HTML with the", set_parser_backend(PARSER_BACKEND), "backend.")
+        print("Saving PDFs with the", set_pdf_engine(PDF_ENGINE), "engine.")
+        print("Screenshot PDF encoding:", set_pdf_encoder(pdf_compression, pdf_quality, pdf_dpi, pdf_max_bytes))
+
+        # launching chrome once for the whole run, each site worker borrows its own drivers from the pool and hands them back reset
+        site_workers = min(SITE_WORKERS, len(site_details))
+        pdf_workers = max(1, pdf_workers) if pdf_mode == "async" else 0
+        driver_pool = DriverPool(size=site_workers * DRIVERS_PER_SITE + pdf_workers) # the PDF workers keep their drivers for the whole run
+        checked_store = CheckedLinkStore(base_folder, state=state) # checked links are loaded once and shared by every site
+        print("PDF mode:", pdf_mode)
+        pdf_pool = PdfWorkerPool(driver_pool, state, pdf_workers) if pdf_workers else None
+
+        # running every site's pipeline at the same time. Each pipeline saves its article rows as they are extracted.
+        with ThreadPoolExecutor(max_workers=site_workers) as executor:
+            futures = {executor.submit(run_site, site_name, site_info, driver_pool, checked_store, state, base_folder, pdf_mode, pdf_pool): site_name
+                       for site_name, site_info in site_details.items()}
+            for future in as_completed(futures):
+                site_name = futures[future]
                 try:
-                    # extracting metadata from the HTML file using the site's detail getter
-                    article_data = site_info["detail_getter"](driver, html_path, url, cookie_button=site_info.get("cookie_button"))
-                    if article_data and article_data.get("PDF PATH", "").endswith(".pdf"): # saving articles metdata to CSV file if metadata extraction worked.
-                        # making sure duplicate article metadata is not saved if two urls provide the same information.
-                        title = article_data.get("TITLE", "").strip()
-                        if title in seen_titles:
-                            print("Skipping duplicate title, metadata for this article already exist in alz_articles.csv under a different URL.")
-                            continue
-                        seen_titles.add(title)
-                        # removing clean title column before saving to CSV, it is not needed metadata. Already have a title column.
-                        if "CLEAN TITLE" in article_data:
-                            del article_data["CLEAN TITLE"]
-                        site_article_details.append(article_data)
+                    site_result = future.result()
                 except Exception as e:
-                    print("Failed to extract metadata from", html_path)
+                    print("Unexpected error occured while scraping", site_name)
+                    state.finish_site(site_name, status="failed")
                     continue
 
-            # saving site metadata to csv
-            print("Saving sites metadata to a .csv file...")
-            if site_article_details:
-                try: 
-                    df = pd.DataFrame(site_article_details)
-                    df.to_csv(csv_path, mode='a', header=first_site, index=False)
-                    print("Saved results to", csv_file, ".")
-                    first_site = False
-                except Exception as e:
-                    print("Failed to save CSV file.")
+                total_links += site_result["links"]
+                total_alz_links += site_result["alz_links"]
+
+                # site metadata is saved to the database as it is extracted, any rows left over are saved here
+                saved = site_result.get("articles_saved", 0)
+                site_article_details = site_result["articles"]
+                if site_article_details:
+                    print("Saving", site_name, "metadata to the crawl state database...")
+                    try: 
+                        saved += state.add_articles(site_name, site_article_details)
+                    except Exception as e:
+                        print("Failed to save article metadata.")
+                print("Saved", saved, "articles for", site_name, ".")
+                state.finish_site(site_name, links_found=site_result["links"], alz_links=site_result["alz_links"], articles_saved=saved)
 
-        finally:
-            driver.quit()
+        # waiting for the background PDFs to finish before the drivers are closed
+        if pdf_pool is not None:
+            print("Waiting for", pdf_pool.pending(), "queued PDF(s)...")
+            pdf_counts = pdf_pool.close()
+            print(pdf_counts["done"], "PDF(s) made,", pdf_counts["failed"], "failed.")
 
-    # pulling total number of alzheimer related articles from all runs, for output.
-    if os.path.exists(csv_path):
+        checked_store.flush()
+        driver_pool.close()
+        close_sessions() # closing pooled requests connections
+        http_cache.flush() # saving the HTTP cache index for conditional GETs next run
+        print("Pages served from the HTTP cache (304 Not Modified):", http_cache.hits)
+
+        # writing checked_links.csv, external_links.csv, and alz_articles.csv from the database for compatibility
         try:
-            total_scraped_articles = len(pd.read_csv(csv_path))
+            state.export_csv(base_folder)
         except Exception as e:
-            total_scraped_articles = 0
-    else:
-        total_scraped_articles = 0
-    
+            print("Failed to export CSV files.")
 
-    print("\n-------------------------------------------------------------------------------------------------------------")
-    print(total_links, "new, unlogged, internal article links found across all sponsor sites this run.")
-    print(total_alz_links, "alzheimer related links found this run.") # count includes URLs with duplicate data that were filtered out
-    print(total_scraped_articles, "cumulative total of scraped Alzheimer related pages (for all runs).")
-    print("---------------------------------------------------------------------------------------------------------------")
+        # pulling total number of alzheimer related articles from all runs, for output (indexed count, no file read).
+        total_scraped_articles = state.count_articles()
+
+        print("\n-------------------------------------------------------------------------------------------------------------")
+        print(total_links, "new, unlogged, internal article links found across all sponsor sites this run.")
+        print(total_alz_links, "alzheimer related links found this run.") # count includes URLs with duplicate data that were filtered out
+        print(total_scraped_articles, "cumulative total of scraped Alzheimer related pages (for all runs).")
+        print_storage_stats(base_folder, {site_name: pdf_folder_for(site_name, site_info) for site_name, site_info in site_details.items()})
+        print("---------------------------------------------------------------------------------------------------------------")
+    finally:
+        state.close() # closing every thread's database connection, even if the run failed
 
 # ==========================================================================================
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(pdf_mode=args.pdf, pdf_workers=args.pdf_workers, pdf_compression=args.pdf_compression, pdf_quality=args.pdf_quality,
+         pdf_dpi=args.pdf_dpi, pdf_max_bytes=args.pdf_max_kb * 1000)
 
@@ -0,0 +1,319 @@
+# This python file stores the PDF encoder used by the screenshot PDF engines ("raster" and "tiled" in pdf_engine.py).
+# PIL's PDF writer embeds the raw RGB screenshot, so every archived page ran to several MB. Screenshots are now written by a small
+# PDF writer with each page's image compressed:
+#   - "jpeg": DCT compressed at JPEG_QUALITY (default, smallest files)
+#   - "flate": lossless, the image is zlib compressed with PNG row filters (sharper text, bigger files)
+# Images are downsampled to TARGET_DPI, and if a PDF would go over MAX_PDF_BYTES it is re-encoded with a lower JPEG quality, then a
+# lower DPI, until it fits. The settings can be picked per run with the WEBSCRAPER_PDF_* environment variables or set_pdf_encoder().
+# Every PDF saved is counted per site, storage_stats() reports each site's PDF and HTML folder sizes at the end of a run.
+
+import os
+import io
+import struct
+import threading
+from PIL import Image
+
+PDF_COMPRESSIONS = ["jpeg", "flate"]
+DEFAULT_PDF_COMPRESSION = os.environ.get("WEBSCRAPER_PDF_COMPRESSION", "jpeg")
+JPEG_QUALITY = int(os.environ.get("WEBSCRAPER_PDF_QUALITY", 75)) # 1-95
+TARGET_DPI = float(os.environ.get("WEBSCRAPER_PDF_DPI", 72)) # screenshots are 100 dpi (RASTER_RESOLUTION), anything lower downsamples
+MAX_PDF_BYTES = int(os.environ.get("WEBSCRAPER_PDF_MAX_BYTES", 2000000)) # size budget of each PDF, 0 for no budget
+
+# how far the size budget can step a PDF down
+MIN_JPEG_QUALITY = 35
+QUALITY_STEP = 15
+MIN_DPI = 50.0
+DPI_STEP = 0.8
+
+pdf_encoder = None
+
+# ==========================================================================================
+#                          CLASS : PDF ENCODER
+# ==========================================================================================
+'''
+* class_identifier: PdfEncoder
+* summary: compresses screenshot images for the PDF writer. Keeps no state between images so one encoder is shared by every thread.
+* parameters:
+    - compression: "jpeg" or "flate"
+    - quality: JPEG quality
+    - dpi: target DPI, images with a higher DPI are downsampled
+    - max_bytes: size budget of each PDF, 0 or None for no budget
+'''
+class PdfEncoder:
+    def __init__(self, compression=DEFAULT_PDF_COMPRESSION, quality=JPEG_QUALITY, dpi=TARGET_DPI, max_bytes=MAX_PDF_BYTES):
+        self.compression = compression
+        self.quality = max(1, min(95, int(quality)))
+        self.dpi = float(dpi) if dpi else None
+        self.max_bytes = int(max_bytes or 0)
+
+    def __str__(self):
+        settings = self.compression + (" quality " + str(self.quality) if self.compression == "jpeg" else "")
+        settings += ", " + (str(int(self.dpi)) + " dpi" if self.dpi else "full resolution")
+        settings += ", " + (str(self.max_bytes // 1000) + " KB budget" if self.max_bytes else "no size budget")
+        return settings
+
+    '''
+    * function_identifier: encode
+    * summary: downsamples and compresses one image. If a budget is given and the image doesn't fit, flate switches to JPEG, then the
+        JPEG quality is lowered, then the DPI, until it fits or MIN_JPEG_QUALITY and MIN_DPI are reached.
+    * parameters:
+        - image: RGB PIL image
+        - source_dpi: DPI the image was captured at
+        - budget: optional max bytes for this image
+    * return: (encoded image dictionary for ImagePdfWriter, True if it fits the budget)
+    '''
+    def encode(self, image, source_dpi, budget=None):
+        compression, quality = self.compression, self.quality
+        dpi = min(self.dpi or source_dpi, source_dpi)
+        scaled, scaled_dpi = None, None
+        while True:
+            if scaled_dpi != dpi:
+                scaled, scaled_dpi = scale_image(image, dpi / source_dpi), dpi
+            encoded = encode_image(scaled, compression, quality)
+            encoded["dpi"] = dpi
+            if not budget or len(encoded["data"]) <= budget:
+                return encoded, True
+
+            if compression == "flate":
+                compression = "jpeg"
+            elif quality > MIN_JPEG_QUALITY:
+                quality = max(MIN_JPEG_QUALITY, quality - QUALITY_STEP)
+            elif dpi > MIN_DPI:
+                dpi = max(MIN_DPI, dpi * DPI_STEP)
+            else:
+                return encoded, False
+
+
+# ==========================================================================================
+#                          FUNCTIONS : ENCODER SELECTION
+# ==========================================================================================
+'''
+* function_identifier: set_pdf_encoder
+* summary: sets the encoder used for screenshot PDFs. Falls back on "jpeg" if the compression is unknown.
+* parameters:
+    - compression: "jpeg" or "flate"
+    - quality: JPEG quality (1-95)
+    - dpi: target DPI, None keeps the full screenshot resolution
+    - max_bytes: size budget of each PDF, 0 for no budget
+* return: the PdfEncoder that is now in use
+'''
+def set_pdf_encoder(compression=DEFAULT_PDF_COMPRESSION, quality=JPEG_QUALITY, dpi=TARGET_DPI, max_bytes=MAX_PDF_BYTES):
+    global pdf_encoder
+    if compression not in PDF_COMPRESSIONS:
+        print("PDF compression", compression, "is not available, using jpeg.")
+        compression = "jpeg"
+    pdf_encoder = PdfEncoder(compression, quality, dpi, max_bytes)
+    return pdf_encoder
+
+
+def get_pdf_encoder():
+    return pdf_encoder
+
+
+# ==========================================================================================
+#                          FUNCTIONS : IMAGE ENCODING
+# ==========================================================================================
+def scale_image(image, factor):
+    if factor >= 1:
+        return image
+    size = (max(1, int(round(image.width * factor))), max(1, int(round(image.height * factor))))
+    return image.resize(size, Image.LANCZOS)
+
+
+'''
+* function_identifier: encode_image
+* summary: compresses an image into a PDF image stream. JPEG files are valid DCTDecode streams as they are. For flate the image is saved
+    as a PNG and its IDAT chunks are joined, which is a zlib stream of PNG filtered rows that FlateDecode reads with a PNG predictor.
+* parameters:
+    - image: RGB or L PIL image
+    - compression: "jpeg" or "flate"
+    - quality: JPEG quality
+* return: dictionary with the stream 'data', 'filter', 'decode_parms', 'width', 'height', and 'colors'
+'''
+def encode_image(image, compression, quality=JPEG_QUALITY):
+    colors = 1 if image.mode == "L" else 3
+    output = io.BytesIO()
+    if compression == "jpeg":
+        image.save(output, "JPEG", quality=quality)
+        return {"data": output.getvalue(), "filter": "DCTDecode", "decode_parms": None,
+                "width": image.width, "height": image.height, "colors": colors}
+
+    image.save(output, "PNG", compress_level=6)
+    png = output.getvalue()
+    idat = []
+    position = 8 # skipping the PNG signature
+    while position < len(png):
+        length, chunk_type = struct.unpack(">I4s", png[position:position + 8])
+        if chunk_type == b"IDAT":
+            idat.append(png[position + 8:position + 8 + length])
+        position += 12 + length # length, type, data, crc
+    decode_parms = "<< /Predictor 15 /Colors %d /BitsPerComponent 8 /Columns %d >>" % (colors, image.width)
+    return {"data": b"".join(idat), "filter": "FlateDecode", "decode_parms": decode_parms,
+            "width": image.width, "height": image.height, "colors": colors}
+
+
+# ==========================================================================================
+#                          CLASS : IMAGE PDF WRITER
+# ==========================================================================================
+'''
+* class_identifier: ImagePdfWriter
+* summary: writes a PDF with one full page image per page straight to a file, page by page, so only the image being added is in memory.
+    The page size comes from the capture DPI, so downsampled pages print at the same size as the screenshot.
+* parameters:
+    - pdf_path: where the PDF is written
+    - encoder: PdfEncoder, the one selected with set_pdf_encoder() if not given
+    - source_dpi: DPI the screenshots are captured at
+'''
+class ImagePdfWriter:
+    def __init__(self, pdf_path, encoder=None, source_dpi=100.0):
+        self.encoder = encoder or pdf_encoder
+        self.source_dpi = source_dpi
+        self.file = open(pdf_path, "wb")
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3 # 1 is the catalog and 2 the page tree, both written on close
+        self.within_budget = True
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def write_object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(b"%d 0 obj\n" % obj_id + body.encode("latin-1"))
+        if stream is not None:
+            self.file.write(b"\nstream\n")
+            self.file.write(stream)
+            self.file.write(b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def add_object(self, body, stream=None):
+        obj_id = self.next_id
+        self.next_id += 1
+        self.write_object(obj_id, body, stream)
+        return obj_id
+
+    '''
+    * function_identifier: add_page
+    * summary: encodes an image and writes it as the next page.
+    * parameters:
+        - image: RGB PIL image
+        - budget: optional max bytes for this page's image
+    * return: size of the page's image stream in bytes
+    '''
+    def add_page(self, image, budget=None):
+        encoded, fits = self.encoder.encode(image, self.source_dpi, budget)
+        self.within_budget = self.within_budget and fits
+        image_dict = "<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent 8 /Filter /%s " % (
+            encoded["width"], encoded["height"], "/DeviceRGB" if encoded["colors"] == 3 else "/DeviceGray", encoded["filter"])
+        if encoded["decode_parms"]:
+            image_dict += "/DecodeParms " + encoded["decode_parms"] + " "
+        image_id = self.add_object(image_dict + "/Length %d >>" % len(encoded["data"]), encoded["data"])
+
+        # page size in points (1/72 inch)
+        width = encoded["width"] * 72.0 / encoded["dpi"]
+        height = encoded["height"] * 72.0 / encoded["dpi"]
+        content = ("q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % (width, height)).encode("latin-1")
+        content_id = self.add_object("<< /Length %d >>" % len(content), content)
+        self.page_ids.append(self.add_object(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>" % (
+                width, height, image_id, content_id)))
+        return len(encoded["data"])
+
+    '''
+    * function_identifier: close
+    * summary: writes the page tree, catalog, and cross reference table, then closes the file.
+    * return: size of the PDF in bytes
+    '''
+    def close(self):
+        try:
+            self.write_object(2, "<< /Type /Pages /Kids [%s] /Count %d >>" % (
+                " ".join("%d 0 R" % page_id for page_id in self.page_ids), len(self.page_ids)))
+            self.write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+            xref_position = self.file.tell()
+            self.file.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id)
+            for obj_id in range(1, self.next_id):
+                self.file.write(b"%010d 00000 n \n" % self.offsets[obj_id])
+            self.file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self.next_id, xref_position))
+            return self.file.tell()
+        finally:
+            self.file.close()
+
+
+# ==========================================================================================
+#                          FUNCTIONS : STORAGE STATS
+# ==========================================================================================
+run_stats = {} # {PDF folder name: {"pdfs": count, "bytes": total, "over_budget": count}} for the PDFs saved this run
+stats_lock = threading.Lock()
+
+
+# counts a saved PDF in this run's stats of its folder (saved_sites/<name>_pdfs)
+def record_pdf(pdf_path):
+    size = os.path.getsize(pdf_path)
+    folder = os.path.basename(os.path.dirname(os.path.abspath(pdf_path)))
+    folder = folder[:-len("_pdfs")] if folder.endswith("_pdfs") else folder
+    with stats_lock:
+        stats = run_stats.setdefault(folder, {"pdfs": 0, "bytes": 0, "over_budget": 0})
+        stats["pdfs"] += 1
+        stats["bytes"] += size
+        if pdf_encoder and pdf_encoder.max_bytes and size > pdf_encoder.max_bytes:
+            stats["over_budget"] += 1
+    return size
+
+
+def folder_size(folder):
+    count = total = 0
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    count += 1
+                    total += entry.stat().st_size
+    except Exception as e:
+        pass
+    return count, total
+
+
+'''
+* function_identifier: storage_stats
+* summary: sizes up each site's saved files: the whole PDF and HTML folders (all runs), and the PDFs saved this run.
+* parameters:
+    - base_folder: folder the site folders are in
+    - pdf_folders: dictionary {site name: PDF folder name} (pdf_folder_for() in detail_getters.py)
+* return: dictionary {site name: {"pdfs", "pdf_bytes", "htmls", "html_bytes", "run_pdfs", "run_bytes", "over_budget"}}
+'''
+def storage_stats(base_folder, pdf_folders):
+    stats = {}
+    for site_name, pdf_folder in pdf_folders.items():
+        pdfs, pdf_bytes = folder_size(os.path.join(base_folder, pdf_folder + "_pdfs"))
+        htmls, html_bytes = folder_size(os.path.join(base_folder, site_name + "_htmls"))
+        with stats_lock:
+            run = dict(run_stats.get(pdf_folder, {"pdfs": 0, "bytes": 0, "over_budget": 0}))
+        stats[site_name] = {"pdfs": pdfs, "pdf_bytes": pdf_bytes, "htmls": htmls, "html_bytes": html_bytes,
+                            "run_pdfs": run["pdfs"], "run_bytes": run["bytes"], "over_budget": run["over_budget"]}
+    return stats
+
+
+def format_bytes(size):
+    for unit in ["B", "KB", "MB"]:
+        if size < 1000:
+            return ("%d " % size if unit == "B" else "%.1f " % size) + unit
+        size /= 1000.0
+    return "%.2f GB" % size
+
+
+# prints one line per site with storage_stats()
+def print_storage_stats(base_folder, pdf_folders):
+    stats = storage_stats(base_folder, pdf_folders)
+    print("\nStorage per site (PDFs saved this run, then the whole PDF and HTML folders):")
+    for site_name, site_stats in sorted(stats.items()):
+        run_average = site_stats["run_bytes"] // site_stats["run_pdfs"] if site_stats["run_pdfs"] else 0
+        line = "  " + site_name.ljust(30) + " this run: " + str(site_stats["run_pdfs"]) + " PDF(s), " + format_bytes(site_stats["run_bytes"])
+        if site_stats["run_pdfs"]:
+            line += " (avg " + format_bytes(run_average) + ")"
+        if site_stats["over_budget"]:
+            line += ", " + str(site_stats["over_budget"]) + " over budget"
+        line += " | total: " + str(site_stats["pdfs"]) + " PDF(s) " + format_bytes(site_stats["pdf_bytes"])
+        line += ", " + str(site_stats["htmls"]) + " HTML(s) " + format_bytes(site_stats["html_bytes"])
+        print(line)
+    return stats
+
+
+set_pdf_encoder(DEFAULT_PDF_COMPRESSION, JPEG_QUALITY, TARGET_DPI, MAX_PDF_BYTES)
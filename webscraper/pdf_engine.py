@@ -0,0 +1,241 @@
+# This python file stores the PDF engines used to save each article as a PDF.
+#   - "print": Chrome's own print to PDF (DevTools Page.printToPDF) through the driver. Vector PDF with selectable text, no temporary files.
+#   - "raster": the old way, the window is stretched to the full page height and a screenshot is saved as a one page image PDF.
+#   - "tiled": screenshots the page one window height at a time and appends each slice to the PDF as its own page, so memory never
+#     holds more than one slice no matter how tall the page is.
+#     When printing fails, short pages use "raster" and pages taller than MAX_RASTER_HEIGHT use "tiled".
+# Screenshot PDFs are compressed and kept under a size budget by the PDF encoder (pdf_encoder.py).
+# The engine can be picked per run with the WEBSCRAPER_PDF_ENGINE environment variable or set_pdf_engine().
+
+import os
+import io
+import time
+import base64
+from PIL import Image
+from pdf_encoder import ImagePdfWriter, get_pdf_encoder, record_pdf
+
+PDF_ENGINES = ["print", "raster", "tiled"]
+DEFAULT_PDF_ENGINE = os.environ.get("WEBSCRAPER_PDF_ENGINE", "print")
+RASTER_RESOLUTION = 100.0 # dpi screenshots are captured at, the PDF encoder downsamples from it
+MAX_RASTER_HEIGHT = 8000 # pages taller than this (CSS pixels) are captured in tiles instead of one screenshot
+TILE_HEIGHT = 1600 # height of each tile (CSS pixels), the window is resized to it while tiling
+TILE_SETTLE = 0.2 # seconds to wait after each scroll so lazy loaded images can paint
+
+# hides fixed / sticky elements (headers, cookie bars) after the first tile so they aren't repeated on every page, returns how many were hidden
+HIDE_FIXED_JS = """
+var hidden = 0;
+var elements = document.body ? document.body.getElementsByTagName('*') : [];
+for (var i = 0; i < elements.length; i++) {
+    var position = window.getComputedStyle(elements[i]).position;
+    if (position === 'fixed' || position === 'sticky') {
+        elements[i].setAttribute('data-webscraper-hidden', elements[i].style.visibility);
+        elements[i].style.visibility = 'hidden';
+        hidden++;
+    }
+}
+return hidden;
+"""
+RESTORE_FIXED_JS = """
+var elements = document.querySelectorAll('[data-webscraper-hidden]');
+for (var i = 0; i < elements.length; i++) {
+    elements[i].style.visibility = elements[i].getAttribute('data-webscraper-hidden');
+    elements[i].removeAttribute('data-webscraper-hidden');
+}
+"""
+
+# Page.printToPDF options, backgrounds are printed so the PDF looks like the page
+PRINT_OPTIONS = {
+    "printBackground": True,
+    "preferCSSPageSize": True,
+    "transferMode": "ReturnAsBase64",
+}
+
+pdf_engine = "print"
+
+# ==========================================================================================
+#                          FUNCTIONS : ENGINE SELECTION
+# ==========================================================================================
+'''
+* function_identifier: set_pdf_engine
+* summary: selects the PDF engine used by add_pdf_detail(). Falls back on "print" if the engine is unknown.
+* parameters:
+    - engine: "print", "raster", or "tiled"
+* return: name of the engine that is now in use
+'''
+def set_pdf_engine(engine):
+    global pdf_engine
+    if engine not in PDF_ENGINES:
+        print("PDF engine", engine, "is not available, using print.")
+        engine = "print"
+    pdf_engine = engine
+    return pdf_engine
+
+
+def get_pdf_engine():
+    return pdf_engine
+
+
+# ==========================================================================================
+#                          FUNCTIONS : PDF ENGINES
+# ==========================================================================================
+'''
+* function_identifier: print_pdf
+* summary: prints the page loaded in the driver to a vector PDF with Chrome DevTools (Page.printToPDF). Drivers without DevTools commands
+    use WebDriver's print_page() instead, which prints the same way.
+* parameters:
+    - driver: selenium webdriver with the article loaded
+* return: the PDF file's bytes
+'''
+def print_pdf(driver):
+    if hasattr(driver, "execute_cdp_cmd"):
+        result = driver.execute_cdp_cmd("Page.printToPDF", PRINT_OPTIONS)
+        return base64.b64decode(result["data"])
+    from selenium.webdriver.common.print_page_options import PrintOptions
+    options = PrintOptions()
+    options.background = True
+    return base64.b64decode(driver.print_page(options))
+
+
+'''
+* function_identifier: raster_pdf
+* summary: stretches the browser window to the full page size, screenshots it, and writes the screenshot as a one page image PDF
+    compressed by the PDF encoder. The screenshot is kept in memory, nothing is written to disk but the PDF.
+    The window size is put back when it is done, since the driver goes back to the pool.
+* parameters:
+    - driver: selenium webdriver with the article loaded
+    - pdf_path: where the PDF is written
+* return: size of the PDF in bytes
+'''
+def raster_pdf(driver, pdf_path):
+    original_size = driver.get_window_size()
+    try:
+        # resizing the browser window so that it fits the entire page
+        try:
+            total_width = driver.execute_script("return document.documentElement.scrollWidth")
+            total_height = driver.execute_script("return document.documentElement.scrollHeight")
+            driver.set_window_size(total_width, total_height)
+        except Exception as e:
+            print("Could not resize window for", driver.current_url)
+
+        image = Image.open(io.BytesIO(driver.get_screenshot_as_png()))
+        if image.mode != "RGB": # Converting to RGB because PDFs require this format
+            image = image.convert("RGB")
+        writer = ImagePdfWriter(pdf_path, source_dpi=RASTER_RESOLUTION)
+        try:
+            writer.add_page(image, get_pdf_encoder().max_bytes)
+        finally:
+            size = writer.close()
+    finally:
+        try:
+            driver.set_window_size(original_size["width"], original_size["height"])
+        except Exception as e:
+            pass
+    return size
+
+
+'''
+* function_identifier: tiled_pdf
+* summary: captures the page in window height tiles and writes each tile straight to the PDF as its own page (ImagePdfWriter).
+    Only one tile is ever held in memory. Each tile gets its share of the size budget by its height. Fixed / sticky elements are hidden after the first tile so they only show once.
+    The window size and scroll position are put back when it is done.
+* parameters:
+    - driver: selenium webdriver with the article loaded
+    - pdf_path: where the PDF is written
+    - tile_height: height of each tile in CSS pixels
+* return: number of tiles (PDF pages) written
+'''
+def tiled_pdf(driver, pdf_path, tile_height=TILE_HEIGHT):
+    original_size = driver.get_window_size()
+    max_bytes = get_pdf_encoder().max_bytes
+    writer = ImagePdfWriter(pdf_path, source_dpi=RASTER_RESOLUTION)
+    tiles = 0
+    try:
+        total_width = driver.execute_script("return document.documentElement.scrollWidth")
+        driver.set_window_size(total_width, tile_height)
+        viewport = driver.execute_script("return window.innerHeight") or tile_height
+        scale = driver.execute_script("return window.devicePixelRatio") or 1
+
+        y = 0
+        while True:
+            total_height = driver.execute_script("return document.documentElement.scrollHeight") # can grow as lazy content loads
+            if y >= total_height:
+                break
+            driver.execute_script("window.scrollTo(0, arguments[0]);", y)
+            time.sleep(TILE_SETTLE)
+            scrolled = driver.execute_script("return window.pageYOffset")
+
+            tile = Image.open(io.BytesIO(driver.get_screenshot_as_png()))
+            # the last tile can't scroll a full window further, cutting off the part the previous tile already has
+            overlap = int(round((y - scrolled) * scale))
+            if overlap > 0:
+                tile = tile.crop((0, overlap, tile.width, tile.height))
+            if tile.mode != "RGB": # Converting to RGB because PDFs require this format
+                tile = tile.convert("RGB")
+            budget = int(max_bytes * tile.height / max(total_height * scale, tile.height)) if max_bytes else None
+            writer.add_page(tile, budget)
+            tile.close()
+            tiles += 1
+
+            if tiles == 1:
+                driver.execute_script(HIDE_FIXED_JS)
+            y += viewport
+    finally:
+        writer.close()
+        try:
+            driver.execute_script(RESTORE_FIXED_JS)
+            driver.execute_script("window.scrollTo(0, 0);")
+            driver.set_window_size(original_size["width"], original_size["height"])
+        except Exception as e:
+            pass
+    return tiles
+
+
+# picks the screenshot engine for a page when printing fails
+def fallback_engine(driver):
+    try:
+        if driver.execute_script("return document.documentElement.scrollHeight") > MAX_RASTER_HEIGHT:
+            return "tiled"
+    except Exception as e:
+        pass
+    return "raster"
+
+
+'''
+* function_identifier: save_page_pdf
+* summary: saves the page loaded in the driver as a PDF with the selected engine. If printing fails, the page is screenshotted instead
+    (tiled if it is taller than MAX_RASTER_HEIGHT). The PDF is written to a temp file first, so a failed capture never leaves half a PDF.
+    Its size is counted in the site's storage stats (pdf_encoder.py).
+* parameters:
+    - driver: selenium webdriver with the article loaded
+    - pdf_path: where the PDF is saved
+    - engine: optional engine to use instead of the selected one
+* return: name of the engine that made the PDF
+'''
+def save_page_pdf(driver, pdf_path, engine=None):
+    engine = engine or pdf_engine
+    temp_path = pdf_path + ".part"
+    data = None
+    if engine == "print":
+        try:
+            data = print_pdf(driver)
+        except Exception as e:
+            engine = fallback_engine(driver)
+            print("Print to PDF failed, saving a", engine, "screenshot PDF instead.")
+
+    try:
+        if engine == "tiled":
+            tiled_pdf(driver, temp_path)
+        elif data is None:
+            raster_pdf(driver, temp_path)
+        else:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+        os.replace(temp_path, pdf_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    record_pdf(pdf_path)
+    return engine
+
+
+set_pdf_engine(DEFAULT_PDF_ENGINE)
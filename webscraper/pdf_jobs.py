@@ -0,0 +1,179 @@
+# This python file stores the background PDF job queue. Article metadata is saved as soon as it is extracted with a pending PDF status,
+# and a pool of PDF workers, each with its own headless chrome from the DriverPool, makes the PDFs and updates the rows when they finish.
+# So extraction never waits on a browser render, and a metadata-only run can skip or defer PDFs entirely.
+#   - "sync": the old way, the detail getter makes the PDF before the row is saved. Rows whose PDF failed are not saved.
+#   - "async": rows are saved with pdf_status "pending", PDF workers render them in the background (default).
+#   - "defer": rows are saved with pdf_status "deferred", render them later with:  python pdf_jobs.py render [--site name]
+#   - "skip": rows are saved with pdf_status "skipped", no PDFs are made.
+
+import os
+import queue
+import argparse
+import threading
+from utils import add_pdf_detail
+from crawl_state import MAX_PDF_ATTEMPTS
+
+PDF_MODES = ["sync", "async", "defer", "skip"]
+DEFAULT_PDF_MODE = "async"
+PDF_WORKERS = 2 # headless chrome instances rendering PDFs at the same time
+PDF_STATUS_FOR_MODE = {"sync": "done", "async": "pending", "defer": "deferred", "skip": "skipped"} # status rows are saved with
+
+STOP = None # put on the job queue once per worker to shut the pool down
+
+# ==========================================================================================
+#                          CLASS : PDF WORKER POOL
+# ==========================================================================================
+'''
+* class_identifier: PdfWorkerPool
+* summary: job queue served by PDF worker threads. Each worker borrows one driver from the DriverPool for the whole run, makes the PDF
+    for each job with add_pdf_detail(), and saves the PDF path and status on the article's row. A driver that crashes is recycled.
+* parameters:
+    - driver_pool: DriverPool (selenium_setup.py) the workers borrow their drivers from, it should have room for the PDF workers
+    - state: CrawlState database the article rows are in
+    - workers: number of PDF workers
+'''
+class PdfWorkerPool:
+    def __init__(self, driver_pool, state, workers=PDF_WORKERS):
+        self.driver_pool = driver_pool
+        self.state = state
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.counts = {"done": 0, "failed": 0}
+        self.threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(max(1, int(workers)))]
+        for thread in self.threads:
+            thread.start()
+
+    '''
+    * function_identifier: submit
+    * summary: queues an article's PDF. Returns right away.
+    * parameters:
+        - site: site name the article row was saved under
+        - url: the article's URL
+        - html_path: the article's saved HTML, used as the page snapshot so the article isn't loaded live again (render_session.py)
+        - clean_title: file name for the PDF (the HTML was renamed to the same name)
+        - pdf_folder: name of the site's PDF folder
+        - cookie_button: optional xpath for a cookie consent button
+    '''
+    def submit(self, site, url, html_path, clean_title, pdf_folder, cookie_button=None):
+        self.jobs.put({"site": site, "url": url, "html_path": html_path, "clean_title": clean_title,
+                       "pdf_folder": pdf_folder, "cookie_button": cookie_button})
+
+    def worker(self):
+        driver = self.driver_pool.acquire()
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is STOP:
+                    return
+                if driver is None:
+                    driver = self.driver_pool.recycle(driver)
+                pdf_path, status = render_job(driver, job)
+                if status == "failed" and not is_alive(driver):
+                    driver = self.driver_pool.recycle(driver)
+                try:
+                    self.state.set_article_pdf(job["site"], job["url"], pdf_path, status)
+                except Exception as e:
+                    print("Failed to save the PDF status for", job["url"])
+                with self.lock:
+                    self.counts[status] += 1
+        finally:
+            self.driver_pool.release(driver)
+
+    # number of PDFs still waiting for a worker
+    def pending(self):
+        return self.jobs.qsize()
+
+    '''
+    * function_identifier: close
+    * summary: waits for every queued PDF to finish, then stops the workers and hands their drivers back to the pool.
+    * return: {"done": count, "failed": count}
+    '''
+    def close(self):
+        for _ in self.threads:
+            self.jobs.put(STOP)
+        for thread in self.threads:
+            thread.join()
+        return dict(self.counts)
+
+
+def is_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception as e:
+        return False
+
+
+'''
+* function_identifier: render_job
+* summary: makes one job's PDF with add_pdf_detail().
+* parameters:
+    - driver: selenium webdriver
+    - job: dictionary from PdfWorkerPool.submit()
+* return: (pdf_path, status). On failure pdf_path is add_pdf_detail()'s failure message and status is "failed".
+'''
+def render_job(driver, job):
+    details = {"URL": job["url"], "TITLE": job["clean_title"], "CLEAN TITLE": job["clean_title"], "HTML PATH": job["html_path"]}
+    try:
+        details = add_pdf_detail(driver, details, site_name=job["pdf_folder"], cookie_xpath=job["cookie_button"])
+    except Exception as e:
+        details["PDF PATH"] = "PDF generation failed"
+    pdf_path = details.get("PDF PATH", "")
+    return pdf_path, "done" if pdf_path.endswith(".pdf") else "failed"
+
+
+# ==========================================================================================
+#                          FUNCTIONS : DEFERRED PDFS
+# ==========================================================================================
+'''
+* function_identifier: render_pending
+* summary: makes the PDFs of every article saved with a pending or deferred PDF (ex. after a "defer" run, or a run that was stopped
+    before its PDF queue drained). PDFs that failed are tried again until they have failed max_attempts times.
+* parameters:
+    - state: CrawlState database
+    - site_details: dictionary {site name: site_info} (get_site_details() in main.py), for each site's PDF folder and cookie button
+    - workers: number of PDF workers
+    - site: optional site name to only render that site's PDFs
+    - max_attempts: number of failed attempts after which a PDF is no longer retried, 0 to skip failed PDFs
+* return: {"done": count, "failed": count}
+'''
+def render_pending(state, site_details, workers=PDF_WORKERS, site=None, max_attempts=MAX_PDF_ATTEMPTS):
+    from selenium_setup import DriverPool
+    from detail_getters import pdf_folder_for
+
+    rows = state.pending_pdfs(site, max_attempts=max_attempts)
+    print(len(rows), "PDF(s) to render.")
+    if not rows:
+        return {"done": 0, "failed": 0}
+    workers = min(max(1, int(workers)), len(rows))
+    driver_pool = DriverPool(size=workers)
+    pool = PdfWorkerPool(driver_pool, state, workers)
+    for site_name, url, title, html_path in rows:
+        site_info = site_details.get(site_name, {})
+        clean_title = os.path.splitext(os.path.basename(html_path))[0] if html_path else None # the HTML was renamed to the PDF's name
+        pool.submit(site_name, url, html_path, clean_title, pdf_folder_for(site_name, site_info), site_info.get("cookie_button"))
+    counts = pool.close()
+    driver_pool.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background PDF tools.")
+    parser.add_argument("command", choices=["render", "status"], help="render: make every pending/deferred PDF and retry failed ones, status: count articles by PDF status")
+    parser.add_argument("--site", default=None, help="render: only render this site's PDFs")
+    parser.add_argument("--workers", type=int, default=PDF_WORKERS, help="render: number of PDF workers")
+    parser.add_argument("--max-attempts", type=int, default=MAX_PDF_ATTEMPTS, help="render: failed PDFs are retried until they have failed this many times, 0 to skip them")
+    args = parser.parse_args()
+
+    from crawl_state import CrawlState
+    from main import get_site_details
+    from detail_getters import pdf_folder_for
+    site_details = get_site_details()
+    state = CrawlState(os.path.join("saved_sites", "crawl_state.db"), site_folders={pdf_folder_for(name, info): name for name, info in site_details.items()})
+    if args.command == "render":
+        counts = render_pending(state, site_details, args.workers, args.site, args.max_attempts)
+        print(counts["done"], "PDF(s) made,", counts["failed"], "failed.")
+    else:
+        for status, count in sorted(state.count_pdf_statuses().items(), key=lambda item: str(item[0])):
+            print(str(status).ljust(10), count)
+    state.close()
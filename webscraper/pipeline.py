@@ -0,0 +1,277 @@
+# This python file stores the streaming pipeline that runs one site. Instead of finishing each stage for every link before the next
+# stage starts, links flow through bounded queues: pagination -> fetch workers -> keyword filter -> browser (selenium fallback + extraction).
+# A full queue blocks the stage feeding it (backpressure). Fetch workers check the HTML for the keyword(s) while it downloads, so pages without
+# them are never parsed or written to disk.
+
+import os
+import queue
+import threading
+from doc_cache import document_cache
+from html_parser import parse_for_text
+from link_collectors import get_all_pages
+from utils import fetch_html_stream, render_html_sel, has_keywords
+from keywords import keyword_hits
+from downloader import domain_throttle
+from detail_getters import make_detail_getter, pdf_folder_for
+from pdf_jobs import PDF_STATUS_FOR_MODE
+
+DEFAULT_QUEUE_SIZE = 50 # max items waiting between two stages
+FILTER_WORKERS = 2 # keyword filtering is CPU work, a couple of threads is enough
+FETCH_WORKERS = 4 # requests fetch threads per site (site_details 'fetch_workers'), downloads in flight are capped per domain by downloader.py
+STOP = None # sentinel put on a queue to tell a worker there is no more work
+
+# ==========================================================================================
+#                          CLASS : STREAMING SITE PIPELINE
+# ==========================================================================================
+'''
+* class_identifier: SitePipeline
+* summary: runs one site's full pipeline as streaming stages connected by bounded queues.
+    - pagination (get_all_pages) runs on 'driver' and pushes each new link onto link_queue as soon as it is found.
+    - fetch workers stream links with requests and drop pages whose HTML doesn't have the keyword(s). Failed links (or html_sel_save sites) go to the browser queue.
+    - filter workers check the page text for keyword(s). Only matches are saved (site_folder/<file_number>.html) and sent to the browser queue.
+    - the browser stage runs on 'browser_driver': it renders the links requests could not fetch, and runs the site's detail getter on matches.
+* parameters:
+    - site_name: name of the website (key in site_details)
+    - site_info: dictionary containing site-specefic information
+    - driver: selenium webdriver used for pagination
+    - browser_driver: selenium webdriver used for rendering and extraction. If it is the same driver, the browser stage waits for pagination to finish.
+    - site_folder: folder where matching HTML files will be saved
+    - checked_store: CheckedLinkStore shared by every site (pagination skips its links, the filter adds to it)
+    - queue_size: max items waiting between two stages
+    - incremental: True to stop paginating once already checked links show up (see IncrementalStop in link_collectors.py)
+    - pdf_mode: "sync" makes each PDF before its row is saved, "async" queues it on pdf_pool, "defer" / "skip" don't make it (see pdf_jobs.py)
+    - pdf_pool: PdfWorkerPool the "async" PDFs are queued on
+    - state: optional CrawlState. If given, each article row is saved as soon as it is extracted, otherwise the rows are returned.
+'''
+class SitePipeline:
+    def __init__(self, site_name, site_info, driver, browser_driver, site_folder, checked_store, queue_size=DEFAULT_QUEUE_SIZE, incremental=True,
+                 pdf_mode="sync", pdf_pool=None, state=None):
+        self.site_name = site_name
+        self.site_info = site_info
+        self.driver = driver
+        self.browser_driver = browser_driver
+        self.site_folder = site_folder
+        self.checked_store = checked_store
+        self.incremental = incremental
+        self.pdf_mode = "sync" if pdf_mode == "async" and pdf_pool is None else pdf_mode
+        self.pdf_pool = pdf_pool
+        self.state = state
+        self.pdf_folder = pdf_folder_for(site_name, site_info)
+        self.cookie_button = site_info.get("cookie_button")
+        self.detail_getter = make_detail_getter(site_name, site_info) # selectors are compiled once for the whole site
+        self.fetch_workers = max(1, int(site_info.get("fetch_workers", FETCH_WORKERS)))
+
+        self.link_queue = queue.Queue(maxsize=queue_size) # url
+        self.page_queue = queue.Queue(maxsize=queue_size) # (url, html_content)
+        # ("render", url) or ("extract", file_number, url, html_path). Unbounded when sharing the pagination driver, since the browser stage
+        # can't drain it until pagination finishes and a full queue would block pagination forever.
+        self.browser_queue = queue.Queue(maxsize=0 if browser_driver is driver else queue_size)
+        self.discovery_done = threading.Event()
+
+        self.lock = threading.Lock()
+        self.file_number = 0
+        self.url_map = {} # {file_number: url} for saved HTMLs that had the keyword(s)
+        self.keyword_hits = {} # {file_number: relevance term counts and score}, saved with the article's metadata
+        self.links_found = 0
+        self.articles = [] # rows not saved yet (no state given)
+        self.articles_saved = 0
+        self.seen_titles = set()
+
+    # ------------------------------------------------------------------------------------------
+    #                          STAGE 1 : PAGINATION
+    # ------------------------------------------------------------------------------------------
+    # called by get_all_pages with every batch of new links, blocks while the fetch workers are behind
+    def on_links(self, links):
+        for link in links:
+            with self.lock:
+                self.links_found += 1
+            self.link_queue.put(link)
+
+    def discover(self):
+        try:
+            links = get_all_pages(self.site_name, self.site_info, self.driver, on_links=self.on_links, checked_links=self.checked_store, incremental=self.incremental)
+            print("\nTotal number of new, unlogged, internal links found on", self.site_info["url"], ":", len(links))
+        except Exception as e:
+            print("Failed to collect links for", self.site_name)
+        finally:
+            self.discovery_done.set()
+            for _ in range(self.fetch_workers):
+                self.link_queue.put(STOP)
+
+    # ------------------------------------------------------------------------------------------
+    #                          STAGE 2 : FETCH WORKERS
+    # ------------------------------------------------------------------------------------------
+    def fetch_worker(self):
+        while True:
+            url = self.link_queue.get()
+            if url is STOP:
+                return
+            page = None
+            if not self.site_info.get("html_sel_save"):
+                slot = domain_throttle.acquire(url) # shared with every other download from this domain
+                try:
+                    page = fetch_html_stream(url) # keyword(s) are checked while the page downloads
+                finally:
+                    slot.release()
+            if page is None:
+                self.browser_queue.put(("render", url)) # requests failed or is skipped for this site, selenium will render it
+                continue
+            html_content, matched = page
+            if matched:
+                self.page_queue.put((url, html_content)) # the filter confirms the keyword(s) are in the page text before saving
+            else:
+                self.checked_store.add(url, self.site_name) # keyword(s) are not anywhere in the HTML, the page is never parsed or saved
+
+    # ------------------------------------------------------------------------------------------
+    #                          STAGE 3 : KEYWORD FILTER
+    # ------------------------------------------------------------------------------------------
+    '''
+    * function_identifier: filter_page
+    * summary: checks a downloaded page for keyword(s) and logs the link as checked. Only saves the HTML if the keyword(s) were found.
+    * parameters:
+        - url: the page's URL
+        - html_content: the page's HTML
+    * return: (file_number, html_path) of the saved HTML, or None if the page did not have the keyword(s).
+    '''
+    def filter_page(self, url, html_content):
+        try:
+            page_text, soup = parse_for_text(html_content)
+        except Exception as e:
+            print("Error occured when searching HTML for keyword:", url)
+            self.checked_store.add(url, self.site_name)
+            return None
+
+        # logging link after text from HTML is successfully extracted.
+        self.checked_store.add(url, self.site_name)
+        if not has_keywords(page_text):
+            return None
+
+        with self.lock:
+            self.file_number += 1
+            file_number = self.file_number
+        html_path = os.path.join(self.site_folder, str(file_number) + ".html")
+        try:
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(html_content)
+        except Exception as e:
+            print("Unable to save HTML for", url)
+            return None
+        document_cache.put(html_path, soup, len(html_content)) # the detail getter reuses this tree instead of parsing the file again
+        hits = keyword_hits(page_text) # every relevance term counted in one pass, while the text is still in memory
+        with self.lock:
+            self.url_map[file_number] = url
+            self.keyword_hits[file_number] = hits
+        return file_number, html_path
+
+    def filter_worker(self):
+        while True:
+            item = self.page_queue.get()
+            if item is STOP:
+                return
+            url, html_content = item
+            saved = self.filter_page(url, html_content)
+            if saved:
+                self.browser_queue.put(("extract", saved[0], url, saved[1]))
+
+    # ------------------------------------------------------------------------------------------
+    #                          STAGE 4 : BROWSER (SELENIUM FALLBACK + EXTRACTION)
+    # ------------------------------------------------------------------------------------------
+    # runs the site's detail getter on a matching HTML and keeps the metadata if it worked
+    def extract(self, file_number, url, html_path):
+        if self.detail_getter is None: # site has no metadata to extract
+            document_cache.discard(html_path)
+            return
+        try:
+            # extracting metadata from the HTML file using the site's detail getter, the PDF is only made here in "sync" mode
+            if self.pdf_mode == "sync":
+                article_data = self.detail_getter(self.browser_driver, html_path, url, cookie_button=self.cookie_button)
+                if not article_data or not article_data.get("PDF PATH", "").endswith(".pdf"): # only keeping articles whose PDF was made
+                    return
+            else:
+                article_data = self.detail_getter(self.browser_driver, html_path, url, cookie_button=self.cookie_button, make_pdf=False)
+                if not article_data:
+                    return
+            article_data["PDF STATUS"] = PDF_STATUS_FOR_MODE[self.pdf_mode]
+
+            # making sure duplicate article metadata is not saved if two urls provide the same information.
+            title = article_data.get("TITLE", "").strip()
+            if title in self.seen_titles:
+                print("Skipping duplicate title, metadata for this article already exist in alz_articles.csv under a different URL.")
+                return
+            self.seen_titles.add(title)
+            # removing clean title column before saving to CSV, it is not needed metadata. Already have a title column.
+            clean_title = article_data.pop("CLEAN TITLE", None)
+            article_data.update(self.keyword_hits.get(file_number, {}))
+
+            if self.state is None:
+                self.articles.append(article_data)
+                return
+            # saving the row right away, with a pending PDF that the PDF workers fill in
+            saved = self.state.add_articles(self.site_name, [article_data])
+            self.articles_saved += saved
+            if saved and self.pdf_mode == "async":
+                self.pdf_pool.submit(self.site_name, url, article_data.get("HTML PATH"), clean_title, self.pdf_folder, self.cookie_button)
+        except Exception as e:
+            print("Failed to extract metadata from", html_path)
+        finally:
+            document_cache.discard(html_path) # the article is done, its tree won't be needed again
+
+    def browser_worker(self):
+        # sharing one driver with pagination, it can't load other pages until pagination is finished
+        if self.browser_driver is self.driver:
+            self.discovery_done.wait()
+
+        while True:
+            item = self.browser_queue.get()
+            if item is STOP:
+                return
+            if item[0] == "render":
+                url = item[1]
+                slot = domain_throttle.acquire(url)
+                try:
+                    html_content = render_html_sel(self.browser_driver, url, self.cookie_button)
+                finally:
+                    slot.release()
+                if html_content is None:
+                    print("Beautiful Soup and Selenium failed when trying to make a .html for:", url)
+                    continue
+                saved = self.filter_page(url, html_content)
+                if saved:
+                    self.extract(saved[0], url, saved[1])
+            else:
+                _, file_number, url, html_path = item
+                self.extract(file_number, url, html_path)
+
+    # ------------------------------------------------------------------------------------------
+    #                          RUNNING THE PIPELINE
+    # ------------------------------------------------------------------------------------------
+    '''
+    * function_identifier: run
+    * summary: starts every stage, waits for the pipeline to drain, and returns the site's results.
+    * return: dictionary with the site's "links" count, "alz_links" count, extracted "articles" that still need saving (list of metadata
+        dictionaries, empty if a state was given), and "articles_saved" count
+    '''
+    def run(self):
+        os.makedirs(self.site_folder, exist_ok=True)
+        fetchers = [threading.Thread(target=self.fetch_worker, daemon=True) for _ in range(self.fetch_workers)]
+        filters = [threading.Thread(target=self.filter_worker, daemon=True) for _ in range(FILTER_WORKERS)]
+        browser = threading.Thread(target=self.browser_worker, daemon=True)
+        for thread in fetchers + filters + [browser]:
+            thread.start()
+
+        # pagination runs on this thread, the other stages start working on the first links right away
+        self.discover()
+
+        # shutting the stages down in order once everything upstream of them is finished
+        for thread in fetchers:
+            thread.join()
+        for _ in filters:
+            self.page_queue.put(STOP)
+        for thread in filters:
+            thread.join()
+        self.browser_queue.put(STOP)
+        browser.join()
+        self.checked_store.flush() # end of the site, writing its checked links
+
+        print("Total number of Alzheimer's related links on", self.site_name, ":", len(self.url_map))
+        return {"links": self.links_found, "alz_links": len(self.url_map), "articles": self.articles, "articles_saved": self.articles_saved}
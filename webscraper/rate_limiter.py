@@ -0,0 +1,103 @@
+# This python file stores the central rate limiter. Every fetcher (requests or selenium) asks it for permission before
+# hitting a domain instead of sleeping for a fixed amount of time, so waiting only happens when a site's limit is actually reached.
+
+import time
+import threading
+from http_session import get_domain
+
+DEFAULT_RATE = 2.0 # tokens (requests) added per second, per domain
+DEFAULT_BURST = 4 # max tokens a domain can save up while idle
+
+# ==========================================================================================
+#                          CLASS : TOKEN BUCKET
+# ==========================================================================================
+'''
+* class_identifier: TokenBucket
+* summary: token bucket for a single domain. Each request takes one token, tokens refill at 'rate' per second up to 'burst'.
+    A request that finds the bucket empty reserves the next token and is told how long to wait for it.
+* parameters:
+    - rate: tokens added per second
+    - burst: max number of tokens the bucket can hold
+'''
+class TokenBucket:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = max(0.001, float(rate))
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    # takes a token and returns how many seconds the caller has to wait before using it (0 if one was available)
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+# ==========================================================================================
+#                          CLASS : PER DOMAIN RATE LIMITER
+# ==========================================================================================
+'''
+* class_identifier: RateLimiter
+* summary: holds one TokenBucket per domain. Domains that were not configured get the default rate and burst.
+'''
+class RateLimiter:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.default_rate = rate
+        self.default_burst = burst
+        self.buckets = {} # {domain: TokenBucket}
+        self.lock = threading.Lock()
+
+    # sets the rate and burst for the URL's domain, replacing any existing bucket
+    def configure(self, url, rate=None, burst=None):
+        bucket = TokenBucket(rate if rate is not None else self.default_rate, burst if burst is not None else self.default_burst)
+        with self.lock:
+            self.buckets[get_domain(url)] = bucket
+
+    def get_bucket(self, url):
+        domain = get_domain(url)
+        with self.lock:
+            if domain not in self.buckets:
+                self.buckets[domain] = TokenBucket(self.default_rate, self.default_burst)
+            return self.buckets[domain]
+
+    # blocks until the URL's domain allows another request, returns the seconds spent waiting
+    def acquire(self, url):
+        wait = self.get_bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# shared limiter used by every fetcher
+rate_limiter = RateLimiter()
+
+# ==========================================================================================
+#                          FUNCTIONS : SHARED LIMITER HELPERS
+# ==========================================================================================
+'''
+* function_identifier: configure_site_rate
+* summary: sets the shared limiter's rate for a site's domain from the site's 'rate_limit' entry in site_details.
+* parameters:
+    - url: the site's base URL
+    - rate_limit: optional dictionary with the keys 'rate' (requests per second) and 'burst'. If None, defaults are used.
+'''
+def configure_site_rate(url, rate_limit=None):
+    rate_limit = rate_limit or {}
+    rate_limiter.configure(url, rate_limit.get("rate"), rate_limit.get("burst"))
+
+
+'''
+* function_identifier: wait_for_token
+* summary: asks the shared limiter for permission to make a request to the URL's domain. Blocks only as long as the domain's limit requires.
+* parameters:
+    - url: the URL about to be requested
+* return: seconds spent waiting
+'''
+def wait_for_token(url):
+    return rate_limiter.acquire(url)
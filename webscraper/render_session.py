@@ -0,0 +1,172 @@
+# This python file stores the render session, it keeps track of what each browser already has on screen so an article is only loaded live once.
+#   - pages the browser stage rendered (render_html_sel) are still open when the PDF is made, so add_pdf_detail() prints them as they are.
+#   - pages requests downloaded are already saved as HTML. Their snapshot is put into the browser with DevTools (Page.setDocumentContent)
+#     with its <script> tags removed, instead of loading the article from the site again. The browser's network is blocked until the PDF
+#     is made, so the snapshot's styles and images can't reach the site around rate_limiter.py and the DomainThrottle. Only what the
+#     browser has cached is shown. Consent popups and redirects never run, and a cookie banner left in the saved markup is removed with
+#     the site's cookie button xpath.
+# A new live page load only happens if neither works (ex. a driver without DevTools).
+
+import re
+import threading
+from selenium.webdriver.support.ui import WebDriverWait
+
+SNAPSHOT_PDFS = True # False makes every PDF that wasn't just rendered load the article live, like before
+SNAPSHOT_TIMEOUT = 10 # max seconds to wait for a snapshot's styles and images
+BLOCKED_URLS = ["http://*", "https://*"] # everything a snapshot could request from a site
+
+SCRIPT_TAG = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+META_REFRESH = re.compile(r"<meta\b[^>]*http-equiv\s*=\s*[\"']?refresh[^>]*>", re.IGNORECASE)
+
+# removes the cookie banner around the consent button (its outermost fixed / sticky parent, or the button), returns how many were removed
+REMOVE_BANNER_JS = """
+var result = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+for (var i = 0; i < result.snapshotLength; i++) {
+    var banner = result.snapshotItem(i);
+    for (var element = banner; element && element !== document.body; element = element.parentElement) {
+        var position = window.getComputedStyle(element).position;
+        if (position === 'fixed' || position === 'sticky') {
+            banner = element;
+        }
+    }
+    banner.remove();
+}
+return result.snapshotLength;
+"""
+
+rendered_pages = {} # {id(driver): URL the driver rendered live and still has open}
+rendered_lock = threading.Lock()
+blocked_drivers = set() # id(driver) of drivers showing a snapshot with their network blocked
+
+# ==========================================================================================
+#                          FUNCTIONS : LIVE RENDERED PAGES
+# ==========================================================================================
+# called once a driver has fully rendered a URL (page loaded, cookies accepted, scrolled)
+def mark_rendered(driver, url):
+    with rendered_lock:
+        rendered_pages[id(driver)] = url
+
+
+def forget_rendered(driver):
+    with rendered_lock:
+        rendered_pages.pop(id(driver), None)
+
+
+'''
+* function_identifier: is_rendered
+* summary: checks if the driver still has the URL open from its last render, so the PDF can be made without loading it again.
+* parameters:
+    - driver: selenium webdriver
+    - url: the article's URL
+* return: True if the rendered page is still open
+'''
+def is_rendered(driver, url):
+    with rendered_lock:
+        rendered_url = rendered_pages.get(id(driver))
+    if rendered_url != url:
+        return False
+    try:
+        current = driver.current_url
+    except Exception as e:
+        return False
+    # redirects are fine as long as nothing else has been loaded since the render
+    return current not in ("about:blank", "data:,") and not current.startswith("file:")
+
+
+# ==========================================================================================
+#                          FUNCTIONS : SAVED HTML SNAPSHOTS
+# ==========================================================================================
+# removes <script> tags and meta refresh redirects. The <base> tag points the snapshot at the live site, so an external script
+# would otherwise load from it and run once scripts are turned back on.
+def strip_scripts(html_content):
+    return META_REFRESH.sub("", SCRIPT_TAG.sub("", html_content))
+
+
+# adds <base href="url"> so the snapshot's relative links point at the site, the PDF's links still open the article's pages
+def add_base_href(html_content, url):
+    if re.search(r"<base\s[^>]*href", html_content[:20000], re.IGNORECASE):
+        return html_content
+    base_tag = '<base href="' + url.replace('"', "%22") + '">'
+    head = re.search(r"<head[^>]*>", html_content, re.IGNORECASE)
+    if head:
+        return html_content[:head.end()] + base_tag + html_content[head.end():]
+    return base_tag + html_content
+
+
+# blocks every http(s) request of the driver, requests already made by the page are cancelled
+def block_network(driver):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    with rendered_lock:
+        blocked_drivers.add(id(driver))
+
+
+'''
+* function_identifier: release_snapshot
+* summary: turns the driver's network back on once the snapshot's PDF is made, so the driver can load pages live again.
+    Does nothing if the driver isn't showing a snapshot.
+* parameters:
+    - driver: selenium webdriver
+* return: None
+'''
+def release_snapshot(driver):
+    with rendered_lock:
+        if id(driver) not in blocked_drivers:
+            return
+        blocked_drivers.discard(id(driver))
+    try:
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+        driver.execute_cdp_cmd("Network.disable", {})
+    except Exception as e:
+        print("Unable to unblock the browser's network:", e)
+
+
+'''
+* function_identifier: load_snapshot
+* summary: shows a saved HTML file in the browser without loading the article from the site. The HTML's scripts are removed and it is
+    set as the document of a blank page with DevTools, so consent popups and redirects don't run. The network stays blocked until
+    release_snapshot() is called, so nothing is requested from the site. If the site has a cookie button, the banner it sits in is
+    removed too, since there is no script left to close it.
+* parameters:
+    - driver: selenium webdriver (chrome)
+    - html_path: the article's saved HTML
+    - url: the article's URL, used as the snapshot's base URL for its links
+    - cookie_xpath: optional xpath for the site's cookie consent button
+* return: True if the snapshot is showing, False if it could not be loaded (the article is then loaded live)
+'''
+def load_snapshot(driver, html_path, url, cookie_xpath=None):
+    if not SNAPSHOT_PDFS or not html_path or not hasattr(driver, "execute_cdp_cmd"):
+        return False
+    try:
+        with open(html_path, "r", encoding="utf-8") as f:
+            html_content = add_base_href(strip_scripts(f.read()), url)
+    except Exception as e:
+        return False
+
+    forget_rendered(driver)
+    try:
+        block_network(driver)
+        driver.execute_cdp_cmd("Emulation.setScriptExecutionDisabled", {"value": True})
+        try:
+            driver.get("about:blank")
+            frame_id = driver.execute_cdp_cmd("Page.getFrameTree", {})["frameTree"]["frame"]["id"]
+            driver.execute_cdp_cmd("Page.setDocumentContent", {"frameId": frame_id, "html": html_content})
+        finally:
+            driver.execute_cdp_cmd("Emulation.setScriptExecutionDisabled", {"value": False})
+    except Exception as e:
+        print("Unable to load saved HTML for", url, "loading it live.")
+        release_snapshot(driver)
+        return False
+
+    # waiting for the cached styles and images, the PDF is still made if some of them don't load in time
+    try:
+        WebDriverWait(driver, SNAPSHOT_TIMEOUT, poll_frequency=0.2).until(lambda d: d.execute_script("return document.readyState") == "complete")
+    except Exception as e:
+        pass
+
+    if cookie_xpath:
+        try:
+            driver.execute_script(REMOVE_BANNER_JS, cookie_xpath)
+        except Exception as e:
+            pass
+    return True
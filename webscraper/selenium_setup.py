@@ -1,9 +1,23 @@
-# This python file contains the code for setting up the selenium driver. 
+# This python file contains the code for setting up the selenium driver and the pool of drivers shared across sites. 
 
+import os
+import re
+import sys
+import json
+import queue
+import threading
+import subprocess
+from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
+from http_session import USER_AGENT
+
+WINDOW_SIZE = (1920, 1200) # desktop window size so that site pages open in desktop mode
+DRIVER_MANIFEST = os.path.join("saved_sites", "chromedriver_manifest.json") # cached chromedriver path + chrome version
+driver_path = None # chromedriver path resolved by resolve_driver_path(), only resolved once per run
+driver_path_lock = threading.Lock()
 
 # ==========================================================================================
 #                          FUNCTIONS : SELENIUM DRIVER SETUP 
@@ -18,16 +32,17 @@ def setup_driver():
     try:
         options = Options()
         options.add_argument("--headless=new") 
-        options.add_argument("--window-size=1920,1200") # set window size so that site pages open in desktop mode
+        options.add_argument("--window-size=" + str(WINDOW_SIZE[0]) + "," + str(WINDOW_SIZE[1])) # set window size so that site pages open in desktop mode
         options.add_argument("--log-level=3")  # hiding logs that are not level 3. info=0, warning=1, log_error=2, log_fatal=3
-        options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64)" # setting a user agent so that sites won't flag me as a bot
-                    "AppleWebKit/537.36 (KHTML, like Gecko)"
-                    "Chrome/118.0.5993.117 Safari/537.36")
+        options.add_argument("user-agent=" + USER_AGENT) # setting a user agent so that sites won't flag me as a bot, same one used by http_session
 
         # Trying to initialize a chrome driver that will automatically use the correct driver version
-        print("Installing ChromeDriver...")
         try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+            path = resolve_driver_path()
+            if path is None:
+                print("Failed to initialize Chrome driver...")
+                return None
+            driver = webdriver.Chrome(service=Service(path), options=options)
         except Exception as e:
             print("Failed to initialize Chrome driver...")
             return None
@@ -38,3 +53,253 @@ def setup_driver():
     except Exception as e:
         print("An unexpected error occured during driver setup.")
         return None
+
+
+# ==========================================================================================
+#                          FUNCTIONS : CHROMEDRIVER RESOLUTION CACHE
+# ==========================================================================================
+'''
+* function_identifier: get_chrome_version
+* summary: reads the installed Chrome version locally (registry on Windows, '--version' elsewhere). No network needed.
+* return: version string (ex. '118.0.5993.117'), or None if Chrome's version could not be read.
+'''
+def get_chrome_version():
+    # windows keeps the installed version in the registry
+    if sys.platform.startswith("win"):
+        try:
+            import winreg
+            for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(hive, r"Software\Google\Chrome\BLBeacon") as key:
+                        return winreg.QueryValueEx(key, "version")[0]
+                except OSError:
+                    continue
+        except Exception as e:
+            pass
+        return None
+
+    if sys.platform == "darwin":
+        candidates = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    else:
+        candidates = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+
+    for binary in candidates:
+        try:
+            output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except Exception as e:
+            continue
+        match = re.search(r"\d+(\.\d+)+", output)
+        if match:
+            return match.group(0)
+    return None
+
+
+'''
+* function_identifier: load_driver_manifest
+* summary: loads the cached chromedriver resolution (driver path + the chrome version it was resolved for).
+* return: manifest dictionary, empty if the manifest does not exist or can't be read.
+'''
+def load_driver_manifest(manifest_path=DRIVER_MANIFEST):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        return {}
+
+
+'''
+* function_identifier: save_driver_manifest
+* summary: stores the resolved chromedriver path and chrome version, written to a temp file first so a crash can't leave half a manifest.
+'''
+def save_driver_manifest(path, chrome_version, manifest_path=DRIVER_MANIFEST):
+    try:
+        folder = os.path.dirname(manifest_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        manifest = {"driver_path": path, "chrome_version": chrome_version, "resolved_at": datetime.now().isoformat(timespec="seconds")}
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, manifest_path)
+    except Exception as e:
+        print("Unable to save chromedriver manifest.")
+
+
+'''
+* function_identifier: resolve_driver_path
+* summary: returns the chromedriver path, using the manifest when the cached driver still exists and chrome's version has not changed.
+    Only calls ChromeDriverManager().install() (version lookups, downloads) when chrome was updated or nothing is cached.
+    If resolving fails (ex. no network), the cached driver is used anyway as a last resort.
+* return: path to chromedriver, or None if no driver could be resolved.
+'''
+def resolve_driver_path(manifest_path=DRIVER_MANIFEST):
+    with driver_path_lock:
+        return resolve_driver_path_locked(manifest_path)
+
+
+def resolve_driver_path_locked(manifest_path):
+    global driver_path
+    if driver_path is not None:
+        return driver_path
+
+    chrome_version = get_chrome_version()
+    manifest = load_driver_manifest(manifest_path)
+    cached_path = manifest.get("driver_path")
+    cached_exists = bool(cached_path) and os.path.exists(cached_path)
+
+    # reusing the cached driver when chrome was not updated (or its version can't be read locally)
+    if cached_exists and (chrome_version is None or manifest.get("chrome_version") == chrome_version):
+        driver_path = cached_path
+        return driver_path
+
+    try:
+        print("Installing ChromeDriver...")
+        driver_path = ChromeDriverManager().install()
+        save_driver_manifest(driver_path, chrome_version, manifest_path)
+    except Exception as e:
+        if cached_exists:
+            print("Unable to resolve ChromeDriver, using cached driver:", cached_path)
+            driver_path = cached_path
+        else:
+            print("Unable to resolve ChromeDriver.")
+            return None
+    return driver_path
+
+
+# ==========================================================================================
+#                          CLASS : SELENIUM DRIVER POOL
+# ==========================================================================================
+'''
+* class_identifier: DriverPool
+* summary: launches N headless chrome drivers once per run and hands them out to the site workers, so chrome's cold start is paid
+    once per run instead of once per sponsor. Drivers are reset (cookies, storage, window size) when they are handed back, and
+    any driver that crashed or can't be reset is quit and replaced with a fresh one.
+* parameters:
+    - size: number of chrome instances to launch (default: 1)
+'''
+class DriverPool:
+    def __init__(self, size=1):
+        self.size = max(1, int(size))
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.acquire_lock = threading.Lock() # makes acquire_many() take all of its drivers at once so workers can't deadlock holding one each
+        self.all_drivers = []
+        print("Starting", self.size, "Selenium driver(s)...")
+        for _ in range(self.size):
+            self.idle.put(self.launch())
+
+    # starts a new driver and keeps track of it so close() can quit it. Can return None if chrome failed to start.
+    def launch(self):
+        driver = setup_driver()
+        if driver is not None:
+            with self.lock:
+                self.all_drivers.append(driver)
+        return driver
+
+    # quits a driver and stops tracking it
+    def discard(self, driver):
+        if driver is None:
+            return
+        with self.lock:
+            if driver in self.all_drivers:
+                self.all_drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            pass
+
+    # replaces a crashed or unusable driver with a fresh one
+    def recycle(self, driver):
+        print("Recycling Selenium driver...")
+        self.discard(driver)
+        return self.launch()
+
+    '''
+    * function_identifier: acquire
+    * summary: takes an idle driver out of the pool, waiting until one is free. Dead drivers are recycled before being handed out.
+    * return: a working chrome driver, or None if chrome could not be started.
+    '''
+    def acquire(self):
+        driver = self.idle.get()
+        if driver is None or not is_driver_alive(driver):
+            driver = self.recycle(driver)
+        return driver
+
+    '''
+    * function_identifier: acquire_many
+    * summary: takes several idle drivers out of the pool at once (ex. one for pagination and one for page rendering).
+    * parameters:
+        - count: number of drivers needed, capped at the pool size
+    * return: list of drivers (a driver can be None if chrome could not be started)
+    '''
+    def acquire_many(self, count):
+        count = min(max(1, int(count)), self.size)
+        with self.acquire_lock:
+            return [self.acquire() for _ in range(count)]
+
+    '''
+    * function_identifier: release
+    * summary: resets a driver and puts it back in the pool for the next site. A driver that crashed or fails to reset is recycled.
+    * parameters:
+        - driver: the driver returned by acquire()
+        - crashed: True if the caller knows the driver is broken
+    '''
+    def release(self, driver, crashed=False):
+        if driver is None or crashed or not reset_driver(driver):
+            driver = self.recycle(driver)
+        self.idle.put(driver)
+
+    # quits every driver the pool started, called once at the end of a run
+    def close(self):
+        with self.lock:
+            drivers = list(self.all_drivers)
+            self.all_drivers.clear()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                pass
+
+
+'''
+* function_identifier: is_driver_alive
+* summary: checks that a driver's chrome instance still responds.
+* parameters:
+    - driver: selenium webdriver
+* return: True if the driver responded, otherwise False.
+'''
+def is_driver_alive(driver):
+    try:
+        driver.execute_script("return 1;")
+        return True
+    except Exception as e:
+        return False
+
+
+'''
+* function_identifier: reset_driver
+* summary: clears everything one site could leave behind for the next one, for every origin the driver visited: cookies, storage
+    (local storage, IndexedDB, service workers, ...), cache, and the window size (add_pdf_detail resizes the window to the full page height).
+    Session storage belongs to the tab, so the driver moves to a new tab and the old one is closed. Leaves the driver on about:blank.
+* parameters:
+    - driver: selenium webdriver
+* return: True if the reset worked, False if the driver should be recycled.
+'''
+def reset_driver(driver):
+    try:
+        # storage of every origin, window.localStorage.clear() would only clear the origin the driver is currently on
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": "*", "storageTypes": "all"})
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {}) # cookies for every domain, delete_all_cookies() only clears the current one
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        # a new tab starts with empty session storage for every origin
+        old_tab = driver.current_window_handle
+        driver.switch_to.new_window("tab")
+        new_tab = driver.current_window_handle
+        driver.switch_to.window(old_tab)
+        driver.close()
+        driver.switch_to.window(new_tab)
+        driver.get("about:blank")
+        driver.set_window_size(*WINDOW_SIZE)
+        return True
+    except Exception as e:
+        return False
@@ -0,0 +1,11 @@
+# This python file sets up the tests. The webscraper modules import each other by file name (ex. 'from utils import ...'),
+# so the webscraper folder is put on the import path the same way running 'python main.py' from it does.
+
+import os
+import sys
+
+WEBSCRAPER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+if WEBSCRAPER_DIR not in sys.path:
+    sys.path.insert(0, WEBSCRAPER_DIR)
@@ -0,0 +1,81 @@
+# This python file checks the keyword matching in keywords.py. KeywordMatcher has to count every relevance term the same way a plain
+# term by term search does, with pyahocorasick and with the python automaton it falls back on when pyahocorasick isn't installed.
+
+import pytest
+import keywords
+from keywords import KeywordMatcher, StreamingKeywordDetector, RELEVANCE_TERMS, WHOLE_WORD_TERMS
+
+TEXTS = [
+    "Alzheimer's disease (AD) trial: lecanemab slowed cognitive decline vs placebo in a Phase 3 randomized clinical trial.",
+    "Amyloid plaque and tau tangles. The restaurant's PET scan of p-tau, CSF and APOE4 / ApoE carriers with MCI.",
+    "Phase iii results follow phase ii and phase i. FDA-approved donepezil, memantine; neurodegenerative, neurodegeneration.",
+    "no terms in here, just a pet-friendly adventure about fdas and madness",
+    "alzheimalzheimer dementiadementia aaa",
+    "",
+]
+
+BACKENDS = ["python"] + (["pyahocorasick"] if keywords.HAS_AHOCORASICK else [])
+
+
+# counts each term with str.find, one full scan per term, overlapping hits included
+def naive_count(text, terms, whole_words):
+    text = text.lower()
+    counts = {}
+    for term in dict.fromkeys(term.lower() for term in list(terms) + list(whole_words)):
+        start = text.find(term)
+        while start != -1:
+            end = start + len(term)
+            is_word = (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+            if term not in whole_words or is_word:
+                counts[term] = counts.get(term, 0) + 1
+            start = text.find(term, start + 1)
+    return counts
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(keywords, "HAS_AHOCORASICK", request.param == "pyahocorasick")
+    return request.param
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_relevance_counts_match_naive_count(backend, text):
+    matcher = KeywordMatcher(RELEVANCE_TERMS, WHOLE_WORD_TERMS)
+    assert matcher.count(text) == naive_count(text, RELEVANCE_TERMS, WHOLE_WORD_TERMS)
+
+
+def test_overlapping_and_nested_terms(backend):
+    terms = ["he", "she", "his", "hers", "s"]
+    text = "ushers said she sells his shells"
+    assert KeywordMatcher(terms).count(text) == naive_count(text, terms, ())
+
+
+def test_offsets_are_term_starts(backend):
+    matcher = KeywordMatcher(["amyloid"], ["tau"])
+    assert matcher.offsets("Tau and amyloid, not restaurant tau.") == {"tau": [0, 32], "amyloid": [8]}
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_contains_matches_naive_search(backend, text):
+    matcher = KeywordMatcher(RELEVANCE_TERMS, WHOLE_WORD_TERMS)
+    assert matcher.contains(text) == bool(naive_count(text, RELEVANCE_TERMS, WHOLE_WORD_TERMS))
+    assert KeywordMatcher(["pet"], ["pet"]).contains(text) == ("pet" in naive_count(text, [], ["pet"]))
+
+
+def test_streaming_detector_finds_keyword_split_across_chunks(backend):
+    detector = StreamingKeywordDetector(["alzheim"])
+    assert not detector.feed("news about alz")
+    assert detector.feed("HEIMER's disease")
+
+
+def test_streaming_detector_uses_shared_keywords():
+    detector = StreamingKeywordDetector()
+    assert detector.matcher is keywords.keyword_matcher
+    assert detector.feed("<p>Alzheimer's disease</p>")
+
+
+def test_streaming_detector_without_keyword(backend):
+    detector = StreamingKeywordDetector(["alzheim"])
+    for chunk in ["quarterly alz", "eimer results", " and alzhe", "m results"]:
+        detector.feed(chunk)
+    assert not detector.matched
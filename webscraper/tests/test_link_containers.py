@@ -0,0 +1,53 @@
+# This python file checks that get_container_anchors() (link_collectors.py) finds the same links as the old get_bs_container() path it
+# replaced (find_all() on every container it returns, then dedupe), on a saved listing page for each site with an article_container
+# (tests/fixtures/listings/<site name>.html).
+
+import os
+import pytest
+from conftest import FIXTURES_DIR
+from main import get_site_details
+from html_parser import make_soup
+from link_collectors import get_bs_container, get_container_anchors, is_article_href
+
+LISTINGS_DIR = os.path.join(FIXTURES_DIR, "listings")
+SITES = {site_name: site_info for site_name, site_info in get_site_details().items() if site_info.get("article_container")}
+
+
+def load_listing(site_name):
+    with open(os.path.join(LISTINGS_DIR, site_name + ".html"), "r", encoding="utf-8") as f:
+        return make_soup(f.read())
+
+
+# what get_links_bs() returned before get_container_anchors(), without its article filter
+def old_hrefs(soup, container):
+    hrefs = []
+    for c in get_bs_container(soup, container):
+        for a in c.find_all("a", href=True):
+            hrefs.append(a["href"])
+    return list(dict.fromkeys(hrefs))
+
+
+def new_hrefs(soup, container):
+    return list(dict.fromkeys(a["href"] for a in get_container_anchors(soup, container)))
+
+
+def test_every_container_site_has_a_listing():
+    missing = [site_name for site_name in SITES if not os.path.exists(os.path.join(LISTINGS_DIR, site_name + ".html"))]
+    assert not missing
+
+
+@pytest.mark.parametrize("site_name", sorted(SITES))
+def test_container_anchors_match_old_containers(site_name):
+    soup = load_listing(site_name)
+    container = SITES[site_name]["article_container"]
+    old = old_hrefs(soup, container)
+    new = new_hrefs(soup, container)
+    assert new == old
+    # the listing has article links, so a match can't come from both paths finding nothing
+    assert [href for href in new if is_article_href(href)]
+
+
+@pytest.mark.parametrize("site_name", sorted(SITES))
+def test_whole_page_without_container(site_name):
+    soup = load_listing(site_name)
+    assert new_hrefs(soup, None) == old_hrefs(soup, None)
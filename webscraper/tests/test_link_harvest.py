@@ -0,0 +1,48 @@
+# This python file checks that HARVEST_LINKS_JS (harvest_links_js() in link_collectors.py) pulls the same hrefs, in the same order, as the
+# element by element path it replaced (get_sel_container() + find_elements() + get_attribute("href")), on the saved listing pages in
+# tests/fixtures/listings. It needs headless chrome, the tests are skipped if chrome or its driver can't be started.
+
+import os
+import pytest
+from conftest import FIXTURES_DIR
+from main import get_site_details
+from selenium.webdriver.common.by import By
+from link_collectors import get_sel_container, harvest_links_js
+
+LISTINGS_DIR = os.path.join(FIXTURES_DIR, "listings")
+SITES = {site_name: site_info for site_name, site_info in get_site_details().items() if site_info.get("article_container")}
+
+
+@pytest.fixture(scope="module")
+def driver():
+    from selenium_setup import get_chrome_version, setup_driver
+    if get_chrome_version() is None:
+        pytest.skip("chrome is not installed")
+    driver = setup_driver()
+    if driver is None:
+        pytest.skip("chrome driver could not be started")
+    yield driver
+    driver.quit()
+
+
+# what get_links_sel() collected before HARVEST_LINKS_JS, before its article filter
+def old_hrefs(driver, container):
+    hrefs = []
+    for c in get_sel_container(driver, container):
+        for element in c.find_elements(By.TAG_NAME, "a"):
+            hrefs.append(element.get_attribute("href"))
+    return list(dict.fromkeys(href for href in hrefs if href))
+
+
+def new_hrefs(driver, container):
+    return list(dict.fromkeys(harvest_links_js(driver, container)))
+
+
+@pytest.mark.parametrize("site_name", sorted(SITES))
+def test_harvest_matches_element_search(driver, site_name):
+    driver.get("file://" + os.path.join(LISTINGS_DIR, site_name + ".html"))
+    container = SITES[site_name]["article_container"]
+    old = old_hrefs(driver, container)
+    assert old
+    assert new_hrefs(driver, container) == old
+    assert new_hrefs(driver, None) == old_hrefs(driver, None)
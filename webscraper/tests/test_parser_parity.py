@@ -0,0 +1,80 @@
+# This python file checks that every site's detail getter pulls the same fields under every HTML parser backend (html_parser.py),
+# on a saved article fixture for each site in get_site_details() (tests/fixtures/<site name>.html), and that the keyword filter's text
+# (parse_for_text(), lexbor for selectolax) gives the same keyword result and relevance hits as BeautifulSoup.
+
+import os
+import shutil
+import pytest
+from conftest import FIXTURES_DIR
+from main import get_site_details
+from detail_getters import make_detail_getter
+import html_parser
+from html_parser import BACKENDS, is_available, parity_check, parse_for_text, resolve_soup, set_parser_backend
+from doc_cache import DocumentCache
+from keywords import keyword_hits
+from utils import has_keywords
+
+SITES = {site_name: site_info for site_name, site_info in get_site_details().items() if site_info.get("extract")}
+
+
+def test_every_extracting_site_has_a_fixture():
+    missing = [site_name for site_name in SITES if not os.path.exists(os.path.join(FIXTURES_DIR, site_name + ".html"))]
+    assert not missing
+
+
+# parity_check() only compares the backends that are installed (lxml and selectolax are optional)
+AVAILABLE = [backend for backend in BACKENDS if is_available(backend)]
+
+
+@pytest.mark.skipif(len(AVAILABLE) < 2, reason="needs lxml and/or selectolax installed to compare against html.parser")
+@pytest.mark.parametrize("site_name", sorted(SITES))
+def test_detail_getter_fields_match_across_backends(site_name, tmp_path):
+    html_path = str(tmp_path / (site_name + ".html"))
+    shutil.copy(os.path.join(FIXTURES_DIR, site_name + ".html"), html_path)
+    getter = make_detail_getter(site_name, SITES[site_name])
+
+    assert parity_check(getter, [html_path]) == []
+
+    # the fixture has every field the site extracts, so a match can't come from every backend finding nothing
+    details = getter(None, html_path, "", make_pdf=False)
+    for field in ("TITLE", "BODY"):
+        assert details[field] not in ("", "N/A")
+
+
+@pytest.mark.skipif(len(AVAILABLE) < 2, reason="needs lxml and/or selectolax installed to compare against html.parser")
+@pytest.mark.parametrize("site_name", sorted(SITES))
+def test_filter_text_matches_across_backends(site_name):
+    with open(os.path.join(FIXTURES_DIR, site_name + ".html"), "r", encoding="utf-8") as f:
+        html_content = f.read()
+    previous = html_parser.parser_backend
+    results = {}
+    try:
+        for backend in AVAILABLE:
+            set_parser_backend(backend)
+            page_text, soup = parse_for_text(html_content)
+            results[backend] = (has_keywords(page_text), keyword_hits(page_text), resolve_soup(soup).title.get_text())
+    finally:
+        set_parser_backend(previous)
+    assert results["html.parser"][0]
+    for backend in AVAILABLE:
+        assert results[backend] == results["html.parser"], backend
+
+
+@pytest.mark.skipif(not is_available("selectolax"), reason="needs selectolax installed")
+def test_selectolax_tree_is_built_once_when_read(tmp_path):
+    html_path = tmp_path / "1.html"
+    html_content = "<html><head><title>Alzheimer's news</title></head><body><p>Alzheimer's trial</p></body></html>"
+    html_path.write_text(html_content, encoding="utf-8")
+    previous = html_parser.parser_backend
+    try:
+        set_parser_backend("selectolax")
+        page_text, soup = parse_for_text(html_content)
+    finally:
+        set_parser_backend(previous)
+    assert soup.soup is None # nothing is built until the detail getter reads it
+
+    cache = DocumentCache()
+    cache.put(str(html_path), soup, len(html_content))
+    tree = cache.get(str(html_path))
+    assert tree.title.get_text() == "Alzheimer's news"
+    assert cache.get(str(html_path)) is tree
@@ -0,0 +1,148 @@
+# This python file checks the screenshot PDFs written by ImagePdfWriter (pdf_encoder.py). The PDFs are read back with a small reader
+# below (cross reference table, page tree, image streams), since the scraper doesn't depend on a PDF library.
+
+import io
+import re
+import zlib
+import random
+import struct
+from PIL import Image
+from pdf_encoder import ImagePdfWriter, PdfEncoder
+
+
+# reads every object of a PDF through its xref table, returns {object id: (dictionary text, stream bytes or None)}
+def read_pdf(pdf_path):
+    with open(pdf_path, "rb") as f:
+        data = f.read()
+    assert data.startswith(b"%PDF-1.4\n")
+    assert data.rstrip().endswith(b"%%EOF")
+    xref_position = int(re.search(rb"startxref\n(\d+)\n%%EOF", data).group(1))
+    assert data[xref_position:xref_position + 5] == b"xref\n"
+
+    lines = data[xref_position:].split(b"\n")
+    first, count = map(int, lines[1].split())
+    assert (first, lines[2]) == (0, b"0000000000 65535 f ")
+    objects = {}
+    for obj_id in range(1, count):
+        offset = int(lines[2 + obj_id].split()[0])
+        header = b"%d 0 obj\n" % obj_id
+        assert data[offset:offset + len(header)] == header, "xref offset of object %d is wrong" % obj_id
+        start = offset + len(header)
+        end = data.index(b"\nendobj\n", start)
+        body = data[start:end]
+        stream = None
+        if b"\nstream\n" in body:
+            body, stream = body.split(b"\nstream\n", 1)
+            length = int(re.search(rb"/Length (\d+)", body).group(1))
+            assert stream[length:] == b"\nendstream"
+            stream = stream[:length]
+        objects[obj_id] = (body.decode("latin-1"), stream)
+    assert re.search(rb"trailer\n<< /Size %d /Root 1 0 R >>" % count, data)
+    return objects
+
+
+# [(page dictionary, image dictionary, image stream)] in page order
+def read_pages(pdf_path):
+    objects = read_pdf(pdf_path)
+    assert "/Type /Catalog /Pages 2 0 R" in objects[1][0]
+    page_tree = objects[2][0]
+    kids = [int(obj_id) for obj_id in re.findall(r"(\d+) 0 R", re.search(r"/Kids \[([^\]]*)\]", page_tree).group(1))]
+    assert int(re.search(r"/Count (\d+)", page_tree).group(1)) == len(kids)
+    pages = []
+    for page_id in kids:
+        page = objects[page_id][0]
+        assert "/Type /Page " in page and "/Parent 2 0 R" in page
+        image_id = int(re.search(r"/Im0 (\d+) 0 R", page).group(1))
+        image, stream = objects[image_id]
+        assert "/Subtype /Image" in image
+        pages.append((page, image, stream))
+    return pages
+
+
+# decodes a page's image stream. FlateDecode streams are PNG IDAT data, so they are wrapped back into a PNG.
+def decode_image(image_dict, stream):
+    if "/DCTDecode" in image_dict:
+        return Image.open(io.BytesIO(stream))
+    width = int(re.search(r"/Width (\d+)", image_dict).group(1))
+    height = int(re.search(r"/Height (\d+)", image_dict).group(1))
+    color_type = 2 if "/DeviceRGB" in image_dict else 0
+
+    def chunk(chunk_type, body):
+        return struct.pack(">I", len(body)) + chunk_type + body + struct.pack(">I", zlib.crc32(chunk_type + body) & 0xffffffff)
+    png = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)) + chunk(b"IDAT", stream) + chunk(b"IEND", b"")
+    return Image.open(io.BytesIO(png))
+
+
+def screenshot(width, height, seed):
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    pixels = image.load()
+    for y in range(0, height, 7):
+        for x in range(width):
+            pixels[x, y] = ((x * seed) % 256, (y * 3) % 256, (x + y + seed) % 256)
+    return image
+
+
+def test_jpeg_pdf_has_one_page_per_image(tmp_path):
+    pdf_path = str(tmp_path / "tiles.pdf")
+    sizes = [(400, 300), (400, 300), (400, 120)]
+    writer = ImagePdfWriter(pdf_path, PdfEncoder("jpeg", quality=75, dpi=None, max_bytes=0), source_dpi=100)
+    for seed, (width, height) in enumerate(sizes):
+        writer.add_page(screenshot(width, height, seed + 1))
+    size = writer.close()
+    assert size == (tmp_path / "tiles.pdf").stat().st_size
+
+    pages = read_pages(pdf_path)
+    assert len(pages) == len(sizes)
+    for (page, image_dict, stream), (width, height) in zip(pages, sizes):
+        image = decode_image(image_dict, stream)
+        image.load()
+        assert image.size == (width, height)
+        # the page keeps the screenshot's printed size, 100 dpi pixels in 72 dpi points
+        assert "/MediaBox [0 0 %.2f %.2f]" % (width * 0.72, height * 0.72) in page
+
+
+def test_flate_pdf_is_lossless(tmp_path):
+    pdf_path = str(tmp_path / "flate.pdf")
+    source = screenshot(257, 64, 5)
+    writer = ImagePdfWriter(pdf_path, PdfEncoder("flate", dpi=None, max_bytes=0), source_dpi=100)
+    writer.add_page(source)
+    writer.close()
+
+    pages = read_pages(pdf_path)
+    assert len(pages) == 1
+    page, image_dict, stream = pages[0]
+    assert "/Predictor 15 /Colors 3 /BitsPerComponent 8 /Columns 257" in image_dict
+    assert decode_image(image_dict, stream).convert("RGB").tobytes() == source.tobytes()
+
+
+def test_downsampled_page_keeps_printed_size(tmp_path):
+    pdf_path = str(tmp_path / "small.pdf")
+    writer = ImagePdfWriter(pdf_path, PdfEncoder("jpeg", dpi=50, max_bytes=0), source_dpi=100)
+    writer.add_page(screenshot(400, 200, 3))
+    writer.close()
+
+    page, image_dict, stream = read_pages(pdf_path)[0]
+    assert decode_image(image_dict, stream).size == (200, 100)
+    assert "/MediaBox [0 0 288.00 144.00]" in page
+
+
+def test_budget_lowers_quality_until_it_fits(tmp_path):
+    pdf_path = str(tmp_path / "budget.pdf")
+    rng = random.Random(7)
+    source = Image.frombytes("RGB", (300, 200), bytes(rng.randrange(256) for _ in range(300 * 200 * 3))) # noise doesn't compress
+    budget = len(PdfEncoder("jpeg", quality=75, dpi=None).encode(source, 100)[0]["data"]) // 2
+    writer = ImagePdfWriter(pdf_path, PdfEncoder("flate", dpi=None, max_bytes=budget), source_dpi=100)
+    image_bytes = writer.add_page(source, budget)
+    writer.close()
+
+    assert image_bytes <= budget
+    assert writer.within_budget
+    page, image_dict, stream = read_pages(pdf_path)[0]
+    assert "/DCTDecode" in image_dict # flate didn't fit, so it switched to JPEG
+    decode_image(image_dict, stream).load()
+
+
+def test_empty_pdf_is_still_valid(tmp_path):
+    pdf_path = str(tmp_path / "empty.pdf")
+    ImagePdfWriter(pdf_path, PdfEncoder()).close()
+    assert read_pages(pdf_path) == []
@@ -0,0 +1,68 @@
+# This python file checks the token buckets in rate_limiter.py. The clock is replaced with a fake one, so the refill timing is checked
+# exactly and the tests don't sleep.
+
+import pytest
+import rate_limiter
+from rate_limiter import TokenBucket, RateLimiter
+
+
+# stands in for the time module, sleep() moves the clock forward instead of waiting
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_burst_is_free_then_requests_wait(clock):
+    bucket = TokenBucket(rate=2, burst=4)
+    assert [bucket.reserve() for _ in range(4)] == [0.0] * 4
+    # the bucket is empty, each request reserves the next token half a second after the one before
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.5, 1.0, 1.5])
+
+
+def test_tokens_refill_at_rate(clock):
+    bucket = TokenBucket(rate=2, burst=4)
+    for _ in range(4):
+        bucket.reserve()
+    clock.now += 1.0 # two tokens back
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_refill_stops_at_burst(clock):
+    bucket = TokenBucket(rate=2, burst=4)
+    bucket.reserve()
+    clock.now += 60 # idle long enough for 120 tokens, only 4 are kept
+    assert [bucket.reserve() for _ in range(4)] == [0.0] * 4
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_limiter_waits_per_domain(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire("https://a.com/1") == 0.0
+    assert limiter.acquire("https://b.com/1") == 0.0 # other domains have their own bucket
+    assert limiter.acquire("https://a.com/2") == pytest.approx(1.0)
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_configure_replaces_bucket(clock):
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.configure("https://a.com/", rate=10, burst=2)
+    assert limiter.acquire("https://a.com/1") == 0.0
+    assert limiter.acquire("https://a.com/2") == 0.0
+    assert limiter.acquire("https://a.com/3") == pytest.approx(0.1)
@@ -2,55 +2,31 @@
 
 import os
 import csv
+import atexit
 import time
 import re
+import codecs
+import threading
 from datetime import datetime
-from PIL import Image
-import requests
-from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from http_session import fetch
+from rate_limiter import wait_for_token
+from pdf_engine import save_page_pdf
+from render_session import is_rendered, load_snapshot, mark_rendered, release_snapshot
+from keywords import StreamingKeywordDetector, keyword_matcher
+
+STREAM_CHUNK_SIZE = 16 * 1024 # bytes read at a time when a page is streamed
+MAX_PAGE_BYTES = 10 * 1024 * 1024 # pages bigger than this are not articles, the download is stopped
 
 # ==========================================================================================
-#            FUNCTIONS : LOGGING CHECKED LINKS AND LOADING THE FILE
+#            FUNCTIONS : LOADING THE CHECKED LINKS FILE
 # ==========================================================================================
-'''
-* function_identifier: log_checked_link
-* summary: logs each link that's HTML version has been scanned for keyword(s) into checked_links.csv, preventing duplicate links.
-* parameters: 
-    - link: the URL that was scanned for Alzheimer related keywords.
-    - base_folder: folder to store CSV (default: saved_sites)
-    - filename: CSV filename that is storing checked links(deffault: checked_links) 
-'''
-def log_checked_link(link, base_folder="saved_sites", filename="checked_links.csv"):
-    # making sure file exists
-    filepath = os.path.join(base_folder, filename)
-    try: 
-        loggedlinks_dir = os.path.dirname(filepath)
-        if loggedlinks_dir != "":
-            os.makedirs(loggedlinks_dir, exist_ok=True)
-    except Exception as e:
-        print("Failed to create directory for checked_links.csv")
-        return
-        
-    # load existing links to avoid duplicates
-    existing_links = load_checked_links(base_folder, filename)
-
-    # append new link if it is not a duplicate
-    if link not in existing_links:
-        try:
-            with open(filepath, "a", newline="", encoding="utf-8") as f:
-               writer = csv.writer(f)
-               writer.writerow([link])
-        except Exception as e:
-            print("Failed to write checked_links.csv")
-
-
 '''
 * function_identifier: load_checked_links
-* summary: loads the csv file that has all previously checked links stored. This is in it's own seperate function because 
-    it is needed for the log_checked_links function and for link comparison to prevent code from repetively checking the same links on a site.
+* summary: loads the csv file that has all previously checked links stored. It is used for link comparison to prevent code from
+    repetively checking the same links on a site.
 * parameters: 
     - base_folder: folderr to store CSV (default: saved_sites)
     - filename: CSV filename that is storing checked links(deffault: checked_links)
@@ -70,9 +46,124 @@ def load_checked_links(base_folder="saved_sites", filename="checked_links.csv"):
     return checked_links
 
 
+# ==========================================================================================
+#            CLASS : IN-MEMORY CHECKED LINK STORE
+# ==========================================================================================
+'''
+* class_identifier: CheckedLinkStore
+* summary: keeps every checked link in memory so membership checks and inserts are O(1), instead of re-reading checked_links.csv
+    for every link. New links are written in batches. With a CrawlState, each flush is one database
+    transaction. Without one, each flush rewrites checked_links.csv to a temp file and swaps it in with os.replace(). Either way a
+    crash mid-write can't leave a half written batch. One store is shared by every site worker.
+* parameters:
+    - base_folder: folder to store CSV (default: saved_sites)
+    - filename: CSV filename that is storing checked links (default: checked_links.csv)
+    - batch_size: number of new links kept in memory before they are flushed
+    - state: optional CrawlState (crawl_state.py). If given, links are loaded from and saved to its seen_urls table instead of the CSV.
+'''
+class CheckedLinkStore:
+    def __init__(self, base_folder="saved_sites", filename="checked_links.csv", batch_size=200, state=None):
+        self.filepath = os.path.join(base_folder, filename)
+        self.batch_size = max(1, int(batch_size))
+        self.state = state
+        self.lock = threading.RLock()
+        loaded = state.load_seen_urls() if state is not None else self.read_file()
+        self.links = dict.fromkeys(loaded) # insertion ordered, so the CSV keeps its order when rewritten
+        self.pending = [] # (link, site) added since the last flush
+        atexit.register(self.flush) # flushing whatever is left if the run crashes or is stopped
+
+    # loading checked_links.csv once
+    def read_file(self):
+        links = []
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "r", newline="", encoding="utf-8") as f:
+                    for row in csv.reader(f):
+                        if row:
+                            links.append(row[0])
+            except Exception as e:
+                print("Failed to read checked_links.csv")
+        return links
+
+    def __contains__(self, link):
+        return link in self.links
+
+    def __len__(self):
+        return len(self.links)
+
+    '''
+    * function_identifier: add
+    * summary: marks a link as checked. Flushes once batch_size new links are waiting.
+    * parameters:
+        - link: the URL that was scanned for Alzheimer related keywords.
+        - site: optional site name the link belongs to (stored in the database)
+    * return: True if the link was new, False if it was already checked.
+    '''
+    def add(self, link, site=None):
+        with self.lock:
+            if link in self.links:
+                return False
+            self.links[link] = None
+            self.pending.append((link, site))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+            return True
+
+    '''
+    * function_identifier: flush
+    * summary: saves the links added since the last flush atomically (one database transaction, or temp file + os.replace for the CSV).
+        Does nothing if no links were added.
+    '''
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            if self.state is not None:
+                try:
+                    self.state.add_seen_urls(self.pending)
+                    self.pending = []
+                except Exception as e:
+                    print("Failed to save checked links to the crawl state database.")
+                return
+            try:
+                folder = os.path.dirname(self.filepath)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                temp_path = self.filepath + ".tmp"
+                with open(temp_path, "w", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    for link in self.links:
+                        writer.writerow([link])
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.filepath)
+                self.pending = []
+            except Exception as e:
+                print("Failed to write checked_links.csv")
+
+
 # ==========================================================================================
 #                          HTML RENAME FUNCTION
 # ==========================================================================================
+'''
+* function_identifier: make_clean_title
+* summary: turns an article title into a file name (no characters that are not allowed in file names, underscores for spaces, max 60 characters).
+* parameters:
+    - article_title: the article's title, "N/A" if it could not be pulled
+* returns: the clean title, based off a timestamp if the article has no title
+'''
+def make_clean_title(article_title):
+    # fallback in case title was unable to be pulled from a get_details function
+    if not article_title or article_title == "N/A":
+        now = datetime.now()
+        time_marker = now.strftime("%m%d_%H%M%S") #MMDD_HHMMSS 
+        article_title = "webpage_"+time_marker
+
+    # removing characters that are not allowed in filenames
+    clean_title = re.sub(r'[\\/*?:"<>|]', "", article_title[:60]).strip()
+    return clean_title.replace(" ", "_")
+
+
 '''
 * function_identifier: rename_html_to_title
 * summary: renames the HTML and HTML path using the ["CLEAN TITLE"] formed in add_pdf_detail, to prevent overwriting HTMLs in the site folder.
@@ -97,57 +188,60 @@ def rename_html_to_title(html_path, clean_title):
 
 
 # ==========================================================================================
-#                          FUNCTIONS : HTML SAVING AND ALZHEIMERS FILTERING
+#                          FUNCTIONS : HTML DOWNLOADING AND ALZHEIMERS FILTERING
 # ==========================================================================================
 '''
-* function_identifier: save_html
-* summary: saves an HTML for a single URL (site_folder/<file_number>.html)
+* function_identifier: fetch_html_stream
+* summary: downloads a URL with requests in chunks and checks each chunk for the keyword(s) as it arrives (StreamingKeywordDetector),
+    so the page is tagged as a match or non-match before it is parsed or saved. Non HTML responses are stopped after the headers,
+    and pages bigger than MAX_PAGE_BYTES are stopped as soon as they pass it. Waits on the site's rate limit.
+    Article pages are not put in the HTTP cache (http_cache.py), every downloaded link is marked checked and never requested again.
 * parameters:
-    - driver: selenium webdriver (used if BS fails)
-    - url: the web page URL to save
-    - site_folder: folder where HTML files will be saved
-    - file_number: number used to create the HTML file name (ex. '1.html')
-    - cookie_button: optional path to cookies accept button
-    - url_map: optional dictionary to map file_number to URL for reference
-    - html_sel_save: boolean that is True if BS needs to be skipped.
-* returns: file path of saved html, or None if failed.
+    - url: the web page URL to download
+* returns: (html_content, matched), ("", False) if the response is not an HTML page, or None if the request failed.
 '''
-def save_html(driver, url, site_folder, file_number, cookie_button=None, url_map=None, html_sel_save=None):
-    # creating folder if it does not already exist
-    if not os.path.exists(site_folder):
-        os.makedirs(site_folder)
-
-    # defining the HTML file path
-    html_filename = str(file_number) + ".html"
-    html_path = os.path.join(site_folder, html_filename)
-
-    # tells code whether to use BS or Sel
-    use_requests = not bool(html_sel_save)
-
-    if use_requests:    
-        # try using BeautifulSoup to create HTML
-        try: 
-            r = requests.get(url, timeout=10)
-            time.sleep(2)
-            soup = BeautifulSoup(r.text, "html.parser")
-            html_content = soup.prettify()
-
-            # save HTML
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(html_content)
-            
-            # updating url_map so that url can stay associated with .html
-            if url_map is not None:
-                url_map[file_number] = url
-
-            return html_path
-        except Exception as e:
-            pass
+def fetch_html_stream(url):
+    try:
+        wait_for_token(url) # waits only if the site's rate limit has been reached
+        with fetch(url, timeout=10, stream=True) as r:
+            r.raise_for_status() # error pages (403 forbidden, etc.) count as failures so selenium can be tried
+            content_type = r.headers.get("Content-Type", "").lower()
+            if content_type and "html" not in content_type:
+                return "", False # PDFs, images, etc. are never read
+
+            decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+            detector = StreamingKeywordDetector()
+            chunks = []
+            size = 0
+            for raw in r.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                size += len(raw)
+                if size > MAX_PAGE_BYTES:
+                    print("Page is too large, skipping:", url)
+                    return "", False
+                chunk = decoder.decode(raw)
+                detector.feed(chunk)
+                chunks.append(chunk)
+            chunk = decoder.decode(b"", final=True)
+            detector.feed(chunk)
+            chunks.append(chunk)
+            return "".join(chunks), detector.matched
+    except Exception as e:
+        return None
 
-    # fallback on selenium if bs fails
+
+'''
+* function_identifier: render_html_sel
+* summary: loads a single URL with selenium, accepts cookies, scrolls the page so JS heavy sites load all elements, and returns the rendered DOM without saving it.
+* parameters:
+    - driver: selenium webdriver
+    - url: the web page URL to render
+    - cookie_button: optional path to cookies accept button
+* returns: the rendered HTML string, or None if the page did not load.
+'''
+def render_html_sel(driver, url, cookie_button=None):
     try:
+        wait_for_token(url)
         driver.get(url)
-        time.sleep(2)
 
         if cookie_button:
             try:
@@ -160,8 +254,8 @@ def save_html(driver, url, site_folder, file_number, cookie_button=None, url_map
             WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
             time.sleep(2)
         except Exception as e:
-            return None
             print("Body element not detected for", url)
+            return None
         
         # scrolling page because some JS heavy sites require scrolling to load all elements
         scroll_height = driver.execute_script("return document.body.scrollHeight")
@@ -173,88 +267,23 @@ def save_html(driver, url, site_folder, file_number, cookie_button=None, url_map
             scroll_height = driver.execute_script("return document.body.scrollHeight")
         time.sleep(1)
 
-        # Get fully rendered DOM
+        # Get fully rendered DOM, the page stays open so add_pdf_detail() can print it without loading it again
         html_content = driver.execute_script("return document.documentElement.outerHTML;")
-
-        # save HTML
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html_content)
-
-        # updating url_map so that url can stay associated with .html
-        if url_map is not None:
-            url_map[file_number] = url
-        
-        return html_path
-
+        mark_rendered(driver, url)
+        return html_content
     except Exception as e:
-        print("Beautiful Soup and Selenium failed when trying to make a .html for:", url)
-        return None      
+        return None
 
 
 '''
-* function_identifier: find_alz_articles
-* summary: Check all saved HTML files in a site folder for keyword(s). Delete file and remove from dictionary if keyword not found.
-* parameters: 
-    - site_folder: folder containing saved HTML files.
-    - url_map: dictionary mapping file_number to URL for all saved HTML files.
-* returns: dictionary of filtered articles {file_number:url} containing the keyword(s)
-* note: starting html saves here because this is the first time article links are opened and read. 
+* function_identifier: has_keywords
+* summary: checks page text for the Alzheimer's related keyword(s) in KEYWORDS, in one pass with keyword_matcher (keywords.py).
+* parameters:
+    - page_text: text pulled from an HTML (ex. soup.get_text())
+* returns: True if any keyword is found, otherwise False.
 '''
-def find_alz_articles(site_folder, url_map): 
-    keywords = ["alzheim"] # add keywords to this list if you wanna expand the search
-    alz_html_url = {}
-
-    if not os.path.exists(site_folder):
-        print("Site folder does not exist:", site_folder)
-        return {}
-    
-    # loop through all HTML files in the folder
-    for html_filename in os.listdir(site_folder):
-        if not html_filename.endswith(".html"):
-            continue
-
-        # skipping non-numeric filenames since ones named after titles have already been scanned for keyword(s) and metadata
-        name = html_filename.replace(".html", "")
-        if not name.isdigit():
-            continue
-
-        file_number = int(html_filename.replace(".html", ""))
-        html_path = os.path.join(site_folder, html_filename)
-        url = url_map.get(file_number, None)
-
-        try:
-            # read HTML file and extract text
-            with open(html_path, "r", encoding="utf-8") as f:
-                soup = BeautifulSoup(f, "html.parser")
-            page_text = soup.get_text().lower()
-
-            # logging link after text freom HTML is successfully extracted.
-            if url:
-                log_checked_link(url)
-
-            # keep file if keyword(s) found; otherwise delete
-            if any(kw in page_text for kw in keywords):
-                alz_html_url[file_number] = url_map.get(file_number, "URL not found")
-            else:
-                os.remove(html_path)
-                if file_number in url_map:
-                    del url_map[file_number] 
-
-        except Exception as e:
-            print("Error occured when searching HTML for keyword:", html_path)
-            # try to remove file and url_map entry if an error occured when searching html
-            try:
-                if url:
-                    log_checked_link(url)
-                if os.path.exists(html_path):
-                    os.remove(html_path)
-                if file_number in url_map:
-                    del url_map[file_number]
-            except Exception as e:
-                pass
-            continue
-
-    return alz_html_url
+def has_keywords(page_text):
+    return keyword_matcher.contains(page_text)
 
 
 # ------------------------------------------------------------------------------------------------
@@ -278,10 +307,13 @@ def cookies_handler(driver, cookie_xpath):
         cookie_button = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.XPATH, cookie_xpath)))
         # scroll button into view and click
         driver.execute_script("arguments[0].scrollIntoView(true);", cookie_button)
-        time.sleep(1)
         cookie_button.click()
         print("Accepted cookies.") 
-        time.sleep(1) # giving page time to load without cookie consent popup
+        # giving page time to load without cookie consent popup, returns as soon as the popup is gone
+        try:
+            WebDriverWait(driver, 2, poll_frequency=0.2).until(EC.invisibility_of_element(cookie_button))
+        except Exception as e:
+            pass
         return True
     except Exception as e:
         #print("No cookie popup found")
@@ -290,7 +322,8 @@ def cookies_handler(driver, cookie_xpath):
     
 ''' 
 * function_identifier: add_pdf_detail
-* summary: Uses selenium driver to open the article and saves the full webpage as a pdf. Then adds the PDF path to the article details dictionary.
+* summary: Uses selenium driver to open the article and saves the full webpage as a pdf with the selected PDF engine (pdf_engine.py).
+    Then adds the PDF path to the article details dictionary.
 * parameters: 
     - driver: selenium webdriver
     - details: dictionary containing article details
@@ -307,14 +340,19 @@ def add_pdf_detail(driver, details, site_name=None, base_folder="saved_sites", c
             details["CLEAN TITLE"] = None
             return details
         
-        # navigating to the articale page using Selenium
-        try:
-            driver.get(url)
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            time.sleep(2)
-        except Exception as e:
-            details["PDF PATH"] = "Failed to Load Page"
-            return details
+        # reusing the page the browser just rendered, or the saved HTML, before loading the article live again (render_session.py)
+        live_load = False
+        if not is_rendered(driver, url) and not load_snapshot(driver, details.get("HTML PATH"), url, cookie_xpath):
+            live_load = True
+            # navigating to the articale page using Selenium
+            try:
+                wait_for_token(url)
+                driver.get(url)
+                WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                time.sleep(2)
+            except Exception as e:
+                details["PDF PATH"] = "Failed to Load Page"
+                return details
         
         # checking to see if a folder exists. If not create one.
         try:
@@ -327,67 +365,26 @@ def add_pdf_detail(driver, details, site_name=None, base_folder="saved_sites", c
             details["PDF PATH"] = "Folder Creation Failed"
             return details
         
-        # accept cookie popup if XPath is provided
+        # accept cookie popup if XPath is provided, already done for rendered pages and removed from snapshots by load_snapshot()
         try:
-            if cookie_xpath:
+            if cookie_xpath and live_load:
                 cookies_handler(driver, cookie_xpath)
         except Exception as e:
             print("No cookie popup found. Continuing...")
 
-        # resizing the browser window so that it fits the entire page
-        try:
-            total_width = driver.execute_script("return document.documentElement.scrollWidth")
-            total_height = driver.execute_script("return document.documentElement.scrollHeight")
-            driver.set_window_size(total_width, total_height)
-        except Exception as e:
-            print("Could not resize window for", url)
-
-        # taking a screenshot of webpage
+        # creating a unique file name whether it be based of article title or timestamp, PDF jobs pass the name the HTML was renamed to
         try:
-            screenshot_path = os.path.join(pdf_folder, "temp_screenshot.png")
-            driver.save_screenshot(screenshot_path) # saves screenshot as PNG
-        except Exception as e:
-            details["PDF PATH"] = "Screenshot failed"
-            return details
-        
-        # convert screenshot to RGB if needed
-        try: 
-            image = Image.open(screenshot_path)
-            if image.mode != "RGB": # Converting to RGB because PDFs require this format
-                image = image.convert("RGB")
-        except Exception as e:
-            details["PDF PATH"] = "Image conversion failed."
-            return details
-        
-        # creating a unique file name whether it be based of article title or timestamp
-        try:
-            article_title = details.get("TITLE")
-            # fallback in case title was unable to be pulled from a get_details function
-            if article_title == "N/A":
-                now = datetime.now()
-                time_marker = now.strftime("%m%d_%H%M%S") #MMDD_HHMMSS 
-                article_title = "webpage_"+time_marker
-
-            # removing characters that are not allowed in filenames
-            clean_title = re.sub(r'[\\/*?:"<>|]', "", article_title[:60]).strip()
-            clean_title = clean_title.replace(" ", "_")
+            clean_title = details.get("CLEAN TITLE") or make_clean_title(details.get("TITLE"))
             pdf_path = os.path.join(pdf_folder, clean_title + ".pdf")
         except Exception as e:
             print("Problem creating filename for", url)
 
-        # saving image as PDF
+        # saving the page as a PDF, printed by chrome (vector, searchable text) or as a screenshot if printing fails (pdf_engine.py)
         try:
-            image.save(pdf_path, "PDF", resolution = 100.0)
+            save_page_pdf(driver, pdf_path)
         except Exception as e:
             details["PDF PATH"] = "PDF save failed"
             return details
-        
-        # remove temporary screenshot, since image has been saved as a PDF
-        try:
-            if os.path.exists(screenshot_path):
-                os.remove(screenshot_path)
-        except Exception as e:
-            print("Unable to delete temporary screenshot.")
 
         details["PDF PATH"] = pdf_path
         details["CLEAN TITLE"] = clean_title
@@ -397,6 +394,9 @@ def add_pdf_detail(driver, details, site_name=None, base_folder="saved_sites", c
         print("Failed to create PDF for" + details.get("URL"))
         details["PDF PATH"] = "PDF generation failed"
         details["CLEAN TITLE"] = None
+    finally:
+        # the network was blocked while a snapshot was showing (render_session.py)
+        release_snapshot(driver)
 
     #print("PDF has been created.")
     return details